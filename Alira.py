@@ -6,21 +6,29 @@ Version avec compréhension linguistique avancée
 
 import sys
 import subprocess
-import importlib
+import importlib.util
 import re
 import json
 import os
 import datetime
 import random
 from pathlib import Path
-import mysql.connector
-from mysql.connector import Error
 import dotenv
-import requests
 from urllib.parse import quote
 import time
-import torch
 import logging
+import threading
+import queue
+import atexit
+import sqlite3
+import zlib
+import unicodedata
+import bisect
+import math
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import OrderedDict
+from itertools import combinations, islice, tee
+from contextlib import contextmanager
 
 # Configuration du logging
 logging.basicConfig(
@@ -61,6 +69,92 @@ SEUILS_AUTONOMIE = {
     'taux_utilisation_modele_adulte': 0.1
 }
 
+# Cache LRU des analyses linguistiques (0 pour désactiver)
+ANALYSE_CACHE_TAILLE = int(os.getenv('ALIRA_ANALYSE_CACHE_TAILLE', 1024))
+
+# Pipeline spaCy : profil chargé (complet, standard sans NER, leger :
+# tokeniseur et lemmatiseur par table seulement) et chargement différé au
+# premier besoin d'analyse (1) ou dès le démarrage (0)
+MODELE_SPACY = os.getenv('ALIRA_MODELE_SPACY', 'fr_core_news_sm')
+SPACY_PROFIL = os.getenv('ALIRA_SPACY_PROFIL', 'standard')
+SPACY_PARESSEUX = os.getenv('ALIRA_SPACY_PARESSEUX', '1') != '0'
+
+# Analyse en masse (imports, réindexations, évaluations) : phrases par lot
+# nlp.pipe et nombre de processus (-1 : un par cœur)
+ANALYSE_LOT_TAILLE = int(os.getenv('ALIRA_ANALYSE_LOT_TAILLE', 256))
+ANALYSE_PROCESSUS = int(os.getenv('ALIRA_ANALYSE_PROCESSUS', 1))
+
+# Copie en mémoire de chatbot_memory pour les correspondances exactes
+# (0 pour interroger MySQL directement) et intervalle de rafraîchissement
+# depuis updated_at, en secondes (0 pour ne jamais rafraîchir)
+MEMOIRE_CACHE_ACTIF = os.getenv('ALIRA_CACHE_MEMOIRE', '1') != '0'
+MEMOIRE_CACHE_RAFRAICHISSEMENT = float(os.getenv('ALIRA_CACHE_MEMOIRE_RAFRAICHISSEMENT', 0))
+
+# Journal des conversations (chat_history) écrit en arrière-plan : activation,
+# capacité de la file (au-delà, les échanges sont abandonnés et comptés),
+# attente maximale (ms) d'une place libre avant abandon, lignes par INSERT
+# et délai maximal (ms) avant d'écrire un lot incomplet
+HISTORIQUE_ACTIF = os.getenv('ALIRA_HISTORIQUE', '1') != '0'
+HISTORIQUE_FILE = int(os.getenv('ALIRA_HISTORIQUE_FILE', 10000))
+HISTORIQUE_ATTENTE_MS = float(os.getenv('ALIRA_HISTORIQUE_ATTENTE_MS', 0))
+HISTORIQUE_LOT = int(os.getenv('ALIRA_HISTORIQUE_LOT', 200))
+HISTORIQUE_DELAI_MS = float(os.getenv('ALIRA_HISTORIQUE_DELAI_MS', 500))
+
+# Index vectoriel (TF-IDF haché) des questions apprises, pour retrouver les
+# reformulations : activation, fichier de sauvegarde, nombre de dimensions
+# et similarité cosinus minimale pour accepter une réponse
+INDEX_VECTORIEL_ACTIF = os.getenv('ALIRA_INDEX_VECTORIEL', '1') != '0'
+INDEX_VECTORIEL_FICHIER = os.getenv('ALIRA_INDEX_VECTORIEL_FICHIER', 'alira_index_vectoriel.npz')
+INDEX_VECTORIEL_DIMENSION = int(os.getenv('ALIRA_INDEX_VECTORIEL_DIMENSION', 1024))
+INDEX_VECTORIEL_SEUIL = float(os.getenv('ALIRA_INDEX_VECTORIEL_SEUIL', 0.55))
+
+# Index plein texte (BM25) des questions et réponses apprises, consulté avant
+# Wikipédia : activation et part minimale du poids IDF de la question que
+# les mots trouvés dans la connaissance doivent couvrir
+PLEIN_TEXTE_ACTIF = os.getenv('ALIRA_PLEIN_TEXTE', '1') != '0'
+PLEIN_TEXTE_SEUIL = float(os.getenv('ALIRA_PLEIN_TEXTE_SEUIL', 0.5))
+
+# Correction orthographique par index de suppressions (SymSpell) sur le
+# vocabulaire appris : activation et distance d'édition maximale
+CORRECTION_ACTIVE = os.getenv('ALIRA_CORRECTION', '1') != '0'
+CORRECTION_DISTANCE = int(os.getenv('ALIRA_CORRECTION_DISTANCE', 2))
+
+# Moteur de stockage : mysql (serveur) ou sqlite (fichier local en mode WAL,
+# sans serveur à installer), et chemin du fichier SQLite
+STOCKAGE = os.getenv('ALIRA_STOCKAGE', 'mysql').lower()
+SQLITE_FICHIER = os.getenv('ALIRA_SQLITE_FICHIER', 'alira.sqlite3')
+
+# Pool de connexions (MySQL ou SQLite) : nombre maximal de connexions simultanées et
+# délai d'attente (s) pour emprunter une connexion quand toutes sont prises
+MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 5))
+MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', 10))
+# Inactivité (s) au-delà de laquelle une connexion est vérifiée par un ping
+# avant d'être prêtée (0 : à chaque emprunt)
+MYSQL_POOL_PING_INACTIVITE = float(os.getenv('MYSQL_POOL_PING_INACTIVITE', 30))
+
+# Compteurs use_count et learning_stats écrits en différé : intervalle
+# maximal (s) entre deux écritures (0 pour écrire immédiatement) et nombre
+# d'incréments en attente déclenchant une écriture anticipée
+COMPTEURS_DELAI = float(os.getenv('ALIRA_COMPTEURS_DELAI', 5))
+COMPTEURS_SEUIL = int(os.getenv('ALIRA_COMPTEURS_SEUIL', 100))
+
+# Repli Wikipédia : URL de base (remplaçable par un serveur local de test),
+# délai HTTP (s), nombre de requêtes parallèles, et cache disque avec durées
+# de vie (s) des réponses trouvées et des pages absentes (404)
+WIKIPEDIA_URL = os.getenv('ALIRA_WIKIPEDIA_URL', 'https://fr.wikipedia.org')
+WIKIPEDIA_TIMEOUT = float(os.getenv('ALIRA_WIKIPEDIA_TIMEOUT', 3))
+WIKIPEDIA_WORKERS = int(os.getenv('ALIRA_WIKIPEDIA_WORKERS', 4))
+WIKIPEDIA_CACHE_FICHIER = os.getenv('ALIRA_WIKIPEDIA_CACHE', 'alira_wikipedia_cache.sqlite3')
+WIKIPEDIA_CACHE_TTL = int(os.getenv('ALIRA_WIKIPEDIA_CACHE_TTL', 7 * 24 * 3600))
+WIKIPEDIA_CACHE_TTL_NEGATIF = int(os.getenv('ALIRA_WIKIPEDIA_CACHE_TTL_NEGATIF', 24 * 3600))
+# Lancer la requête Wikipédia en parallèle des recherches locales (1) ou seulement après (0)
+WIKIPEDIA_ANTICIPATION = os.getenv('ALIRA_WIKIPEDIA_ANTICIPATION', '0') == '1'
+# Index local des résumés (construit par index_wikipedia.py depuis un dump),
+# consulté avant le réseau s'il existe, et requêtes en ligne autorisées
+# (0 : index local et cache seulement, pour les hôtes sans accès sortant)
+WIKIPEDIA_INDEX_FICHIER = os.getenv('ALIRA_WIKIPEDIA_INDEX', 'alira_wikipedia_index.sqlite3')
+WIKIPEDIA_EN_LIGNE = os.getenv('ALIRA_WIKIPEDIA_EN_LIGNE', '1') != '0'
+
 # Couleurs pour l'interface
 class Couleurs:
     BLEU = '\033[94m'
@@ -83,29 +177,36 @@ def afficher_avec_style(texte, couleur=None, gras=False):
 # 1. GESTION DES DÉPENDANCES
 # ---------------------------------------------------------
 
+def module_disponible(nom_import):
+    """Indique si un module est installé, sans l'importer"""
+    try:
+        return importlib.util.find_spec(nom_import) is not None
+    except (ImportError, ValueError):
+        return False
+
 def installer_module(nom_module, nom_import=None, option_install=None):
-    """Tente d'importer un module et l'installe si absent"""
+    """Vérifie qu'un module est installé et l'installe si absent"""
     if nom_import is None:
         nom_import = nom_module
     
-    try:
-        importlib.import_module(nom_import)
+    if module_disponible(nom_import):
         logger.info(f"{nom_module} est déjà installé")
         return True
-    except ImportError:
-        logger.info(f"{nom_module} n'est pas installé. Installation en cours...")
-        try:
-            cmd = [sys.executable, "-m", "pip", "install"]
-            if option_install:
-                cmd.append(option_install)
-            cmd.append(nom_module)
-            
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            logger.info(f"{nom_module} installé avec succès")
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Échec de l'installation de {nom_module}: {e.stderr}")
-            return False
+    
+    logger.info(f"{nom_module} n'est pas installé. Installation en cours...")
+    try:
+        cmd = [sys.executable, "-m", "pip", "install"]
+        if option_install:
+            cmd.append(option_install)
+        cmd.append(nom_module)
+        
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        importlib.invalidate_caches()
+        logger.info(f"{nom_module} installé avec succès")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Échec de l'installation de {nom_module}: {e.stderr}")
+        return False
 
 def verifier_et_installer_dependances():
     """Vérifie et installe toutes les dépendances nécessaires"""
@@ -113,12 +214,13 @@ def verifier_et_installer_dependances():
     
     dependances = [
         ("spacy", "spacy", None),
-        ("mysql-connector-python", "mysql.connector", None),
         ("python-dotenv", "dotenv", None),
         ("requests", "requests", None),
-        ("torch", "torch", None),
-        ("transformers", "transformers", None),
+        ("numpy", "numpy", None),
     ]
+    # Le pilote MySQL n'est requis que par ce moteur (SQLite est dans la bibliothèque standard)
+    if STOCKAGE == 'mysql':
+        dependances.append(("mysql-connector-python", "mysql.connector", None))
     
     for nom_pip, nom_import, option in dependances:
         if not installer_module(nom_pip, nom_import, option):
@@ -127,42 +229,517 @@ def verifier_et_installer_dependances():
     
     return True
 
-def verifier_modele_spacy(nom_modele="fr_core_news_sm"):
-    """Vérifie si le modèle spaCy français est installé, sinon l'installe"""
+def verifier_modele_spacy(nom_modele=MODELE_SPACY):
+    """Vérifie si le modèle spaCy français est installé, sinon l'installe.
+    
+    Le modèle est un paquet Python : sa présence se vérifie sans le charger,
+    le seul chargement a lieu dans initialiser_spacy().
+    """
+    if not module_disponible("spacy"):
+        return False
+    
+    if module_disponible(nom_modele):
+        logger.info(f"Modèle spaCy '{nom_modele}' est déjà installé")
+        return True
+    
+    logger.info(f"Modèle spaCy '{nom_modele}' non trouvé. Installation...")
     try:
-        import spacy
+        cmd = [sys.executable, "-m", "spacy", "download", nom_modele]
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        importlib.invalidate_caches()
+        logger.info(f"Modèle '{nom_modele}' installé avec succès")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Échec de l'installation du modèle: {e.stderr}")
         try:
-            spacy.load(nom_modele)
-            logger.info(f"Modèle spaCy '{nom_modele}' est déjà installé")
+            nom_modele_pip = nom_modele.replace("_", "-")
+            cmd = [sys.executable, "-m", "pip", "install", nom_modele_pip]
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            importlib.invalidate_caches()
+            logger.info("Modèle installé via pip alternative")
             return True
-        except OSError:
-            logger.info(f"Modèle spaCy '{nom_modele}' non trouvé. Installation...")
-            try:
-                cmd = [sys.executable, "-m", "spacy", "download", nom_modele]
-                result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-                logger.info(f"Modèle '{nom_modele}' installé avec succès")
-                return True
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Échec de l'installation du modèle: {e.stderr}")
-                try:
-                    nom_modele_pip = nom_modele.replace("_", "-")
-                    cmd = [sys.executable, "-m", "pip", "install", nom_modele_pip]
-                    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-                    logger.info("Modèle installé via pip alternative")
-                    return True
-                except subprocess.CalledProcessError:
-                    logger.error("Échec de l'installation via pip alternative")
-                    return False
-    except ImportError:
-        return False
+        except subprocess.CalledProcessError:
+            logger.error("Échec de l'installation via pip alternative")
+            return False
 
 # ---------------------------------------------------------
-# 2. CONFIGURATION MYSQL
+# 2. STOCKAGE (MYSQL OU SQLITE)
 # ---------------------------------------------------------
 
+class ErreurStockage(Exception):
+    """Erreur de base de données levée par ALIRA elle-même (pilote absent, par exemple)"""
+
+# Pilote MySQL, importé par pilote_mysql() : ALIRA_STOCKAGE=sqlite s'en passe
+mysql = None
+errorcode = None
+
+# Erreurs de base de données, quel que soit le moteur : `except Error`.
+# Celles du pilote MySQL s'y ajoutent quand il est importé.
+Error = (ErreurStockage, sqlite3.Error)
+
+def pilote_mysql():
+    """Importe mysql.connector au premier besoin (ErreurStockage s'il n'est pas installé)"""
+    global mysql, errorcode, Error
+    if mysql is None:
+        try:
+            import mysql.connector
+            from mysql.connector import errorcode
+        except ImportError as e:
+            raise ErreurStockage("mysql-connector-python n'est pas installé "
+                                 "(requis par ALIRA_STOCKAGE=mysql)") from e
+        Error = Error + (mysql.connector.Error,)
+    return mysql.connector
+
+# Avec MySQL, le pilote est importé dès le chargement du module : un
+# `from Alira import Error` couvre alors aussi ses exceptions
+if STOCKAGE == 'mysql' and module_disponible("mysql.connector"):
+    pilote_mysql()
+
+# Dates Python enregistrées au format de CURRENT_TIMESTAMP (heure locale, comme MySQL)
+sqlite3.register_adapter(datetime.datetime, lambda date: date.isoformat(sep=' ', timespec='seconds'))
+
+class CompteurAllersRetours:
+    """Nombre de requêtes envoyées à la base par le thread courant.
+    
+    Le compteur ne fait qu'augmenter : le nombre d'allers-retours d'une
+    requête utilisateur est la différence entre deux lectures dans le même
+    thread. Les threads de fond (compteurs, historique) ont leur propre
+    compteur et ne faussent donc pas la mesure.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+    
+    def compter(self):
+        self._local.valeur = getattr(self._local, 'valeur', 0) + 1
+    
+    def valeur(self):
+        return getattr(self._local, 'valeur', 0)
+
+ALLERS_RETOURS = CompteurAllersRetours()
+
+class CurseurCompte:
+    """Curseur qui compte chaque execute/executemany dans ALLERS_RETOURS"""
+    
+    def __init__(self, curseur):
+        self._curseur = curseur
+    
+    def execute(self, *args, **kwargs):
+        ALLERS_RETOURS.compter()
+        return self._curseur.execute(*args, **kwargs)
+    
+    def executemany(self, *args, **kwargs):
+        ALLERS_RETOURS.compter()
+        return self._curseur.executemany(*args, **kwargs)
+    
+    def __iter__(self):
+        return iter(self._curseur)
+    
+    def __getattr__(self, nom):
+        return getattr(self._curseur, nom)
+
+class ConnexionComptee:
+    """Connexion dont les curseurs sont comptés (les autres attributs sont délégués)"""
+    
+    def __init__(self, connection):
+        self._connection = connection
+    
+    def cursor(self, *args, **kwargs):
+        return CurseurCompte(self._connection.cursor(*args, **kwargs))
+    
+    def __getattr__(self, nom):
+        return getattr(self._connection, nom)
+
+# Requêtes dont la syntaxe diffère entre MySQL et SQLite (upserts et
+# insertions ignorant les doublons), choisies par `pool.requetes[nom]`
+REQUETES_MYSQL = {
+    # Apprentissage : un doublon compte comme un réapprentissage
+    'apprendre': """
+    INSERT INTO chatbot_memory (question_normalized, response, learn_count)
+    VALUES (%s, %s, 1)
+    ON DUPLICATE KEY UPDATE 
+        response = VALUES(response),
+        learn_count = learn_count + 1
+    """,
+    # Chargement en masse : les questions déjà connues sont conservées
+    'apprendre_si_absente': """
+    INSERT IGNORE INTO chatbot_memory (question_normalized, response, learn_count)
+    VALUES (%s, %s, 1)
+    """,
+    'variation': """
+    INSERT INTO variations_contexte (question_id, variation, type_contexte, confidence)
+    VALUES (%s, %s, 'semantique', 0.9)
+    ON DUPLICATE KEY UPDATE confidence = VALUES(confidence)
+    """,
+    # Les synonymes d'un concept déjà connu s'ajoutent aux anciens
+    'concept': """
+    INSERT INTO concepts_semantiques (concept_principal, synonyms)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE
+        synonyms = JSON_MERGE_PRESERVE(synonyms, VALUES(synonyms))
+    """,
+    # Concept de base : synonymes et catégories remplacés
+    'concept_definir': """
+    INSERT INTO concepts_semantiques (concept_principal, synonyms, categories)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        synonyms = VALUES(synonyms),
+        categories = VALUES(categories)
+    """,
+    'synonyme': """
+    INSERT IGNORE INTO synonymes_concepts (synonyme, concept_id) VALUES (%s, %s)
+    """,
+    'relation': """
+    INSERT INTO relations_semantiques (concept_source, relation_type, concept_cible)
+    VALUES (%s, 'action', %s)
+    ON DUPLICATE KEY UPDATE force_relation = force_relation + 0.1
+    """,
+    'statistique_definir': """
+    INSERT INTO learning_stats (stat_key, stat_value)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE stat_value = VALUES(stat_value)
+    """,
+    # Question normalisée sans analyse -> connaissance apprise sous une autre clé
+    'cle_exacte': """
+    INSERT INTO cles_exactes (cle, question_id) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE question_id = VALUES(question_id)
+    """,
+}
+
+REQUETES_SQLITE = {
+    'apprendre': """
+    INSERT INTO chatbot_memory (question_normalized, response, learn_count)
+    VALUES (%s, %s, 1)
+    ON CONFLICT (question_normalized) DO UPDATE SET
+        response = excluded.response,
+        learn_count = learn_count + 1
+    """,
+    'apprendre_si_absente': """
+    INSERT OR IGNORE INTO chatbot_memory (question_normalized, response, learn_count)
+    VALUES (%s, %s, 1)
+    """,
+    'variation': """
+    INSERT INTO variations_contexte (question_id, variation, type_contexte, confidence)
+    VALUES (%s, %s, 'semantique', 0.9)
+    ON CONFLICT (question_id, variation) DO UPDATE SET confidence = excluded.confidence
+    """,
+    # Équivalent de JSON_MERGE_PRESERVE pour deux tableaux : concaténation
+    'concept': """
+    INSERT INTO concepts_semantiques (concept_principal, synonyms)
+    VALUES (%s, %s)
+    ON CONFLICT (concept_principal) DO UPDATE SET
+        synonyms = (SELECT json_group_array(value) FROM (
+            SELECT value FROM json_each(concepts_semantiques.synonyms)
+            UNION ALL SELECT value FROM json_each(excluded.synonyms)))
+    """,
+    'concept_definir': """
+    INSERT INTO concepts_semantiques (concept_principal, synonyms, categories)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (concept_principal) DO UPDATE SET
+        synonyms = excluded.synonyms,
+        categories = excluded.categories
+    """,
+    'synonyme': """
+    INSERT OR IGNORE INTO synonymes_concepts (synonyme, concept_id) VALUES (%s, %s)
+    """,
+    'relation': """
+    INSERT INTO relations_semantiques (concept_source, relation_type, concept_cible)
+    VALUES (%s, 'action', %s)
+    ON CONFLICT (concept_source, relation_type, concept_cible) DO UPDATE SET
+        force_relation = force_relation + 0.1
+    """,
+    'statistique_definir': """
+    INSERT INTO learning_stats (stat_key, stat_value)
+    VALUES (%s, %s)
+    ON CONFLICT (stat_key) DO UPDATE SET stat_value = excluded.stat_value
+    """,
+    'cle_exacte': """
+    INSERT INTO cles_exactes (cle, question_id) VALUES (%s, %s)
+    ON CONFLICT (cle) DO UPDATE SET question_id = excluded.question_id
+    """,
+}
+
+class PoolConnexionsMySQL:
+    """Pool de connexions MySQL partagé par toutes les couches mémoire.
+    
+    Chaque tâche emprunte une connexion le temps d'une opération
+    (``with pool.connexion() as connection``) puis la rend. Une connexion
+    n'est donc jamais utilisée par deux threads à la fois. À l'emprunt,
+    seule une connexion restée inactive plus de `ping_inactivite` secondes,
+    ou rendue après une erreur, est vérifiée par un ping (reconnectée si
+    besoin) : les autres sont prêtées sans aller-retour supplémentaire.
+    Les requêtes propres au dialecte SQL (upserts) sont dans `requetes`.
+    """
+    
+    moteur = "MySQL"
+    requetes = REQUETES_MYSQL
+    
+    @property
+    def ErreurPool(self):
+        return pilote_mysql().errors.PoolError
+    
+    @property
+    def ErreursConnexion(self):
+        """Erreurs qui peuvent signaler une connexion perdue"""
+        erreurs = pilote_mysql().errors
+        return (erreurs.OperationalError, erreurs.InterfaceError)
+    
+    def __init__(self, config, taille=MYSQL_POOL_SIZE, delai=MYSQL_POOL_TIMEOUT,
+                 ping_inactivite=MYSQL_POOL_PING_INACTIVITE):
+        self.config = config
+        self.taille = max(1, taille)
+        self.delai = delai
+        self.ping_inactivite = ping_inactivite
+        # Connexions libres et instant (monotonic) où elles ont été rendues
+        self._libres = queue.LifoQueue()
+        self._places = threading.BoundedSemaphore(self.taille)
+        self._verrou = threading.Lock()
+        self.connexions_ouvertes = 0
+        self.reconnexions = 0
+        self.pings = 0
+    
+    def emprunter(self):
+        """Emprunte une connexion saine, en attendant au plus `delai` secondes"""
+        if not self._places.acquire(timeout=self.delai):
+            raise self.ErreurPool(
+                f"Aucune connexion {self.moteur} libre après {self.delai}s (pool de {self.taille})")
+        try:
+            try:
+                connection, rendue_le = self._libres.get_nowait()
+            except queue.Empty:
+                connection = self._ouvrir()
+                with self._verrou:
+                    self.connexions_ouvertes += 1
+            else:
+                if time.monotonic() - rendue_le >= self.ping_inactivite:
+                    try:
+                        self._verifier_sante(connection)
+                    except BaseException:
+                        self._fermer_connexion(connection)
+                        raise
+            return connection
+        except BaseException:
+            self._places.release()
+            raise
+    
+    @property
+    def identifiant(self):
+        """Base désignée par ce pool : moteur, serveur et nom de la base"""
+        return f"{self.moteur}://{self.config.get('host')}:{self.config.get('port')}/{self.config.get('database')}"
+    
+    def _ouvrir(self):
+        return pilote_mysql().connect(**self.config)
+    
+    def _verifier_sante(self, connection):
+        """Contrôle de santé : ping avec reconnexion transparente"""
+        ALLERS_RETOURS.compter()
+        self.pings += 1
+        try:
+            connection.ping(reconnect=False)
+        except Error:
+            connection.ping(reconnect=True, attempts=3, delay=0)
+            self.reconnexions += 1
+    
+    def rendre(self, connection, suspecte=False):
+        """Rend une connexion au pool (en annulant toute transaction restée ouverte).
+        
+        Une connexion `suspecte` (rendue après une erreur de base) sera
+        vérifiée au prochain emprunt, quelle que soit son inactivité.
+        """
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            self._libres.put((connection, float('-inf') if suspecte else time.monotonic()))
+        except Error:
+            self._fermer_connexion(connection)
+        finally:
+            self._places.release()
+    
+    @contextmanager
+    def connexion(self):
+        """Emprunte une connexion pour la durée du bloc"""
+        connection = self.emprunter()
+        suspecte = False
+        try:
+            yield ConnexionComptee(connection)
+        except self.ErreursConnexion:
+            suspecte = True
+            raise
+        finally:
+            self.rendre(connection, suspecte)
+    
+    @contextmanager
+    def transaction(self):
+        """Emprunte une connexion et exécute le bloc en une seule transaction.
+        
+        Les connexions sont en autocommit : sans transaction explicite,
+        chaque requête (et chaque ligne d'un executemany MySQL) serait
+        validée séparément. La transaction est validée à la fin du bloc et
+        annulée s'il lève une exception.
+        """
+        with self.connexion() as connection:
+            connection.start_transaction()
+            try:
+                yield connection
+                connection.commit()
+            except BaseException:
+                try:
+                    connection.rollback()
+                except Error:
+                    pass
+                raise
+    
+    def tester(self):
+        """Vérifie qu'une connexion peut être obtenue"""
+        try:
+            with self.connexion() as connection:
+                return connection.is_connected()
+        except Error as e:
+            logger.error(f"Erreur de connexion {self.moteur}: {e}")
+            return False
+    
+    def _fermer_connexion(self, connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+        with self._verrou:
+            self.connexions_ouvertes -= 1
+    
+    def fermer(self):
+        """Ferme toutes les connexions inactives"""
+        while True:
+            try:
+                connection, _ = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            self._fermer_connexion(connection)
+    
+    def statistiques(self):
+        """Retourne l'état du pool"""
+        return {
+            'taille': self.taille,
+            'ouvertes': self.connexions_ouvertes,
+            'inactives': self._libres.qsize(),
+            'pings': self.pings,
+            'reconnexions': self.reconnexions
+        }
+
+class CurseurSQLite:
+    """Curseur sqlite3 présenté comme un curseur mysql.connector.
+    
+    Les marqueurs %s deviennent des ?, et dictionary=True renvoie chaque
+    ligne sous forme de dictionnaire {colonne: valeur}.
+    """
+    
+    def __init__(self, curseur, dictionnaire=False):
+        self._curseur = curseur
+        self._dictionnaire = dictionnaire
+    
+    def execute(self, requete, parametres=()):
+        self._curseur.execute(requete.replace('%s', '?'), parametres)
+    
+    def executemany(self, requete, lignes):
+        self._curseur.executemany(requete.replace('%s', '?'), lignes)
+    
+    def _ligne(self, ligne):
+        if ligne is None or not self._dictionnaire:
+            return ligne
+        return dict(zip((colonne[0] for colonne in self._curseur.description), ligne))
+    
+    def fetchone(self):
+        return self._ligne(self._curseur.fetchone())
+    
+    def fetchall(self):
+        return [self._ligne(ligne) for ligne in self._curseur.fetchall()]
+    
+    def __iter__(self):
+        return (self._ligne(ligne) for ligne in self._curseur)
+    
+    @property
+    def lastrowid(self):
+        return self._curseur.lastrowid
+    
+    @property
+    def rowcount(self):
+        return self._curseur.rowcount
+    
+    @property
+    def description(self):
+        return self._curseur.description
+    
+    def close(self):
+        self._curseur.close()
+
+class ConnexionSQLite:
+    """Connexion sqlite3 présentée comme une connexion mysql.connector"""
+    
+    def __init__(self, connection):
+        self._connection = connection
+    
+    def cursor(self, dictionary=False):
+        return CurseurSQLite(self._connection.cursor(), dictionary)
+    
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+    
+    def start_transaction(self):
+        if not self._connection.in_transaction:
+            self._connection.execute("BEGIN")
+    
+    def commit(self):
+        self._connection.commit()
+    
+    def rollback(self):
+        self._connection.rollback()
+    
+    def is_connected(self):
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def close(self):
+        self._connection.close()
+
+class PoolConnexionsSQLite(PoolConnexionsMySQL):
+    """Pool de connexions à une base SQLite embarquée (un fichier local).
+    
+    Le journal est en mode WAL : les lectures se poursuivent pendant une
+    écriture, et une écriture concurrente attend le verrou au plus `delai`
+    secondes. Avec synchronous=NORMAL, une coupure de courant peut perdre
+    les dernières transactions validées, jamais corrompre la base.
+    """
+    
+    moteur = "SQLite"
+    ErreurPool = sqlite3.OperationalError
+    # Base locale : pas de connexion perdue à vérifier au prochain emprunt
+    ErreursConnexion = ()
+    requetes = REQUETES_SQLITE
+    
+    @property
+    def identifiant(self):
+        return f"{self.moteur}://{os.path.abspath(self.config['database'])}"
+    
+    def _ouvrir(self):
+        # Une connexion passe d'un thread à l'autre, jamais deux à la fois
+        connection = sqlite3.connect(self.config['database'], timeout=self.delai, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return ConnexionSQLite(connection)
+    
+    def _verifier_sante(self, connection):
+        """Base locale : aucune connexion à rétablir"""
+
 class MySQLConfig:
     """Configuration et gestion de la connexion MySQL"""
     
+    _pool = None
+    _verrou_pool = threading.Lock()
+    
     @staticmethod
     def get_connection_config():
         """Retourne la configuration de connexion"""
@@ -182,19 +759,27 @@ class MySQLConfig:
         """Établit une connexion MySQL"""
         try:
             config = MySQLConfig.get_connection_config()
-            connection = mysql.connector.connect(**config)
+            connection = pilote_mysql().connect(**config)
             if connection.is_connected():
                 return connection
         except Error as e:
             logger.error(f"Erreur de connexion MySQL: {e}")
             return None
     
+    @classmethod
+    def get_pool(cls):
+        """Retourne le pool de connexions partagé (créé au premier appel)"""
+        with cls._verrou_pool:
+            if cls._pool is None:
+                cls._pool = PoolConnexionsMySQL(cls.get_connection_config())
+            return cls._pool
+    
     @staticmethod
     def test_connection():
         """Teste la connexion MySQL"""
         try:
             config = MySQLConfig.get_connection_config()
-            connection = mysql.connector.connect(**config)
+            connection = pilote_mysql().connect(**config)
             if connection.is_connected():
                 logger.info("Connexion MySQL réussie")
                 connection.close()
@@ -205,7 +790,23 @@ class MySQLConfig:
     
     @staticmethod
     def setup_database():
-        """Crée la base de données et les tables si nécessaire"""
+        """Crée la base de données et applique les migrations en attente.
+        
+        Au démarrage courant, une seule requête suffit : la version
+        enregistrée dans schema_version est déjà la dernière.
+        """
+        try:
+            with MySQLConfig.get_pool().connexion() as connection:
+                cursor = connection.cursor()
+                version = MigrationsSchema.version_actuelle(cursor)
+                cursor.close()
+            if version >= MigrationsSchema.VERSION:
+                logger.info(f"Schéma MySQL à jour (version {version})")
+                return True
+        except Error:
+            # Base absente ou inaccessible : passage par la création complète
+            pass
+        
         try:
             config = MySQLConfig.get_connection_config()
             database_name = config.pop('database')
@@ -215,225 +816,1065 @@ class MySQLConfig:
             if 'database' in temp_config:
                 del temp_config['database']
                 
-            connection = mysql.connector.connect(**temp_config)
+            connection = pilote_mysql().connect(**temp_config)
             cursor = connection.cursor()
             
             cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
             cursor.execute(f"USE {database_name}")
             
+            MigrationsSchema.appliquer(cursor, connection)
+            
+            cursor.close()
+            connection.close()
+            
+            logger.info("Base de données MySQL configurée avec succès")
+            return True
+            
+        except Error as e:
+            logger.error(f"Erreur configuration MySQL: {e}")
+            return False
+
+class SQLiteConfig:
+    """Configuration du stockage SQLite embarqué (même interface que MySQLConfig).
+    
+    Aucune base à créer ni serveur à joindre : le fichier SQLITE_FICHIER
+    est créé au premier accès et le schéma par MigrationsSchemaSQLite.
+    """
+    
+    _pool = None
+    _verrou_pool = threading.Lock()
+    
+    @staticmethod
+    def get_connection_config():
+        """Retourne la configuration de connexion"""
+        return {'database': SQLITE_FICHIER}
+    
+    @classmethod
+    def get_pool(cls):
+        """Retourne le pool de connexions partagé (créé au premier appel)"""
+        with cls._verrou_pool:
+            if cls._pool is None:
+                cls._pool = PoolConnexionsSQLite(cls.get_connection_config())
+            return cls._pool
+    
+    @staticmethod
+    def test_connection():
+        """Teste l'accès au fichier SQLite"""
+        if SQLiteConfig.get_pool().tester():
+            logger.info(f"Base SQLite accessible: {SQLITE_FICHIER}")
+            return True
+        return False
+    
+    @staticmethod
+    def setup_database():
+        """Crée le fichier si besoin et applique les migrations en attente"""
+        try:
+            with SQLiteConfig.get_pool().connexion() as connection:
+                cursor = connection.cursor()
+                if not MigrationsSchemaSQLite.appliquer(cursor, connection):
+                    logger.info(f"Schéma SQLite à jour (version {MigrationsSchemaSQLite.VERSION})")
+                cursor.close()
+            return True
+        except Error as e:
+            logger.error(f"Erreur configuration SQLite: {e}")
+            return False
+
+# Statistiques créées avec le schéma : (stat_key, valeur initiale)
+STATISTIQUES_INITIALES = [
+    ('apprentissages', 0),
+    ('apprentissages_auto', 0),
+    ('corrections', 0),
+    ('suppressions', 0),
+    ('total_conversations', 0),
+    ('phase_bebe', 1),
+    ('niveau_autonomie', 0)
+]
+
+class MigrationsSchema:
+    """Migrations versionnées du schéma MySQL.
+    
+    Chaque migration porte un numéro ; la table schema_version garde la
+    trace de celles déjà appliquées. Les instructions DDL de MySQL validant
+    implicitement la transaction, chaque migration est écrite pour pouvoir
+    être rejouée sans dommage si elle a été interrompue.
+    """
+    
+    VERSION = 4
+    MOTEUR = "MySQL"
+    
+    @staticmethod
+    def version_actuelle(cursor):
+        """Dernière version appliquée (0 si la table schema_version n'existe pas)"""
+        try:
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            result = cursor.fetchone()
+            return (result[0] or 0) if result else 0
+        except Error as e:
+            if e.errno == errorcode.ER_NO_SUCH_TABLE:
+                return 0
+            raise
+    
+    @classmethod
+    def migrations(cls):
+        return [
+            (1, "Schéma initial et synonymes indexés", cls.schema_initial),
+            (2, "Dédoublonnage et clés uniques des concepts, relations et variations", cls.cles_uniques),
+            (3, "Clés chatbot_memory sans ponctuation", cls.cles_sans_ponctuation),
+            (4, "Clés de correspondance exacte des questions lemmatisées", cls.cles_exactes),
+        ]
+    
+    @staticmethod
+    def creer_table_versions(cursor):
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+    
+    @classmethod
+    def appliquer(cls, cursor, connection):
+        """Applique les migrations en attente ; retourne les versions appliquées"""
+        cls.creer_table_versions(cursor)
+        version = cls.version_actuelle(cursor)
+        
+        appliquees = []
+        for numero, description, migration in cls.migrations():
+            if numero <= version:
+                continue
+            logger.info(f"Migration {numero} : {description}...")
+            migration(cursor)
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                           (numero, description))
+            connection.commit()
+            appliquees.append(numero)
+        
+        if appliquees:
+            logger.info(f"Schéma {cls.MOTEUR} migré en version {appliquees[-1]}")
+        return appliquees
+    
+    @staticmethod
+    def _index_existe(cursor, table, index):
+        cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+        """, (table, index))
+        return bool(cursor.fetchall())
+    
+    @staticmethod
+    def schema_initial(cursor):
+        """Tables d'ALIRA (sans effet sur une base existante)"""
+        # Table principale des connaissances
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS chatbot_memory (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            question_normalized VARCHAR(255) NOT NULL UNIQUE,
+            response TEXT NOT NULL,
+            variations JSON,
+            learn_count INT DEFAULT 0,
+            use_count INT DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_question (question_normalized),
+            INDEX idx_created (created_at)
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        cursor.execute(create_table_query)
+        
+        # Table d'historique des conversations
+        create_history_query = """
+        CREATE TABLE IF NOT EXISTS chat_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_message TEXT NOT NULL,
+            bot_response TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_timestamp (timestamp)
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        cursor.execute(create_history_query)
+        
+        # Table des statistiques
+        create_stats_query = """
+        CREATE TABLE IF NOT EXISTS learning_stats (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            stat_key VARCHAR(50) NOT NULL UNIQUE,
+            stat_value INT DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        cursor.execute(create_stats_query)
+        
+        # Table des concepts sémantiques
+        create_semantic_query = """
+        CREATE TABLE IF NOT EXISTS concepts_semantiques (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            concept_principal VARCHAR(100) NOT NULL,
+            synonyms JSON,
+            categories JSON,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_concept (concept_principal)
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        cursor.execute(create_semantic_query)
+        
+        # Table des relations sémantiques
+        create_relations_query = """
+        CREATE TABLE IF NOT EXISTS relations_semantiques (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            concept_source VARCHAR(100) NOT NULL,
+            relation_type VARCHAR(50) NOT NULL,
+            concept_cible VARCHAR(100) NOT NULL,
+            force_relation FLOAT DEFAULT 1.0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_relation (concept_source, relation_type, concept_cible)
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        cursor.execute(create_relations_query)
+        
+        # Table des variations avec contexte
+        create_variations_query = """
+        CREATE TABLE IF NOT EXISTS variations_contexte (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            question_id INT NOT NULL,
+            variation TEXT NOT NULL,
+            type_contexte VARCHAR(50),
+            confidence FLOAT DEFAULT 1.0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (question_id) REFERENCES chatbot_memory(id),
+            INDEX idx_variation (variation(100)),
+            INDEX idx_type_contexte (type_contexte)
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        cursor.execute(create_variations_query)
+        
+        # Table des synonymes (indexée, remplace les recherches JSON_CONTAINS)
+        create_synonymes_query = """
+        CREATE TABLE IF NOT EXISTS synonymes_concepts (
+            synonyme VARCHAR(100) NOT NULL,
+            concept_id INT NOT NULL,
+            PRIMARY KEY (synonyme, concept_id),
+            INDEX idx_concept_id (concept_id),
+            FOREIGN KEY (concept_id) REFERENCES concepts_semantiques(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        cursor.execute(create_synonymes_query)
+        MigrationsSchema.migrer_synonymes(cursor)
+        
+        # Données initiales des statistiques
+        for stat_key, stat_value in STATISTIQUES_INITIALES:
+            cursor.execute("INSERT IGNORE INTO learning_stats (stat_key, stat_value) VALUES (%s, %s)", 
+                          (stat_key, stat_value))
+    
+    @staticmethod
+    def cles_uniques(cursor):
+        """Fusionne les doublons puis pose les clés uniques attendues par les ON DUPLICATE KEY UPDATE"""
+        # Concepts : on garde le plus ancien et on lui rattache les synonymes des doublons
+        cursor.execute("""
+        INSERT IGNORE INTO synonymes_concepts (synonyme, concept_id)
+        SELECT s.synonyme, g.id_garde
+        FROM synonymes_concepts s
+        JOIN concepts_semantiques c ON c.id = s.concept_id
+        JOIN (SELECT concept_principal, MIN(id) AS id_garde
+              FROM concepts_semantiques GROUP BY concept_principal HAVING COUNT(*) > 1) g
+          ON g.concept_principal = c.concept_principal AND c.id <> g.id_garde
+        """)
+        cursor.execute("""
+        DELETE c FROM concepts_semantiques c
+        JOIN (SELECT concept_principal, MIN(id) AS id_garde
+              FROM concepts_semantiques GROUP BY concept_principal HAVING COUNT(*) > 1) g
+          ON g.concept_principal = c.concept_principal AND c.id > g.id_garde
+        """)
+        logger.info(f"{cursor.rowcount} concepts en double supprimés")
+        if not MigrationsSchema._index_existe(cursor, 'concepts_semantiques', 'uk_concept_principal'):
+            cursor.execute("ALTER TABLE concepts_semantiques ADD UNIQUE KEY uk_concept_principal (concept_principal)")
+        if MigrationsSchema._index_existe(cursor, 'concepts_semantiques', 'idx_concept'):
+            cursor.execute("ALTER TABLE concepts_semantiques DROP INDEX idx_concept")
+        
+        # Relations : chaque doublon compte comme un renforcement (+0.1, comme l'upsert)
+        cursor.execute("""
+        UPDATE relations_semantiques r
+        JOIN (SELECT MIN(id) AS id_garde, MAX(force_relation) + 0.1 * (COUNT(*) - 1) AS force_fusionnee
+              FROM relations_semantiques
+              GROUP BY concept_source, relation_type, concept_cible HAVING COUNT(*) > 1) g
+          ON r.id = g.id_garde
+        SET r.force_relation = g.force_fusionnee
+        """)
+        cursor.execute("""
+        DELETE r FROM relations_semantiques r
+        JOIN (SELECT concept_source, relation_type, concept_cible, MIN(id) AS id_garde
+              FROM relations_semantiques
+              GROUP BY concept_source, relation_type, concept_cible HAVING COUNT(*) > 1) g
+          ON g.concept_source = r.concept_source AND g.relation_type = r.relation_type
+         AND g.concept_cible = r.concept_cible AND r.id > g.id_garde
+        """)
+        logger.info(f"{cursor.rowcount} relations en double supprimées")
+        if not MigrationsSchema._index_existe(cursor, 'relations_semantiques', 'uk_relation'):
+            cursor.execute("""
+            ALTER TABLE relations_semantiques
+                ADD UNIQUE KEY uk_relation (concept_source, relation_type, concept_cible)
+            """)
+        if MigrationsSchema._index_existe(cursor, 'relations_semantiques', 'idx_relation'):
+            cursor.execute("ALTER TABLE relations_semantiques DROP INDEX idx_relation")
+        
+        # Variations : unicité sur (question, 255 premiers caractères), meilleure confiance gardée
+        cursor.execute("""
+        UPDATE variations_contexte v
+        JOIN (SELECT MIN(id) AS id_garde, MAX(confidence) AS confiance
+              FROM variations_contexte
+              GROUP BY question_id, LEFT(variation, 255) HAVING COUNT(*) > 1) g
+          ON v.id = g.id_garde
+        SET v.confidence = g.confiance
+        """)
+        cursor.execute("""
+        DELETE v FROM variations_contexte v
+        JOIN (SELECT question_id, LEFT(variation, 255) AS debut, MIN(id) AS id_garde
+              FROM variations_contexte
+              GROUP BY question_id, LEFT(variation, 255) HAVING COUNT(*) > 1) g
+          ON g.question_id = v.question_id AND g.debut = LEFT(v.variation, 255) AND v.id > g.id_garde
+        """)
+        logger.info(f"{cursor.rowcount} variations en double supprimées")
+        if not MigrationsSchema._index_existe(cursor, 'variations_contexte', 'uk_question_variation'):
+            cursor.execute("""
+            ALTER TABLE variations_contexte
+                ADD UNIQUE KEY uk_question_variation (question_id, variation(255))
+            """)
+    
+    @staticmethod
+    def cles_sans_ponctuation(cursor):
+        """Retire ?¿!¡ des clés enregistrées avant l'unification de normaliser_question.
+        
+        Une clé dont la forme nettoyée existe déjà est laissée telle quelle.
+        """
+        cursor.execute("SELECT id, question_normalized FROM chatbot_memory WHERE question_normalized REGEXP '[?¿!¡]'")
+        renommees = 0
+        for memory_id, question in cursor.fetchall():
+            nouvelle = ' '.join(re.sub(r'[?¿!¡]', '', question).split())
+            if not nouvelle:
+                continue
+            # IGNORE : en cas de collision sur la clé unique, la ligne reste inchangée
+            cursor.execute("UPDATE IGNORE chatbot_memory SET question_normalized = %s WHERE id = %s",
+                           (nouvelle, memory_id))
+            renommees += cursor.rowcount
+        logger.info(f"{renommees} clés chatbot_memory renommées")
+    
+    @staticmethod
+    def cles_exactes(cursor):
+        """Table des questions normalisées sans analyse (« qui est socrate »)
+        qui mènent à une connaissance enregistrée sous sa forme lemmatisée
+        (« qui socrate ») par la mémoire sémantique"""
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cles_exactes (
+            cle VARCHAR(255) NOT NULL PRIMARY KEY,
+            question_id INT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_question_id (question_id),
+            INDEX idx_updated (updated_at),
+            FOREIGN KEY (question_id) REFERENCES chatbot_memory(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+    
+    @staticmethod
+    def migrer_synonymes(cursor, taille_lot=1000):
+        """Recopie la colonne JSON concepts_semantiques.synonyms dans synonymes_concepts.
+        
+        Ne fait rien si la table des synonymes est déjà alimentée.
+        """
+        cursor.execute("SELECT 1 FROM synonymes_concepts LIMIT 1")
+        if cursor.fetchall():
+            return 0
+        
+        cursor.execute("SELECT id, synonyms FROM concepts_semantiques WHERE synonyms IS NOT NULL")
+        lignes = []
+        for concept_id, synonyms in cursor.fetchall():
+            if isinstance(synonyms, (bytes, bytearray)):
+                synonyms = synonyms.decode('utf-8')
+            try:
+                synonymes = json.loads(synonyms)
+            except ValueError:
+                continue
+            if isinstance(synonymes, list):
+                lignes.extend((synonyme[:100], concept_id) for synonyme in synonymes
+                              if isinstance(synonyme, str) and synonyme)
+        
+        for debut in range(0, len(lignes), taille_lot):
+            cursor.executemany("INSERT IGNORE INTO synonymes_concepts (synonyme, concept_id) VALUES (%s, %s)",
+                               lignes[debut:debut + taille_lot])
+        if lignes:
+            logger.info(f"{len(lignes)} synonymes migrés vers synonymes_concepts")
+        return len(lignes)
+
+class MigrationsSchemaSQLite(MigrationsSchema):
+    """Migrations du schéma SQLite.
+    
+    Le schéma initial a directement la forme finale des migrations MySQL 1
+    à 3 (clés uniques, clés sans ponctuation) ; les suivantes sont reprises
+    une à une.
+    COLLATE NOCASE reproduit l'insensibilité à la casse de
+    utf8mb4_unicode_ci, mais pour l'ASCII seulement (é et É restent
+    distincts), et un déclencheur tient updated_at à jour comme
+    ON UPDATE CURRENT_TIMESTAMP.
+    """
+    
+    VERSION = 2
+    MOTEUR = "SQLite"
+    
+    @staticmethod
+    def version_actuelle(cursor):
+        """Dernière version appliquée (0 si la table schema_version n'existe pas)"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+        if not cursor.fetchall():
+            return 0
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        result = cursor.fetchone()
+        return (result[0] or 0) if result else 0
+    
+    @classmethod
+    def migrations(cls):
+        return [
+            (1, "Schéma initial", cls.schema_initial),
+            (2, "Clés de correspondance exacte des questions lemmatisées", cls.cles_exactes),
+        ]
+    
+    @staticmethod
+    def creer_table_versions(cursor):
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """)
+    
+    @staticmethod
+    def schema_initial(cursor):
+        """Tables d'ALIRA, index et déclencheurs"""
+        instructions = [
             # Table principale des connaissances
-            create_table_query = """
+            """
             CREATE TABLE IF NOT EXISTS chatbot_memory (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                question_normalized VARCHAR(255) NOT NULL UNIQUE,
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question_normalized VARCHAR(255) NOT NULL COLLATE NOCASE UNIQUE,
                 response TEXT NOT NULL,
-                variations JSON,
-                learn_count INT DEFAULT 0,
-                use_count INT DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_question (question_normalized),
-                INDEX idx_created (created_at)
-            ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                variations TEXT,
+                learn_count INTEGER DEFAULT 0,
+                use_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_chatbot_memory_created ON chatbot_memory (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_chatbot_memory_updated ON chatbot_memory (updated_at)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_chatbot_memory_updated AFTER UPDATE ON chatbot_memory
+            FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE chatbot_memory SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+            END
+            """,
+            # Historique des conversations
             """
-            cursor.execute(create_table_query)
-            
-            # Table d'historique des conversations
-            create_history_query = """
             CREATE TABLE IF NOT EXISTS chat_history (
-                id INT AUTO_INCREMENT PRIMARY KEY,
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_message TEXT NOT NULL,
                 bot_response TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_timestamp (timestamp)
-            ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                timestamp TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_chat_history_timestamp ON chat_history (timestamp)",
+            # Statistiques
             """
-            cursor.execute(create_history_query)
-            
-            # Table des statistiques
-            create_stats_query = """
             CREATE TABLE IF NOT EXISTS learning_stats (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                stat_key VARCHAR(50) NOT NULL UNIQUE,
-                stat_value INT DEFAULT 0,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stat_key VARCHAR(50) NOT NULL COLLATE NOCASE UNIQUE,
+                stat_value INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_learning_stats_updated AFTER UPDATE ON learning_stats
+            FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE learning_stats SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+            END
+            """,
+            # Concepts sémantiques
             """
-            cursor.execute(create_stats_query)
-            
-            # Table des concepts sémantiques
-            create_semantic_query = """
             CREATE TABLE IF NOT EXISTS concepts_semantiques (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                concept_principal VARCHAR(100) NOT NULL,
-                synonyms JSON,
-                categories JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_concept (concept_principal)
-            ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                concept_principal VARCHAR(100) NOT NULL COLLATE NOCASE UNIQUE,
+                synonyms TEXT,
+                categories TEXT,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+            """,
+            # Relations sémantiques
             """
-            cursor.execute(create_semantic_query)
-            
-            # Table des relations sémantiques
-            create_relations_query = """
             CREATE TABLE IF NOT EXISTS relations_semantiques (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                concept_source VARCHAR(100) NOT NULL,
-                relation_type VARCHAR(50) NOT NULL,
-                concept_cible VARCHAR(100) NOT NULL,
-                force_relation FLOAT DEFAULT 1.0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_relation (concept_source, relation_type, concept_cible)
-            ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                concept_source VARCHAR(100) NOT NULL COLLATE NOCASE,
+                relation_type VARCHAR(50) NOT NULL COLLATE NOCASE,
+                concept_cible VARCHAR(100) NOT NULL COLLATE NOCASE,
+                force_relation REAL DEFAULT 1.0,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                UNIQUE (concept_source, relation_type, concept_cible)
+            )
+            """,
+            # Variations avec contexte
             """
-            cursor.execute(create_relations_query)
-            
-            # Table des variations avec contexte
-            create_variations_query = """
             CREATE TABLE IF NOT EXISTS variations_contexte (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                question_id INT NOT NULL,
-                variation TEXT NOT NULL,
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question_id INTEGER NOT NULL REFERENCES chatbot_memory(id),
+                variation TEXT NOT NULL COLLATE NOCASE,
                 type_contexte VARCHAR(50),
-                confidence FLOAT DEFAULT 1.0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (question_id) REFERENCES chatbot_memory(id),
-                INDEX idx_variation (variation(100)),
-                INDEX idx_type_contexte (type_contexte)
-            ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                confidence REAL DEFAULT 1.0,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                UNIQUE (question_id, variation)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_variations_contexte_variation ON variations_contexte (variation)",
+            "CREATE INDEX IF NOT EXISTS idx_variations_contexte_type ON variations_contexte (type_contexte)",
+            # Synonymes indexés
             """
-            cursor.execute(create_variations_query)
-            
-            # Données initiales des statistiques
-            stats_data = [
-                ('apprentissages', 0),
-                ('apprentissages_auto', 0),
-                ('corrections', 0),
-                ('suppressions', 0),
-                ('total_conversations', 0),
-                ('phase_bebe', 1),
-                ('niveau_autonomie', 0)
-            ]
-            
-            for stat_key, stat_value in stats_data:
-                cursor.execute("INSERT IGNORE INTO learning_stats (stat_key, stat_value) VALUES (%s, %s)", 
-                              (stat_key, stat_value))
-            
-            connection.commit()
-            cursor.close()
-            connection.close()
-            
-            logger.info("Base de données MySQL configurée avec succès")
-            return True
-            
-        except Error as e:
-            logger.error(f"Erreur configuration MySQL: {e}")
-            return False
+            CREATE TABLE IF NOT EXISTS synonymes_concepts (
+                synonyme VARCHAR(100) NOT NULL COLLATE NOCASE,
+                concept_id INTEGER NOT NULL REFERENCES concepts_semantiques(id) ON DELETE CASCADE,
+                PRIMARY KEY (synonyme, concept_id)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_synonymes_concepts_concept ON synonymes_concepts (concept_id)",
+        ]
+        for instruction in instructions:
+            cursor.execute(instruction)
+        
+        cursor.executemany("INSERT OR IGNORE INTO learning_stats (stat_key, stat_value) VALUES (%s, %s)",
+                           STATISTIQUES_INITIALES)
+    
+    @staticmethod
+    def cles_exactes(cursor):
+        """Table des questions normalisées sans analyse menant à une clé lemmatisée"""
+        instructions = [
+            """
+            CREATE TABLE IF NOT EXISTS cles_exactes (
+                cle VARCHAR(255) NOT NULL COLLATE NOCASE PRIMARY KEY,
+                question_id INTEGER NOT NULL REFERENCES chatbot_memory(id) ON DELETE CASCADE,
+                updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_cles_exactes_question ON cles_exactes (question_id)",
+            "CREATE INDEX IF NOT EXISTS idx_cles_exactes_updated ON cles_exactes (updated_at)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_cles_exactes_updated AFTER UPDATE ON cles_exactes
+            FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE cles_exactes SET updated_at = datetime('now', 'localtime') WHERE cle = NEW.cle;
+            END
+            """,
+        ]
+        for instruction in instructions:
+            cursor.execute(instruction)
+
+# Moteurs de stockage disponibles (ALIRA_STOCKAGE)
+STOCKAGES = {
+    'mysql': MySQLConfig,
+    'sqlite': SQLiteConfig,
+}
+
+def obtenir_stockage(nom=None):
+    """Classe de configuration du moteur de stockage choisi (ALIRA_STOCKAGE par défaut).
+    
+    Chaque moteur offre get_pool(), setup_database() et test_connection() ;
+    le pool retourné expose connexion(), tester(), fermer(), statistiques()
+    et les requêtes propres à son dialecte (`requetes`).
+    """
+    nom = (nom or STOCKAGE).lower()
+    if nom not in STOCKAGES:
+        raise ValueError(f"Moteur de stockage inconnu: {nom} (disponibles : {', '.join(STOCKAGES)})")
+    return STOCKAGES[nom]
 
 # ---------------------------------------------------------
 # 3. FONCTIONS UTILITAIRES
 # ---------------------------------------------------------
 
+class RegleReecriture:
+    """Remplacement d'une expression (mots entiers) ou d'un motif brut"""
+    
+    def __init__(self, expression, remplacement, fin=r'\b', motif=None):
+        self.expression = expression
+        self.remplacement = remplacement
+        self.fin = fin
+        if motif is None:
+            mots = [re.escape(mot) for mot in expression.split()]
+            motif = r'\s+'.join(mots) + fin
+        self.motif = motif
+    
+    def __repr__(self):
+        return f"RegleReecriture({self.expression or self.motif!r} -> {self.remplacement!r})"
+
+def regles_expressions(expressions, fin=r'\b'):
+    """Construit des règles à partir d'un dictionnaire {expression: remplacement}"""
+    return [RegleReecriture(expression, remplacement, fin) for expression, remplacement in expressions.items()]
+
+# Formules de politesse en tête de phrase, éventuellement enchaînées
+# ("bonjour, dis moi ..."), et formules de politesse internes
+REGLES_POLITESSE = [
+    RegleReecriture(None, '', motif=r'^\s*(?:(?:' + '|'.join(
+        r'\s+'.join(map(re.escape, formule.split()))
+        for formule in ('bonjour', 'salut', 'hello', 'hi', 'coucou', 'merci',
+                        'thank you', 'thanks', 'dis moi', 'tell me')
+    ) + r')\b\s*,?\s*)+'),
+] + regles_expressions({
+    "s'il vous plaît": ' ', 'please': ' ',
+})
+
+# Fautes de frappe courantes
+REGLES_CORRECTIONS = regles_expressions({
+    'aprend': 'apprend', 'aprens': 'apprend', 'aprends': 'apprend',
+    'souven': 'souviens', 'souvenz': 'souviens',
+    'mémori': 'mémorise', 'memorise': 'mémorise',
+    'reten': 'retiens', 'retien': 'retiens',
+    'corect': 'corrige', 'corection': 'correction',
+    'change': 'corrige', 'modifi': 'modifie',
+    'oubli': 'oublie', 'oublie': 'oublie',
+    'supri': 'supprime', 'supression': 'suppression',
+    'eface': 'efface', 'effas': 'efface',
+    'c\'ast': 'c\'est', 'c est': 'c\'est', 'cest': 'c\'est',
+    'paris': 'Paris', 'france': 'France',
+    'capital': 'capitale', 'capitale': 'capitale',
+    'ville': 'ville', 'pay': 'pays',
+    'veut': 'veux', 'discuté': 'discuter', 'voyagé': 'voyager',
+    'trouv': 'trouve', 'ce trouve': 'se trouve'
+})
+
+# Reformulations des questions de définition (suivies d'un espace)
+REGLES_REFORMULATIONS = regles_expressions({
+    'c\'est quoi': 'qu\'est-ce que',
+    'que veut dire': 'définition',
+    'quel est': 'définition',
+    'quelle est': 'définition',
+    'quels sont': 'définition',
+    'explique': 'définition',
+    'définis': 'définition',
+    'dis moi': 'définition',
+    'connais tu': 'définition',
+    'sais tu': 'définition',
+}, fin=r'(?=\s)')
+
+# Mots vides retirés des clés de mémoire
+REGLES_MOTS_VIDES = regles_expressions({
+    'ville de': '',
+    'le': '', 'la': '', 'les': '', 'des': '',
+    'du': '', 'de': '', 'un': '', 'une': ''
+})
+
+REGLES_PONCTUATION = [RegleReecriture(None, '', motif=r'[?¿!¡]')]
+
+class MoteurReecriture:
+    """Applique un ensemble ordonné de règles de réécriture en une seule passe.
+    
+    Toutes les règles sont réunies dans une seule expression régulière
+    compilée (alternatives les plus longues en premier). L'ancien traitement
+    appliquait les règles l'une après l'autre, si bien qu'une règle pouvait
+    réécrire le résultat d'une précédente ("ce trouv" -> "ce trouve" ->
+    "se trouve") : ces enchaînements sont dérivés à la construction sous forme
+    de règles composées, pour que la passe unique donne le même résultat.
+    """
+    
+    def __init__(self, regles, minuscules=False):
+        self.minuscules = minuscules
+        self.regles = self._deriver_regles_composees(list(regles))
+        
+        # Motifs bruts d'abord (dans l'ordre donné), puis expressions par longueur
+        # décroissante, regroupées derrière un seul test de début de mot
+        bruts = [regle for regle in self.regles if regle.expression is None]
+        expressions = sorted((regle for regle in self.regles if regle.expression is not None),
+                             key=lambda regle: -len(regle.expression))
+        alternatives = [f'({regle.motif})' for regle in bruts]
+        if expressions:
+            alternatives.append(r'(?<!\w)(?:' + '|'.join(f'({regle.motif})' for regle in expressions) + ')')
+        self._remplacements = [regle.remplacement for regle in bruts + expressions]
+        self._motif = re.compile('|'.join(alternatives), re.IGNORECASE)
+    
+    @staticmethod
+    def _deriver_regles_composees(regles):
+        """Ajoute les règles composées : une expression contenant le résultat
+        d'une règle antérieure est aussi reconnue sous sa forme d'origine"""
+        connues = {regle.expression.lower() for regle in regles if regle.expression}
+        
+        def composee_suivante():
+            for i, source in enumerate(regles):
+                if not source.expression or not source.remplacement.strip():
+                    continue
+                resultat = re.compile(r'(?<!\w)' + re.escape(source.remplacement) + r'(?!\w)', re.IGNORECASE)
+                for j in range(i + 1, len(regles)):
+                    cible = regles[j]
+                    if not cible.expression:
+                        continue
+                    expression = resultat.sub(lambda m: source.expression, cible.expression, count=1)
+                    if expression.lower() not in connues:
+                        return j, RegleReecriture(expression, cible.remplacement, cible.fin)
+            return None
+        
+        while (composee := composee_suivante()) is not None:
+            position, regle = composee
+            connues.add(regle.expression.lower())
+            regles.insert(position + 1, regle)
+        
+        return regles
+    
+    def appliquer(self, texte):
+        """Réécrit le texte et normalise les espaces"""
+        if not texte:
+            return texte
+        
+        texte = self._motif.sub(self._remplacer, texte)
+        if self.minuscules:
+            texte = texte.lower()
+        return ' '.join(texte.split())
+    
+    def _remplacer(self, correspondance):
+        return self._remplacements[correspondance.lastindex - 1]
+
+# Moteurs construits une fois pour toutes
+REECRITURE_RECHERCHE = MoteurReecriture(REGLES_POLITESSE)
+REECRITURE_CORRECTIONS = MoteurReecriture(REGLES_CORRECTIONS)
+REECRITURE_CLES = MoteurReecriture(REGLES_REFORMULATIONS + REGLES_MOTS_VIDES + REGLES_PONCTUATION,
+                                   minuscules=True)
+REECRITURE_MODELE = MoteurReecriture(REGLES_POLITESSE + REGLES_CORRECTIONS + REGLES_REFORMULATIONS
+                                     + REGLES_MOTS_VIDES + REGLES_PONCTUATION, minuscules=True)
+
 def corriger_fautes_typo(phrase):
     """Correction des fautes de frappe courantes"""
-    if not phrase:
-        return phrase
-        
-    corrections = {
-        'aprend': 'apprend', 'aprens': 'apprend', 'aprends': 'apprend',
-        'souven': 'souviens', 'souvenz': 'souviens',
-        'mémori': 'mémorise', 'memorise': 'mémorise',
-        'reten': 'retiens', 'retien': 'retiens',
-        'corect': 'corrige', 'corection': 'correction',
-        'change': 'corrige', 'modifi': 'modifie',
-        'oubli': 'oublie', 'oublie': 'oublie',
-        'supri': 'supprime', 'supression': 'suppression',
-        'eface': 'efface', 'effas': 'efface',
-        'c\'ast': 'c\'est', 'c est': 'c\'est', 'cest': 'c\'est',
-        'paris': 'Paris', 'france': 'France',
-        'capital': 'capitale', 'capitale': 'capitale',
-        'ville': 'ville', 'pay': 'pays',
-        'veut': 'veux', 'discuté': 'discuter', 'voyagé': 'voyager',
-        'trouv': 'trouve', 'ce trouve': 'se trouve'
-    }
-    
-    phrase_corrigee = phrase
-    for faute, correction in corrections.items():
-        phrase_corrigee = re.sub(r'\b' + faute + r'\b', correction, phrase_corrigee, flags=re.IGNORECASE)
-    
-    return phrase_corrigee
+    return REECRITURE_CORRECTIONS.appliquer(phrase)
 
 def normaliser_question(question):
-    """Normalise les questions pour meilleure reconnaissance"""
-    if not question:
-        return question
-        
-    normalisations = {
-        r'c\'est quoi\s+': 'qu\'est-ce que ',
-        r'que veut dire\s+': 'définition ',
-        r'quel est\s+': 'définition ',
-        r'quelle est\s+': 'définition ',
-        r'quels sont\s+': 'définition ',
-        r'explique\s+': 'définition ',
-        r'définis\s+': 'définition ',
-        r'dis moi\s+': 'définition ',
-        r'connais tu\s+': 'définition ',
-        r'sais tu\s+': 'définition ',
-        r'\bville de\b': '',
-        r'\ble\b': '', r'\bla\b': '', r'\bles\b': '', r'\bdes\b': '',
-        r'\bdu\b': '', r'\bde\b': '', r'\bun\b': '', r'\bune\b': ''
-    }
-    
-    question_normalisee = question.lower()
-    for pattern, remplacement in normalisations.items():
-        question_normalisee = re.sub(pattern, remplacement, question_normalisee, flags=re.IGNORECASE)
+    """Normalise les questions pour meilleure reconnaissance.
     
-    question_normalisee = re.sub(r'\s+', ' ', question_normalisee).strip()
-    return question_normalisee
+    Sert de clé pour chatbot_memory : l'initialisation et les recherches
+    doivent passer par cette même fonction.
+    """
+    return REECRITURE_CLES.appliquer(question)
 
 def nettoyer_question_pour_recherche(question):
     """Nettoie une question en supprimant les formules de politesse pour la recherche"""
+    return REECRITURE_RECHERCHE.appliquer(question)
+
+def preparer_question_pour_modele(question):
+    """Nettoie et formate la question pour le modèle (politesse, fautes, normalisation)"""
     if not question:
-        return question
+        return ""
+    return REECRITURE_MODELE.appliquer(question)
+
+def par_lots(iterable, taille):
+    """Découpe un itérable en listes de `taille` éléments au plus"""
+    iterateur = iter(iterable)
+    while lot := list(islice(iterateur, taille)):
+        yield lot
+
+class AutomateMotsCles:
+    """Automate d'Aho-Corasick : trouve en une passe tous les termes connus d'un texte.
     
-    motifs_a_supprimer = [
-        r'^bonjour\s*,?\s*', r'^salut\s*,?\s*', r'^hello\s*,?\s*', r'^hi\s*,?\s*',
-        r'^coucou\s*,?\s*', r'^merci\s*,?\s*', r'^thank you\s*,?\s*', r'^thanks\s*,?\s*',
-        r'\s*s\'il vous plaît\s*', r'\s*please\s*', r'^dis moi\s*,?\s*', r'^tell me\s*,?\s*'
-    ]
+    Construit une fois à partir d'un dictionnaire {terme: valeur}, il parcourt
+    le texte caractère par caractère quel que soit le nombre de termes. Seules
+    les occurrences de mots entiers sont retenues ("paris" ne correspond pas
+    dans "comparaison").
+    """
+    
+    def __init__(self, termes):
+        self.valeurs = {}
+        self._transitions = [{}]
+        self._echecs = [0]
+        self._sorties = [None]      # longueur du terme complet finissant sur ce nœud
+        self._suivantes = [0]       # nœud de sortie suivant dans la chaîne des échecs
+        
+        for terme, valeur in termes.items():
+            terme = ' '.join(terme.lower().split())
+            if terme:
+                self.valeurs[terme] = valeur
+                self._ajouter(terme)
+        self._construire_echecs()
+    
+    def __len__(self):
+        return len(self.valeurs)
+    
+    def _ajouter(self, terme):
+        noeud = 0
+        for caractere in terme:
+            suivant = self._transitions[noeud].get(caractere)
+            if suivant is None:
+                suivant = len(self._transitions)
+                self._transitions.append({})
+                self._echecs.append(0)
+                self._sorties.append(None)
+                self._suivantes.append(0)
+                self._transitions[noeud][caractere] = suivant
+            noeud = suivant
+        self._sorties[noeud] = len(terme)
     
-    question_nettoyee = question
-    for motif in motifs_a_supprimer:
-        question_nettoyee = re.sub(motif, '', question_nettoyee, flags=re.IGNORECASE)
+    def _construire_echecs(self):
+        """Liens d'échec calculés en largeur d'abord"""
+        file = list(self._transitions[0].values())
+        for noeud in file:
+            for caractere, enfant in self._transitions[noeud].items():
+                echec = self._echecs[noeud]
+                while echec and caractere not in self._transitions[echec]:
+                    echec = self._echecs[echec]
+                echec = self._transitions[echec].get(caractere, 0)
+                self._echecs[enfant] = echec if echec != enfant else 0
+                self._suivantes[enfant] = echec if self._sorties[echec] is not None else self._suivantes[echec]
+                file.append(enfant)
     
-    question_nettoyee = re.sub(r'\s+', ' ', question_nettoyee).strip()
-    return question_nettoyee
+    def rechercher(self, texte):
+        """Toutes les occurrences (début, fin, terme) de mots entiers, dans l'ordre du texte"""
+        texte = ' '.join(texte.lower().split())
+        transitions, echecs, sorties, suivantes = self._transitions, self._echecs, self._sorties, self._suivantes
+        occurrences = []
+        noeud = 0
+        
+        for position, caractere in enumerate(texte):
+            while noeud and caractere not in transitions[noeud]:
+                noeud = echecs[noeud]
+            noeud = transitions[noeud].get(caractere, 0)
+            
+            sortie = noeud if sorties[noeud] is not None else suivantes[noeud]
+            fin = position + 1
+            while sortie:
+                debut = fin - sorties[sortie]
+                if ((debut == 0 or not texte[debut - 1].isalnum())
+                        and (fin == len(texte) or not texte[fin].isalnum())):
+                    occurrences.append((debut, fin, texte[debut:fin]))
+                sortie = suivantes[sortie]
+        
+        occurrences.sort()
+        return occurrences
+    
+    def terme_plus_long(self, texte):
+        """Terme le plus long trouvé (le premier du texte à longueur égale), ou None"""
+        occurrences = self.rechercher(texte)
+        if not occurrences:
+            return None
+        debut, fin, terme = max(occurrences, key=lambda occurrence: (occurrence[1] - occurrence[0], -occurrence[0]))
+        return terme
+    
+    def plus_long(self, texte):
+        """Valeur associée au terme le plus long trouvé, ou None"""
+        terme = self.terme_plus_long(texte)
+        return self.valeurs[terme] if terme is not None else None
 
-def preparer_question_pour_modele(question):
-    """Nettoie et formate la question pour le modèle"""
-    if not question:
-        return ""
+MOTIF_MOT = re.compile(r"\w+")
+
+def distance_edition(a, b, maximum):
+    """Distance de Damerau-Levenshtein restreinte (transpositions adjacentes),
+    ou maximum + 1 dès qu'elle dépasse maximum"""
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    precedente_2, precedente = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        courante = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cout = a[i - 1] != b[j - 1]
+            courante[j] = min(precedente[j] + 1, courante[j - 1] + 1, precedente[j - 1] + cout)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                courante[j] = min(courante[j], precedente_2[j - 2] + 1)
+        if min(courante) > maximum:
+            return maximum + 1
+        precedente_2, precedente = precedente, courante
+    return precedente[-1]
+
+class CorrecteurSymSpell:
+    """Correcteur orthographique à suppressions symétriques (SymSpell).
+    
+    Chaque mot du vocabulaire est indexé sous toutes les variantes obtenues
+    en supprimant jusqu'à `distance_max` caractères de son préfixe. Un mot
+    inconnu est corrigé en générant ses propres suppressions : les mots qui
+    partagent une variante sont les seuls candidats, vérifiés ensuite par
+    distance d'édition. La recherche ne dépend donc pas de la taille du
+    vocabulaire, et l'ajout d'un mot ne touche que ses propres variantes.
+    """
+    
+    def __init__(self, distance_max=CORRECTION_DISTANCE, longueur_prefixe=7, longueur_min=4):
+        self.distance_max = distance_max
+        self.longueur_prefixe = longueur_prefixe
+        self.longueur_min = longueur_min
+        self.frequences = {}
+        self._suppressions = {}
+        self._verrou = threading.Lock()
+        self.corrections = 0
+    
+    def __len__(self):
+        return len(self.frequences)
+    
+    def __contains__(self, mot):
+        return mot.lower() in self.frequences
+    
+    def _variantes(self, mot, distance):
+        """Le préfixe du mot et toutes ses suppressions jusqu'à `distance` caractères"""
+        prefixe = mot[:self.longueur_prefixe]
+        variantes = {prefixe}
+        niveau = [prefixe]
+        for _ in range(distance):
+            suivant = []
+            for variante in niveau:
+                for i in range(len(variante)):
+                    suppression = variante[:i] + variante[i + 1:]
+                    if suppression not in variantes:
+                        variantes.add(suppression)
+                        suivant.append(suppression)
+            niveau = suivant
+        return variantes
     
-    # Supprimer les formules de politesse
-    question = nettoyer_question_pour_recherche(question)
+    def ajouter_mot(self, mot, n=1):
+        """Ajoute un mot au vocabulaire (ou augmente sa fréquence)"""
+        mot = mot.lower()
+        if len(mot) < 2 or mot.isdigit():
+            return
+        with self._verrou:
+            if mot in self.frequences:
+                self.frequences[mot] += n
+                return
+            self.frequences[mot] = n
+            for variante in self._variantes(mot, self.distance_max):
+                self._suppressions.setdefault(variante, []).append(mot)
     
-    # Corriger les fautes de frappe courantes
-    question = corriger_fautes_typo(question)
+    def ajouter_texte(self, texte, n=1):
+        """Ajoute tous les mots d'un texte"""
+        for mot in MOTIF_MOT.findall(texte or ''):
+            self.ajouter_mot(mot, n)
     
-    # Normaliser la question
-    question = normaliser_question(question)
+    def distance_autorisee(self, mot):
+        """Une faute tolérée jusqu'à 7 lettres, distance_max au-delà ; aucune sous longueur_min"""
+        if len(mot) < self.longueur_min:
+            return 0
+        return min(self.distance_max, 1 if len(mot) < 8 else 2)
+    
+    def corriger_mot(self, mot):
+        """Mot du vocabulaire le plus proche (distance minimale puis fréquence), ou le mot tel quel"""
+        minuscule = mot.lower()
+        distance = self.distance_autorisee(minuscule)
+        if not distance or minuscule in self.frequences or minuscule.isdigit():
+            return mot
+        
+        meilleur, meilleure_cle = None, None
+        vus = set()
+        for variante in self._variantes(minuscule, distance):
+            for candidat in self._suppressions.get(variante, ()):
+                if candidat in vus:
+                    continue
+                vus.add(candidat)
+                ecart = distance_edition(minuscule, candidat, distance)
+                if ecart <= distance:
+                    cle = (ecart, -self.frequences[candidat], candidat)
+                    if meilleure_cle is None or cle < meilleure_cle:
+                        meilleur, meilleure_cle = candidat, cle
+        if meilleur is None:
+            return mot
+        self.corrections += 1
+        return meilleur
+    
+    def corriger(self, texte):
+        """Corrige chaque mot inconnu d'un texte, en conservant le reste tel quel"""
+        if not texte or not self.frequences:
+            return texte
+        return MOTIF_MOT.sub(lambda correspondance: self.corriger_mot(correspondance.group()), texte)
     
-    return question
+    def statistiques(self):
+        """Taille du vocabulaire et de l'index de suppressions"""
+        return {
+            'mots': len(self.frequences),
+            'suppressions': len(self._suppressions),
+            'corrections': self.corrections
+        }
 
 # ---------------------------------------------------------
 # 4. COMPRÉHENSION LINGUISTIQUE AVANCÉE
 # ---------------------------------------------------------
 
+class AnalyseQuestion:
+    """Résultat d'analyse d'une phrase, calculé une seule fois par tour"""
+    
+    def __init__(self, phrase, doc, analyse):
+        self.phrase = phrase
+        self.doc = doc
+        self.analyse = analyse
+        self.concept = self.extraire_concept(analyse)
+    
+    def __getitem__(self, cle):
+        return self.analyse[cle]
+    
+    @staticmethod
+    def extraire_concept(analyse):
+        """Extrait le concept principal d'un dictionnaire d'analyse"""
+        if analyse['sujet_principal']:
+            return analyse['sujet_principal']['lemma']
+        elif analyse['complement_principal']:
+            return analyse['complement_principal']['lemma']
+        elif analyse['mots_cles']:
+            return analyse['mots_cles'][0]['lemma']
+        return None
+
+class CacheAnalysesLRU:
+    """Cache LRU borné et thread-safe des analyses, indexé sur le texte normalisé"""
+    
+    def __init__(self, taille_max=ANALYSE_CACHE_TAILLE):
+        self.taille_max = max(0, taille_max)
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def cle(phrase):
+        """Clé de cache : texte en minuscules, espaces normalisés"""
+        return ' '.join(phrase.lower().split())
+    
+    def obtenir(self, cle):
+        """Retourne l'entrée (doc, analyse) ou None, et met à jour les compteurs"""
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.misses += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return entree
+    
+    def ajouter(self, cle, doc, analyse):
+        """Ajoute une entrée en évinçant la moins récemment utilisée si nécessaire"""
+        if not self.taille_max:
+            return
+        with self._verrou:
+            self._entrees[cle] = (doc, analyse)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+    
+    def vider(self):
+        """Vide le cache sans réinitialiser les compteurs"""
+        with self._verrou:
+            self._entrees.clear()
+    
+    def statistiques(self):
+        """Retourne les compteurs du cache"""
+        with self._verrou:
+            total = self.hits + self.misses
+            return {
+                'taille': len(self._entrees),
+                'taille_max': self.taille_max,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'taux_hit': round(self.hits / total, 3) if total else 0.0
+            }
+
 class ComprehenseurLinguistique:
     """Analyse syntaxique et sémantique des phrases pour une vraie compréhension"""
     
-    def __init__(self, nlp):
+    def __init__(self, nlp, cache=None):
         self.nlp = nlp
+        self.cache = cache if cache is not None else CacheAnalysesLRU()
         self.mots_interrogatifs = {
             'quoi', 'qui', 'comment', 'pourquoi', 'quand', 'où', 'combien',
             'quel', 'quelle', 'quels', 'quelles', 'est-ce que', 'qu\'est-ce que'
@@ -443,12 +1884,82 @@ class ComprehenseurLinguistique:
             'définir', 'dire', 'signifier', 'vouloir savoir'
         }
     
-    def analyser_structure_phrase(self, phrase):
-        """Analyse syntaxique approfondie de la phrase"""
-        if not phrase or not self.nlp:
+    def nlp_disponible(self):
+        """Faux sans spaCy, ou si le chargement différé du modèle a échoué"""
+        if isinstance(self.nlp, ModeleSpacyParesseux):
+            return self.nlp.disponible
+        return bool(self.nlp)
+    
+    def analyser_question(self, phrase):
+        """Analyse complète d'une phrase, à réutiliser par tout le pipeline"""
+        if not phrase or not self.nlp_disponible():
             return None
         
-        doc = self.nlp(phrase.lower())
+        cle = CacheAnalysesLRU.cle(phrase)
+        entree = self.cache.obtenir(cle)
+        if entree:
+            return self._depuis_cache(phrase, entree)
+        
+        doc = self.nlp(cle)
+        analyse = self._construire_analyse(doc, phrase)
+        self.cache.ajouter(cle, doc, analyse)
+        return AnalyseQuestion(phrase, doc, analyse)
+    
+    def analyser_questions(self, phrases):
+        """Analyse plusieurs phrases en un seul passage nlp.pipe"""
+        phrases = [phrase for phrase in phrases if phrase]
+        if not phrases or not self.nlp_disponible():
+            return []
+        
+        resultats = [None] * len(phrases)
+        a_analyser = []
+        for index, phrase in enumerate(phrases):
+            cle = CacheAnalysesLRU.cle(phrase)
+            entree = self.cache.obtenir(cle)
+            if entree:
+                resultats[index] = self._depuis_cache(phrase, entree)
+            else:
+                a_analyser.append((index, cle))
+        
+        docs = self.nlp.pipe([cle for _, cle in a_analyser])
+        for (index, cle), doc in zip(a_analyser, docs):
+            analyse = self._construire_analyse(doc, phrases[index])
+            self.cache.ajouter(cle, doc, analyse)
+            resultats[index] = AnalyseQuestion(phrases[index], doc, analyse)
+        
+        return resultats
+    
+    def analyser_lot(self, phrases, batch_size=ANALYSE_LOT_TAILLE, n_process=ANALYSE_PROCESSUS):
+        """Analyse en flux un grand nombre de phrases (générateur).
+        
+        Produit, dans l'ordre, le même dictionnaire d'analyse que
+        analyser_structure_phrase (None pour une phrase vide). Les phrases
+        sont lues au fil de l'eau et ni les Doc ni les analyses ne sont
+        conservés : la mémoire reste constante et le cache LRU, réservé aux
+        questions posées en direct, n'est pas sollicité. Avec n_process > 1
+        (ou -1), spaCy répartit les lots sur plusieurs processus.
+        """
+        if not self.nlp_disponible():
+            return
+        
+        textes = ((CacheAnalysesLRU.cle(phrase) if phrase else '', phrase) for phrase in phrases)
+        for doc, phrase in self.nlp.pipe(textes, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            yield self._construire_analyse(doc, phrase) if phrase else None
+    
+    def _depuis_cache(self, phrase, entree):
+        """Reconstruit une AnalyseQuestion à partir d'une entrée du cache"""
+        doc, analyse = entree
+        if analyse['phrase_originale'] != phrase:
+            analyse = dict(analyse, phrase_originale=phrase)
+        return AnalyseQuestion(phrase, doc, analyse)
+    
+    def analyser_structure_phrase(self, phrase):
+        """Analyse syntaxique approfondie de la phrase"""
+        analyse_question = self.analyser_question(phrase)
+        return analyse_question.analyse if analyse_question else None
+    
+    def _construire_analyse(self, doc, phrase):
+        """Construit le dictionnaire d'analyse à partir d'un Doc spaCy"""
         analyse = {
             'phrase_originale': phrase,
             'mots_cles': [],
@@ -461,12 +1972,18 @@ class ComprehenseurLinguistique:
             'est_demande_connaissance': any(token.lemma_ in self.verbes_connaissance for token in doc)
         }
         
-        # Extraction des mots-clés significatifs
+        # Extraction des mots-clés significatifs (sans étiquetage, profil
+        # léger : tous les mots pleins)
+        etiquete = doc.has_annotation("POS")
         for token in doc:
-            if token.pos_ in ['NOUN', 'VERB', 'ADJ', 'PROPN'] and not token.is_stop:
+            if etiquete:
+                significatif = token.pos_ in ['NOUN', 'VERB', 'ADJ', 'PROPN'] and not token.is_stop
+            else:
+                significatif = token.is_alpha and not token.is_stop and token.lower_ not in self.mots_interrogatifs
+            if significatif:
                 analyse['mots_cles'].append({
                     'text': token.text,
-                    'lemma': token.lemma_,
+                    'lemma': token.lemma_ or token.lower_,
                     'pos': token.pos_,
                     'tag': token.tag_
                 })
@@ -534,9 +2051,15 @@ class ComprehenseurLinguistique:
                 }
         return None
     
-    def normaliser_phrase(self, phrase):
+    def _resoudre_analyse(self, phrase, analyse):
+        """Réutilise l'analyse fournie ou analyse la phrase"""
+        if analyse is None:
+            analyse = self.analyser_question(phrase)
+        return analyse.analyse if analyse else None
+    
+    def normaliser_phrase(self, phrase, analyse=None):
         """Normalisation avancée basée sur l'analyse linguistique"""
-        analyse = self.analyser_structure_phrase(phrase)
+        analyse = self._resoudre_analyse(phrase, analyse)
         if not analyse:
             return phrase.lower()
         
@@ -560,9 +2083,9 @@ class ComprehenseurLinguistique:
         phrase_normalisee = ' '.join(elements)
         return phrase_normalisee if phrase_normalisee else phrase.lower()
     
-    def generer_variations_semantiques(self, phrase):
+    def generer_variations_semantiques(self, phrase, analyse=None):
         """Génère des variations basées sur la sémantique"""
-        analyse = self.analyser_structure_phrase(phrase)
+        analyse = self._resoudre_analyse(phrase, analyse)
         if not analyse:
             return [phrase.lower()]
         
@@ -597,207 +2120,1202 @@ class ComprehenseurLinguistique:
 class MemoireSemantique:
     """Mémoire qui comprend le sens des phrases, pas juste les mots"""
     
-    def __init__(self, connection, nlp):
-        self.connection = connection
-        self.comprehenseur = ComprehenseurLinguistique(nlp)
+    def __init__(self, pool, nlp, comprehenseur=None):
+        self.pool = pool
+        self.comprehenseur = comprehenseur or ComprehenseurLinguistique(nlp)
+        # Appelé après chaque apprentissage : (question_normalisee, question_id,
+        # reponse, cles_exactes), où cles_exactes sont les questions apprises
+        # normalisées par normaliser_question, enregistrées dans la table
+        # cles_exactes quand elles diffèrent de la clé lemmatisée
+        self.sur_apprentissage = None
     
     def sauvegarder_connaissance_semantique(self, question, reponse):
         """Sauvegarde avec analyse sémantique complète"""
-        try:
-            # Analyse sémantique de la question
-            analyse = self.comprehenseur.analyser_structure_phrase(question)
-            if not analyse:
-                return False
-            
-            # Extraction du concept principal
-            concept_principal = self._extraire_concept_principal(analyse)
+        return self.sauvegarder_connaissances_lot([(question, reponse)]) > 0
+    
+    def sauvegarder_connaissances_lot(self, paires, analyses=None):
+        """Sauvegarde un lot de paires (question, réponse) en une transaction explicite.
+        
+        Les questions sont analysées en un seul passage nlp.pipe, puis toutes
+        les lignes (chatbot_memory, variations_contexte, concepts_semantiques,
+        synonymes_concepts, relations_semantiques) sont construites en mémoire
+        et écrites par executemany. Les analyses peuvent être fournies
+        (AnalyseQuestion alignées sur les paires), par exemple depuis
+        ComprehenseurLinguistique.analyser_lot. La question normalisée sans
+        analyse est enregistrée dans cles_exactes quand elle diffère de la clé
+        lemmatisée, pour la correspondance exacte. Retourne le nombre de paires
+        enregistrées. `sur_apprentissage` n'est appelé qu'une fois la
+        transaction validée : un lot annulé n'atteint pas les index en mémoire.
+        """
+        if analyses is None:
+            paires = [(question, reponse) for question, reponse in paires if question and reponse]
+            if not paires:
+                return 0
             
-            # Sauvegarde dans la mémoire traditionnelle
-            question_normalisee = self.comprehenseur.normaliser_phrase(question)
+            # Analyse sémantique des questions (une seule fois, en lot)
+            analyses = self.comprehenseur.analyser_questions([question for question, _ in paires]) or [None] * len(paires)
+        
+        memoires, variations, concepts, relations, cles_exactes = [], [], {}, [], {}
+        for (question, reponse), analyse in zip(paires, analyses):
+            question_normalisee = self.comprehenseur.normaliser_phrase(question, analyse)
+            memoires.append((question_normalisee, reponse))
+            # La correspondance exacte cherche la question normalisée sans analyse
+            cle = normaliser_question(question)[:255]
+            if cle and cle.lower() != question_normalisee.lower():
+                cles_exactes[cle] = question_normalisee
+            variations.extend((question_normalisee, variation)
+                              for variation in self.comprehenseur.generer_variations_semantiques(question, analyse))
             
-            cursor = self.connection.cursor()
-            cursor.execute("""
-            INSERT INTO chatbot_memory (question_normalized, response, learn_count)
-            VALUES (%s, %s, 1)
-            ON DUPLICATE KEY UPDATE 
-                response = VALUES(response),
-                learn_count = learn_count + 1
-            """, (question_normalisee, reponse))
+            if analyse and analyse.concept:
+                concept = analyse.concept
+                synonyms = concepts.setdefault(concept, [])
+                for mot in analyse['mots_cles']:
+                    if mot['lemma'] != concept and mot['lemma'] not in synonyms:
+                        synonyms.append(mot['lemma'])
+                if analyse['action_principale']:
+                    relations.append((concept, analyse['action_principale']['lemma']))
+        
+        try:
+            with self.pool.transaction() as connection:
+                cursor = connection.cursor()
+                
+                requetes = self.pool.requetes
+                
+                # Mémoire traditionnelle ; un doublon dans le lot compte comme un réapprentissage
+                cursor.executemany(requetes['apprendre'], memoires)
+                
+                # Récupération des IDs
+                ids = self._lire_ids(cursor, "chatbot_memory", "question_normalized",
+                                     [question_normalisee for question_normalisee, _ in memoires])
+                
+                # Variations sémantiques
+                lignes_variations = list(dict.fromkeys(
+                    (ids[question_normalisee.lower()], variation)
+                    for question_normalisee, variation in variations
+                    if question_normalisee.lower() in ids))
+                if lignes_variations:
+                    cursor.executemany(requetes['variation'], lignes_variations)
+                
+                # Clés de la correspondance exacte
+                lignes_cles = [(cle, ids[question_normalisee.lower()])
+                               for cle, question_normalisee in cles_exactes.items()
+                               if question_normalisee.lower() in ids]
+                if lignes_cles:
+                    cursor.executemany(requetes['cle_exacte'], lignes_cles)
+                
+                # Concepts, synonymes indexés et relations
+                if concepts:
+                    cursor.executemany(requetes['concept'], [(concept, json.dumps(synonyms)) for concept, synonyms in concepts.items()])
+                    
+                    ids_concepts = self._lire_ids(cursor, "concepts_semantiques", "concept_principal", list(concepts))
+                    lignes_synonymes = {(synonyme[:100], ids_concepts[concept.lower()])
+                                        for concept, synonyms in concepts.items() if concept.lower() in ids_concepts
+                                        for synonyme in synonyms}
+                    if lignes_synonymes:
+                        cursor.executemany(requetes['synonyme'], list(lignes_synonymes))
+                
+                if relations:
+                    cursor.executemany(requetes['relation'], relations)
+                
+                cursor.close()
             
-            # Récupération de l'ID
-            cursor.execute("SELECT id FROM chatbot_memory WHERE question_normalized = %s", 
-                          (question_normalisee,))
-            result = cursor.fetchone()
-            if result:
-                question_id = result[0]
+        except Error as e:
+            logger.error(f"Erreur sauvegarde sémantique: {e}")
+            return 0
+        
+        if self.sur_apprentissage:
+            cles_par_question = {}
+            for cle, question_normalisee in cles_exactes.items():
+                cles_par_question.setdefault(question_normalisee, []).append(cle)
+            for question_normalisee, reponse in dict(memoires).items():
+                if question_normalisee.lower() in ids:
+                    self.sur_apprentissage(question_normalisee, ids[question_normalisee.lower()], reponse,
+                                           cles_par_question.get(question_normalisee, ()))
+        return len(paires)
+    
+    @staticmethod
+    def _lire_ids(cursor, table, colonne, valeurs):
+        """Associe chaque valeur (en minuscules) à l'id de sa ligne, en une requête"""
+        valeurs = list(dict.fromkeys(valeurs))
+        marqueurs = ', '.join(['%s'] * len(valeurs))
+        cursor.execute(f"SELECT {colonne}, id FROM {table} WHERE {colonne} IN ({marqueurs})", valeurs)
+        return {valeur.lower(): id_ligne for valeur, id_ligne in cursor.fetchall()}
+    
+    def _extraire_concept_principal(self, analyse):
+        """Extrait le concept principal de l'analyse"""
+        return AnalyseQuestion.extraire_concept(analyse)
+    
+    def rechercher_semantiquement(self, question, analyse=None):
+        """Recherche basée sur la sémantique, pas juste les mots"""
+        if analyse is None:
+            analyse = self.comprehenseur.analyser_question(question)
+        if not analyse:
+            return None
+        
+        resultats = self.rechercher_semantiquement_lot([analyse])
+        return resultats[0]['reponse'] if resultats else None
+    
+    def rechercher_semantiquement_lot(self, analyses):
+        """Résout tous les concepts candidats en un seul aller-retour.
+        
+        Les analyses sont classées par priorité (la question d'abord, puis ses
+        variations). Retourne une liste de résultats triés : rang du concept
+        candidat, correspondance directe avant relation, puis force de relation.
+        Le rang est calculé par la base (CASE) avec la collation de la colonne,
+        comme le IN : une ligne « élément » trouvée pour « element » garde le
+        rang de son candidat.
+        """
+        candidats = {}
+        for analyse in analyses:
+            if analyse and analyse.concept:
+                candidats.setdefault(analyse.concept, analyse.phrase)
+        if not candidats:
+            return []
+        
+        concepts = list(candidats)
+        marqueurs = ', '.join(['%s'] * len(concepts))
+        
+        def calcul_rang(colonne):
+            return "CASE " + " ".join(f"WHEN {colonne} = %s THEN {i}" for i in range(len(concepts))) + " END"
+        
+        try:
+            with self.pool.connexion() as connection:
+                cursor = connection.cursor(dictionary=True)
+                
+                # Concept principal, synonymes (index) et relations sémantiques en une seule requête
+                cursor.execute(f"""
+                SELECT 'concept' AS source, {calcul_rang('cs.concept_principal')} AS rang,
+                       1.0 AS force_relation, cm.response
+                FROM concepts_semantiques cs
+                JOIN chatbot_memory cm ON cs.concept_principal = cm.question_normalized
+                WHERE cs.concept_principal IN ({marqueurs})
+                UNION ALL
+                SELECT 'synonyme' AS source, {calcul_rang('sc.synonyme')} AS rang,
+                       1.0 AS force_relation, cm.response
+                FROM synonymes_concepts sc
+                JOIN concepts_semantiques cs ON cs.id = sc.concept_id
+                JOIN chatbot_memory cm ON cs.concept_principal = cm.question_normalized
+                WHERE sc.synonyme IN ({marqueurs})
+                UNION ALL
+                SELECT 'relation' AS source, {calcul_rang('rs.concept_source')} AS rang,
+                       rs.force_relation, cm.response
+                FROM relations_semantiques rs
+                JOIN concepts_semantiques cs ON rs.concept_cible = cs.concept_principal
+                JOIN chatbot_memory cm ON cs.concept_principal = cm.question_normalized
+                WHERE rs.concept_source IN ({marqueurs})
+                AND rs.force_relation > 0.5
+                """, concepts * 6)
                 
-                # Sauvegarde des variations sémantiques
-                variations = self.comprehenseur.generer_variations_semantiques(question)
-                for variation in variations:
+                lignes = cursor.fetchall()
+                cursor.close()
+            
+        except Error as e:
+            logger.error(f"Erreur recherche sémantique: {e}")
+            return []
+        
+        resultats = []
+        for ligne in lignes:
+            if ligne['rang'] is None:
+                continue
+            rang_candidat = int(ligne['rang'])
+            concept = concepts[rang_candidat]
+            phrase = candidats[concept]
+            resultats.append({
+                'reponse': ligne['response'],
+                'concept': concept,
+                'phrase': phrase,
+                'source': ligne['source'],
+                'rang': rang_candidat,
+                'force': float(ligne['force_relation'])
+            })
+        
+        resultats.sort(key=lambda r: (r['rang'], r['source'] == 'relation', -r['force']))
+        return resultats
+
+# ---------------------------------------------------------
+# 6. COUCHE MÉMOIRE PERSISTANTE
+# ---------------------------------------------------------
+
+class CacheMemoireExacte:
+    """Copie en mémoire de chatbot_memory et cles_exactes : clé -> (id, response).
+    
+    Une clé de chatbot_memory l'emporte sur la même clé dans cles_exactes,
+    comme dans la requête directe de CoucheMemoireMySQL._consulter_cle_exacte.
+    """
+    
+    def __init__(self, intervalle_rafraichissement=MEMOIRE_CACHE_RAFRAICHISSEMENT):
+        self.intervalle_rafraichissement = intervalle_rafraichissement
+        self._entrees = {}
+        # Clés venant de cles_exactes (remplaçables par une clé de chatbot_memory)
+        self._secondaires = set()
+        self._verrou = threading.Lock()
+        self.charge = False
+        self.derniere_maj = None
+        self._dernier_rafraichissement = 0.0
+    
+    def __len__(self):
+        return len(self._entrees)
+    
+    def charger(self, pool):
+        """Charge toute la table au démarrage"""
+        with self._verrou:
+            self._entrees.clear()
+            self._secondaires.clear()
+            self.derniere_maj = None
+        self.charge = self._lire(pool, None)
+        if self.charge:
+            logger.info(f"Cache mémoire chargé: {len(self._entrees)} connaissances")
+        return self.charge
+    
+    def rafraichir(self, pool):
+        """Récupère les lignes modifiées depuis le dernier chargement (updated_at)"""
+        return self._lire(pool, self.derniere_maj)
+    
+    def rafraichir_si_necessaire(self, pool):
+        """Rafraîchit le cache si l'intervalle configuré est écoulé"""
+        if not self.intervalle_rafraichissement:
+            return
+        maintenant = time.monotonic()
+        if maintenant - self._dernier_rafraichissement >= self.intervalle_rafraichissement:
+            self._dernier_rafraichissement = maintenant
+            self.rafraichir(pool)
+    
+    def _lire(self, pool, depuis):
+        """Lit chatbot_memory et cles_exactes (entièrement ou depuis une date) dans le cache"""
+        try:
+            with pool.connexion() as connection:
+                cursor = connection.cursor()
+                if depuis is None:
+                    cursor.execute("SELECT id, question_normalized, response, updated_at FROM chatbot_memory")
+                    lignes = cursor.fetchall()
                     cursor.execute("""
-                    INSERT INTO variations_contexte (question_id, variation, type_contexte, confidence)
-                    VALUES (%s, %s, 'semantique', 0.9)
-                    ON DUPLICATE KEY UPDATE confidence = VALUES(confidence)
-                    """, (question_id, variation))
+                    SELECT ce.cle, cm.id, cm.response, cm.updated_at, ce.updated_at
+                    FROM cles_exactes ce JOIN chatbot_memory cm ON cm.id = ce.question_id
+                    """)
+                else:
+                    cursor.execute("""
+                    SELECT id, question_normalized, response, updated_at
+                    FROM chatbot_memory WHERE updated_at >= %s
+                    """, (depuis,))
+                    lignes = cursor.fetchall()
+                    cursor.execute("""
+                    SELECT ce.cle, cm.id, cm.response, cm.updated_at, ce.updated_at
+                    FROM cles_exactes ce JOIN chatbot_memory cm ON cm.id = ce.question_id
+                    WHERE cm.updated_at >= %s OR ce.updated_at >= %s
+                    """, (depuis, depuis))
+                lignes_secondaires = cursor.fetchall()
+                cursor.close()
+        except Error as e:
+            logger.error(f"Erreur chargement cache mémoire: {e}")
+            return False
+        
+        with self._verrou:
+            for memory_id, question_normalisee, reponse, updated_at in lignes:
+                self._ecrire(question_normalisee, memory_id, reponse, False)
+                self._dater(updated_at)
+            for cle, memory_id, reponse, updated_at, cle_updated_at in lignes_secondaires:
+                self._ecrire(cle, memory_id, reponse, True)
+                self._dater(updated_at)
+                self._dater(cle_updated_at)
+        return True
+    
+    def _ecrire(self, cle, memory_id, reponse, secondaire):
+        """Enregistre une entrée (verrou tenu par l'appelant)"""
+        if not secondaire:
+            self._secondaires.discard(cle)
+        elif cle in self._entrees and cle not in self._secondaires:
+            return
+        else:
+            self._secondaires.add(cle)
+        self._entrees[cle] = (memory_id, reponse)
+    
+    def _dater(self, updated_at):
+        if updated_at and (self.derniere_maj is None or updated_at > self.derniere_maj):
+            self.derniere_maj = updated_at
+    
+    def obtenir(self, question_normalisee):
+        """Retourne (id, response) ou None"""
+        return self._entrees.get(question_normalisee)
+    
+    def mettre_a_jour(self, question_normalisee, memory_id, reponse, secondaire=False):
+        """Reporte une connaissance apprise dans le cache (secondaire : clé de cles_exactes)"""
+        with self._verrou:
+            self._ecrire(question_normalisee, memory_id, reponse, secondaire)
+
+class TamponCompteurs:
+    """Tampon d'écriture différée des compteurs use_count et learning_stats.
+    
+    Les incréments sont fusionnés en mémoire ({id: n}, {clé: n}) puis écrits
+    par un thread de fond en une transaction (executemany), toutes les
+    `delai` secondes, dès que `seuil` incréments sont en attente, et à
+    l'arrêt. En cas d'arrêt brutal, au plus `delai` secondes d'incréments
+    sont perdus. Avec delai=0, chaque incrément est écrit immédiatement.
+    """
+    
+    def __init__(self, pool, delai=COMPTEURS_DELAI, seuil=COMPTEURS_SEUIL):
+        self.pool = pool
+        self.delai = delai
+        self.seuil = max(1, seuil)
+        self._utilisations = {}
+        self._statistiques = {}
+        self._en_attente = 0
+        self._verrou = threading.Lock()
+        self._verrou_ecriture = threading.Lock()
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        
+        self.increments = 0
+        self.ecritures = 0
+        self.lignes_ecrites = 0
+        self.taille_lot_max = 0
+        self.erreurs = 0
+        self.dernier_vidage = None
+        
+        self._thread = None
+        if self.delai > 0:
+            self._thread = threading.Thread(target=self._boucle, name="alira-compteurs", daemon=True)
+            self._thread.start()
+        atexit.register(self.fermer)
+    
+    def incrementer_utilisation(self, memory_id, n=1):
+        """Ajoute n utilisations à une entrée de chatbot_memory"""
+        self._ajouter(self._utilisations, memory_id, n)
+    
+    def incrementer_statistique(self, stat_key, n=1):
+        """Ajoute n à une statistique de learning_stats"""
+        self._ajouter(self._statistiques, stat_key, n)
+    
+    def _ajouter(self, compteurs, cle, n):
+        with self._verrou:
+            compteurs[cle] = compteurs.get(cle, 0) + n
+            self._en_attente += n
+            self.increments += n
+            plein = self._en_attente >= self.seuil
+        
+        if self._thread is None:
+            self.vider()
+        elif plein:
+            self._reveil.set()
+    
+    def _boucle(self):
+        while not self._arret.is_set():
+            self._reveil.wait(self.delai)
+            self._reveil.clear()
+            self.vider()
+    
+    def vider(self):
+        """Écrit les incréments en attente en une transaction ; retourne le nombre de lignes"""
+        with self._verrou_ecriture:
+            with self._verrou:
+                utilisations, self._utilisations = self._utilisations, {}
+                statistiques, self._statistiques = self._statistiques, {}
+                self._en_attente = 0
             
-            # Sauvegarde sémantique
-            if concept_principal:
-                self._sauvegarder_concept(concept_principal, analyse, reponse)
+            if not utilisations and not statistiques:
+                return 0
             
-            self.connection.commit()
-            cursor.close()
-            return True
+            try:
+                with self.pool.transaction() as connection:
+                    cursor = connection.cursor()
+                    if utilisations:
+                        cursor.executemany(
+                            "UPDATE chatbot_memory SET use_count = use_count + %s WHERE id = %s",
+                            [(n, memory_id) for memory_id, n in utilisations.items()])
+                    if statistiques:
+                        cursor.executemany(
+                            "UPDATE learning_stats SET stat_value = stat_value + %s WHERE stat_key = %s",
+                            [(n, stat_key) for stat_key, n in statistiques.items()])
+                    cursor.close()
+            except Error as e:
+                # Transaction annulée : aucun incrément n'a été écrit, tous
+                # sont remis en attente pour la prochaine écriture
+                logger.error(f"Erreur écriture des compteurs: {e}")
+                self.erreurs += 1
+                with self._verrou:
+                    for memory_id, n in utilisations.items():
+                        self._utilisations[memory_id] = self._utilisations.get(memory_id, 0) + n
+                    for stat_key, n in statistiques.items():
+                        self._statistiques[stat_key] = self._statistiques.get(stat_key, 0) + n
+                    self._en_attente += sum(utilisations.values()) + sum(statistiques.values())
+                return 0
+            
+            lignes = len(utilisations) + len(statistiques)
+            self.ecritures += 1
+            self.lignes_ecrites += lignes
+            self.taille_lot_max = max(self.taille_lot_max, lignes)
+            self.dernier_vidage = time.time()
+            return lignes
+    
+    def fermer(self):
+        """Arrête le thread de fond et écrit les derniers incréments"""
+        self._arret.set()
+        self._reveil.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.delai + 1)
+        self.vider()
+    
+    def statistiques(self):
+        with self._verrou:
+            en_attente = self._en_attente
+        return {
+            'en_attente': en_attente,
+            'increments': self.increments,
+            'ecritures': self.ecritures,
+            'lignes_ecrites': self.lignes_ecrites,
+            'taille_lot_moyenne': self.lignes_ecrites / self.ecritures if self.ecritures else 0,
+            'taille_lot_max': self.taille_lot_max,
+            'fenetre_perte': self.delai,
+            'erreurs': self.erreurs
+        }
+
+class JournalConversations:
+    """Écriture en arrière-plan des échanges dans chat_history.
+    
+    `enregistrer` ne fait que déposer l'échange dans une file bornée. Un
+    thread de fond le récupère et écrit par INSERT multi-lignes dès que
+    `taille_lot` échanges sont réunis ou `delai_ms` après le premier. Quand
+    la file est pleine, l'appelant attend au plus `attente_ms` puis l'échange
+    est abandonné et compté : la journalisation ne bloque jamais la réponse.
+    """
+    
+    # TEXT : 65 535 octets, soit 16 383 caractères utf8mb4 au pire
+    LONGUEUR_MAX = 16000
+    
+    def __init__(self, pool, capacite=HISTORIQUE_FILE, taille_lot=HISTORIQUE_LOT,
+                 delai_ms=HISTORIQUE_DELAI_MS, attente_ms=HISTORIQUE_ATTENTE_MS):
+        self.pool = pool
+        self.taille_lot = max(1, taille_lot)
+        self.delai = delai_ms / 1000
+        self.attente = attente_ms / 1000
+        self._file = queue.Queue(maxsize=capacite)
+        self._arret = threading.Event()
+        self._verrou_ecriture = threading.Lock()
+        
+        self.recus = 0
+        self.abandonnes = 0
+        self.ecrits = 0
+        self.ecritures = 0
+        self.taille_lot_max = 0
+        self.erreurs = 0
+        
+        self._thread = threading.Thread(target=self._boucle, name="alira-historique", daemon=True)
+        self._thread.start()
+        atexit.register(self.fermer)
+    
+    def enregistrer(self, message, reponse):
+        """Dépose un échange dans la file ; False s'il a été abandonné (file pleine)"""
+        if self._arret.is_set():
+            return False
+        echange = (str(message)[:self.LONGUEUR_MAX], str(reponse)[:self.LONGUEUR_MAX],
+                   datetime.datetime.now())
+        try:
+            if self.attente > 0:
+                self._file.put(echange, timeout=self.attente)
+            else:
+                self._file.put_nowait(echange)
+        except queue.Full:
+            self.abandonnes += 1
+            return False
+        self.recus += 1
+        return True
+    
+    def _boucle(self):
+        while not self._arret.is_set():
+            try:
+                premier = self._file.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            lot = [premier]
+            echeance = time.monotonic() + self.delai
+            while len(lot) < self.taille_lot:
+                restant = echeance - time.monotonic()
+                if restant <= 0:
+                    break
+                try:
+                    lot.append(self._file.get(timeout=restant))
+                except queue.Empty:
+                    break
+            self._ecrire(lot)
+    
+    def _ecrire(self, lot):
+        """Insère un lot d'échanges en une requête multi-lignes"""
+        with self._verrou_ecriture:
+            try:
+                with self.pool.connexion() as connection:
+                    cursor = connection.cursor()
+                    cursor.executemany("""
+                    INSERT INTO chat_history (user_message, bot_response, timestamp)
+                    VALUES (%s, %s, %s)
+                    """, lot)
+                    connection.commit()
+                    cursor.close()
+            except Error as e:
+                # Un journal n'est pas rejoué : le lot est compté comme perdu
+                logger.error(f"Erreur écriture de l'historique: {e}")
+                self.erreurs += 1
+                self.abandonnes += len(lot)
+                return 0
+            self.ecritures += 1
+            self.ecrits += len(lot)
+            self.taille_lot_max = max(self.taille_lot_max, len(lot))
+            return len(lot)
+    
+    def vider(self):
+        """Écrit immédiatement tout ce qui est en file ; retourne le nombre d'échanges écrits"""
+        ecrits = 0
+        while True:
+            lot = []
+            try:
+                while len(lot) < self.taille_lot:
+                    lot.append(self._file.get_nowait())
+            except queue.Empty:
+                pass
+            if not lot:
+                return ecrits
+            ecrits += self._ecrire(lot)
+    
+    def fermer(self):
+        """Arrête le thread de fond puis écrit les échanges restants"""
+        if self._arret.is_set() and not self._thread.is_alive():
+            return
+        self._arret.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.delai + 2)
+        self.vider()
+    
+    def statistiques(self):
+        return {
+            'en_attente': self._file.qsize(),
+            'capacite': self._file.maxsize,
+            'recus': self.recus,
+            'ecrits': self.ecrits,
+            'abandonnes': self.abandonnes,
+            'ecritures': self.ecritures,
+            'taille_lot_moyenne': self.ecrits / self.ecritures if self.ecritures else 0,
+            'taille_lot_max': self.taille_lot_max,
+            'erreurs': self.erreurs
+        }
+
+# NumPy n'est importé qu'à la création du premier IndexVectoriel (démarrage rapide)
+np = None
+
+def importer_numpy():
+    """Importe NumPy au premier besoin et le rend disponible sous le nom `np`"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+class IndexVectoriel:
+    """Index de similarité cosinus sur les questions de chatbot_memory.
+    
+    Chaque question est représentée par un vecteur TF haché (mots et
+    trigrammes de caractères, crc32 modulo la dimension, donc stable entre
+    deux exécutions) rangé dans une matrice float32 contiguë. La pondération
+    IDF est tirée des fréquences de documents par dimension, ce qui permet
+    d'ajouter des lignes sans vocabulaire figé. La recherche des k meilleurs
+    est un seul produit matrice-vecteur. L'index est sauvegardé en .npz et
+    complété au démarrage par les lignes d'id supérieur au dernier indexé.
+    
+    Une question proche n'est retenue que si elle contient les mots les
+    plus rares de la question posée (fréquence de document minimale, accents
+    ignorés) : « comment fonctionne une voiture » ressemble à « comment
+    fonctionne un moteur », mais « voiture » n'y figure pas. Un mot absent
+    de toutes les questions apprises est toujours parmi les plus rares.
+    
+    Le fichier enregistre aussi la base indexée (`pool.identifiant`) ; au
+    rechargement, il est écarté si la base diffère ou si ses lignes d'id
+    inférieur ou égal au dernier indexé ne sont plus celles de l'index
+    (base réinitialisée, lignes supprimées) : les ids ne désigneraient
+    plus les mêmes questions.
+    """
+    
+    def __init__(self, chemin=INDEX_VECTORIEL_FICHIER, dimension=INDEX_VECTORIEL_DIMENSION,
+                 seuil=INDEX_VECTORIEL_SEUIL):
+        importer_numpy()
+        self.chemin = Path(chemin) if chemin else None
+        self.dimension = dimension
+        self.seuil = seuil
+        self._matrice = np.zeros((0, dimension), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._questions = []
+        self._lignes = {}
+        self._frequences = np.zeros(dimension, dtype=np.float32)
+        self._frequences_mots = {}
+        self._poids = None
+        self._normes = None
+        self._verrou = threading.Lock()
+        self.base = None
+        self.modifie = False
+    
+    def __len__(self):
+        return len(self._questions)
+    
+    @property
+    def dernier_id(self):
+        return int(self._ids[:len(self)].max()) if len(self) else 0
+    
+    @staticmethod
+    def mots(texte):
+        """Mots distincts d'un texte, en minuscules et sans accents"""
+        texte = unicodedata.normalize('NFD', texte.lower())
+        return set(''.join(c for c in texte if not unicodedata.combining(c)).split())
+    
+    def _compter_mots(self, questions):
+        for question in questions:
+            for mot in self.mots(question):
+                self._frequences_mots[mot] = self._frequences_mots.get(mot, 0) + 1
+    
+    def vectoriser(self, texte):
+        """Vecteur TF (log) d'un texte : mots entiers et trigrammes de caractères"""
+        vecteur = np.zeros(self.dimension, dtype=np.float32)
+        for mot in texte.lower().split():
+            vecteur[zlib.crc32(mot.encode()) % self.dimension] += 1.0
+            borne = f"<{mot}>"
+            for i in range(len(borne) - 2):
+                vecteur[zlib.crc32(borne[i:i + 3].encode()) % self.dimension] += 0.5
+        return np.log1p(vecteur, out=vecteur)
+    
+    def ajouter(self, question_normalisee, memory_id):
+        """Ajoute une question apprise (ignorée si l'id est déjà indexé)"""
+        self.ajouter_lot([(memory_id, question_normalisee)])
+    
+    def ajouter_lot(self, lignes):
+        """Ajoute des lignes (id, question_normalisee) ; retourne le nombre ajouté"""
+        with self._verrou:
+            nouvelles = [(memory_id, question) for memory_id, question in lignes
+                         if question and memory_id not in self._lignes]
+            if not nouvelles:
+                return 0
             
+            n = len(self._questions)
+            self._reserver(n + len(nouvelles))
+            for i, (memory_id, question) in enumerate(nouvelles, n):
+                self._matrice[i] = self.vectoriser(question)
+                self._ids[i] = memory_id
+                self._questions.append(question)
+                self._lignes[memory_id] = i
+            self._frequences += (self._matrice[n:n + len(nouvelles)] > 0).sum(axis=0)
+            self._compter_mots(question for _, question in nouvelles)
+            self._poids = self._normes = None
+            self.modifie = True
+            return len(nouvelles)
+    
+    def _reserver(self, capacite):
+        """Agrandit la matrice par doublement (ajouts en temps amorti constant)"""
+        if capacite <= len(self._matrice):
+            return
+        nouvelle_capacite = max(capacite, 2 * len(self._matrice), 64)
+        matrice = np.zeros((nouvelle_capacite, self.dimension), dtype=np.float32)
+        ids = np.zeros(nouvelle_capacite, dtype=np.int64)
+        n = len(self._questions)
+        matrice[:n] = self._matrice[:n]
+        ids[:n] = self._ids[:n]
+        self._matrice, self._ids = matrice, ids
+    
+    def _preparer(self):
+        """Poids IDF et normes pondérées, recalculés une fois après des ajouts"""
+        with self._verrou:
+            n = len(self._questions)
+            if self._poids is None:
+                self._poids = np.log((1 + n) / (1 + self._frequences)) + 1
+                normes = np.linalg.norm(self._matrice[:n] * self._poids, axis=1)
+                normes[normes == 0] = 1.0
+                self._normes = normes
+            return n, self._matrice, self._ids, self._poids, self._normes
+    
+    def rechercher(self, question_normalisee, k=5, seuil=None):
+        """Les k questions les plus proches : liste de (score, id, question) au-dessus du seuil"""
+        if not len(self) or not question_normalisee:
+            return []
+        seuil = self.seuil if seuil is None else seuil
+        n, matrice, ids, poids, normes = self._preparer()
+        
+        requete = self.vectoriser(question_normalisee) * poids
+        norme_requete = np.linalg.norm(requete)
+        if not norme_requete:
+            return []
+        scores = (matrice[:n] @ (requete * poids)) / (normes * norme_requete)
+        
+        # Mots les plus rares de la question : ils doivent figurer dans la question retenue
+        mots = self.mots(question_normalisee)
+        frequence_min = min(self._frequences_mots.get(mot, 0) for mot in mots)
+        mots_rares = {mot for mot in mots if self._frequences_mots.get(mot, 0) == frequence_min}
+        
+        candidats = np.flatnonzero(scores >= seuil)
+        candidats = candidats[np.argsort(-scores[candidats])]
+        resultats = []
+        for i in candidats:
+            if mots_rares <= self.mots(self._questions[i]):
+                resultats.append((float(scores[i]), int(ids[i]), self._questions[i]))
+                if len(resultats) == k:
+                    break
+        return resultats
+    
+    def charger(self, pool=None):
+        """Recharge l'index sauvegardé ; False s'il est absent, de dimension
+        différente ou construit sur une autre base que celle du pool"""
+        if not self.chemin or not self.chemin.exists():
+            return False
+        try:
+            with np.load(self.chemin) as donnees:
+                if int(donnees['dimension']) != self.dimension:
+                    logger.info("Index vectoriel: dimension modifiée, reconstruction")
+                    return False
+                matrice = np.ascontiguousarray(donnees['matrice'], dtype=np.float32)
+                ids = donnees['ids'].astype(np.int64)
+                questions = donnees['questions'].tolist()
+                base = str(donnees['base'])
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Index vectoriel illisible, reconstruction: {e}")
+            return False
+        
+        if pool is not None and not self._meme_base(pool, base, len(ids), int(ids.max()) if len(ids) else 0):
+            logger.info("Index vectoriel: construit sur une autre base ou une base réinitialisée, reconstruction")
+            return False
+        
+        with self._verrou:
+            self.base = base
+            self._matrice, self._ids, self._questions = matrice, ids, questions
+            self._lignes = {int(memory_id): i for i, memory_id in enumerate(ids)}
+            self._frequences = (matrice > 0).sum(axis=0).astype(np.float32)
+            self._frequences_mots = {}
+            self._compter_mots(questions)
+            self._poids = self._normes = None
+            self.modifie = False
+        logger.info(f"Index vectoriel chargé: {len(questions)} questions")
+        return True
+    
+    @staticmethod
+    def _meme_base(pool, base, compte, dernier_id):
+        """Vrai si la base du pool est celle de l'index et contient encore
+        exactement `compte` lignes d'id inférieur ou égal à `dernier_id`"""
+        if base != pool.identifiant:
+            return False
+        try:
+            with pool.connexion() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT COUNT(*), MAX(id) FROM chatbot_memory WHERE id <= %s", (dernier_id,))
+                compte_base, dernier_id_base = cursor.fetchone()
+                cursor.close()
         except Error as e:
-            logger.error(f"Erreur sauvegarde sémantique: {e}")
+            logger.error(f"Erreur vérification index vectoriel: {e}")
             return False
+        return compte_base == compte and (dernier_id_base or 0) == dernier_id
     
-    def _extraire_concept_principal(self, analyse):
-        """Extrait le concept principal de l'analyse"""
-        if analyse['sujet_principal']:
-            return analyse['sujet_principal']['lemma']
-        elif analyse['complement_principal']:
-            return analyse['complement_principal']['lemma']
-        elif analyse['mots_cles']:
-            return analyse['mots_cles'][0]['lemma']
-        return None
+    def synchroniser(self, pool):
+        """Indexe les lignes de chatbot_memory plus récentes que le dernier id indexé"""
+        self.base = pool.identifiant
+        try:
+            with pool.connexion() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT id, question_normalized FROM chatbot_memory WHERE id > %s ORDER BY id",
+                               (self.dernier_id,))
+                lignes = cursor.fetchall()
+                cursor.close()
+        except Error as e:
+            logger.error(f"Erreur synchronisation index vectoriel: {e}")
+            return 0
+        return self.ajouter_lot(lignes)
+    
+    def sauvegarder(self):
+        """Écrit l'index (fichier temporaire puis remplacement atomique)"""
+        if not self.chemin:
+            return False
+        with self._verrou:
+            n = len(self._questions)
+            matrice, ids, questions = self._matrice[:n], self._ids[:n], list(self._questions)
+            self.modifie = False
+        temporaire = self.chemin.with_name(self.chemin.name + '.tmp')
+        try:
+            with open(temporaire, 'wb') as fichier:
+                np.savez(fichier, dimension=self.dimension, matrice=matrice, ids=ids,
+                         questions=np.array(questions, dtype=str), base=np.array(self.base or ''))
+            os.replace(temporaire, self.chemin)
+            return True
+        except OSError as e:
+            logger.error(f"Erreur sauvegarde index vectoriel: {e}")
+            self.modifie = True
+            return False
+
+class IndexPleinTexte:
+    """Index inversé BM25 sur les questions et réponses de chatbot_memory.
+    
+    Chaque connaissance est un document : sa question (comptée deux fois,
+    elle décrit le sujet) et sa réponse. Les listes {terme: {id: tf}} sont
+    tenues à jour à chaque apprentissage ; une réponse réapprise remplace
+    l'ancienne. L'index n'est pas sauvegardé : il est construit au
+    démarrage en une lecture de la table.
+    
+    Une réponse n'est retenue que si les termes trouvés dans le document
+    couvrent au moins `seuil` du poids IDF de la question : un mot absent
+    de toute la mémoire (sujet inconnu) pèse le plus lourd et fait échouer
+    la recherche. Seuls les documents pouvant atteindre ce seuil sont
+    évalués (voir `_candidats`), ce qui évite de parcourir les longues
+    listes des mots vides.
+    """
+    
+    K1 = 1.2
+    B = 0.75
+    POIDS_QUESTION = 2
+    TERMES_COMBINES_MAX = 10
+    
+    def __init__(self, seuil=PLEIN_TEXTE_SEUIL):
+        self.seuil = seuil
+        self._postings = {}
+        self._documents = {}
+        self._longueur_totale = 0
+        self._verrou = threading.Lock()
+    
+    def __len__(self):
+        return len(self._documents)
+    
+    @property
+    def dernier_id(self):
+        return max(self._documents, default=0)
     
-    def _sauvegarder_concept(self, concept, analyse, reponse):
-        """Sauvegarde le concept sémantique"""
-        try:
-            cursor = self.connection.cursor()
-            
-            # Sauvegarde du concept principal
-            synonyms = [mot['lemma'] for mot in analyse['mots_cles'] if mot['lemma'] != concept]
-            
-            cursor.execute("""
-            INSERT INTO concepts_semantiques (concept_principal, synonyms)
-            VALUES (%s, %s)
-            ON DUPLICATE KEY UPDATE synonyms = JSON_MERGE_PRESERVE(synonyms, VALUES(synonyms))
-            """, (concept, json.dumps(synonyms)))
-            
-            # Sauvegarde des relations sémantiques
-            if analyse['action_principale']:
-                cursor.execute("""
-                INSERT INTO relations_semantiques (concept_source, relation_type, concept_cible)
-                VALUES (%s, 'action', %s)
-                ON DUPLICATE KEY UPDATE force_relation = force_relation + 0.1
-                """, (concept, analyse['action_principale']['lemma']))
+    @staticmethod
+    def termes(texte):
+        """Mots d'au moins deux caractères, en minuscules"""
+        return [mot for mot in MOTIF_MOT.findall(texte.lower()) if len(mot) > 1]
+    
+    def ajouter(self, memory_id, question_normalisee, reponse):
+        """Indexe une connaissance (remplace la version déjà indexée sous cet id)"""
+        self.ajouter_lot([(memory_id, question_normalisee, reponse)])
+    
+    def ajouter_lot(self, lignes):
+        """Indexe des lignes (id, question_normalisee, réponse) ; retourne le nombre indexé"""
+        nombre = 0
+        with self._verrou:
+            for memory_id, question, reponse in lignes:
+                if not question:
+                    continue
+                self._retirer(memory_id)
+                frequences = {}
+                for terme in self.termes(question) * self.POIDS_QUESTION + self.termes(reponse or ''):
+                    frequences[terme] = frequences.get(terme, 0) + 1
+                longueur = sum(frequences.values())
+                for terme, tf in frequences.items():
+                    self._postings.setdefault(terme, {})[memory_id] = tf
+                self._documents[memory_id] = (question, longueur, tuple(frequences))
+                self._longueur_totale += longueur
+                nombre += 1
+        return nombre
+    
+    def _retirer(self, memory_id):
+        document = self._documents.pop(memory_id, None)
+        if document is None:
+            return
+        _, longueur, termes = document
+        for terme in termes:
+            postings = self._postings[terme]
+            del postings[memory_id]
+            if not postings:
+                del self._postings[terme]
+        self._longueur_totale -= longueur
+    
+    def _idf(self, terme, n):
+        df = len(self._postings.get(terme, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+    
+    def rechercher(self, question_normalisee, k=1, seuil=None):
+        """Les k meilleurs documents : liste de (score, id, question) dont la couverture atteint le seuil"""
+        seuil = self.seuil if seuil is None else seuil
+        termes = list(dict.fromkeys(self.termes(question_normalisee or '')))
+        if not termes:
+            return []
+        
+        with self._verrou:
+            n = len(self._documents)
+            if not n:
+                return []
+            longueur_moyenne = self._longueur_totale / n
+            poids = {terme: self._idf(terme, n) for terme in termes}
+            total = sum(poids.values())
             
-            self.connection.commit()
-            cursor.close()
+            minimum = seuil * total
+            connus = sorted((terme for terme in termes if terme in self._postings), key=poids.get)
+            candidats = self._candidats(connus, poids, minimum)
             
-        except Error as e:
-            logger.error(f"Erreur sauvegarde concept: {e}")
+            resultats = []
+            for memory_id in candidats:
+                question, longueur, _ = self._documents[memory_id]
+                score = couverture = 0.0
+                for terme in connus:
+                    tf = self._postings[terme].get(memory_id)
+                    if tf:
+                        couverture += poids[terme]
+                        score += poids[terme] * tf * (self.K1 + 1) / (
+                            tf + self.K1 * (1 - self.B + self.B * longueur / longueur_moyenne))
+                if couverture >= minimum:
+                    resultats.append((score, memory_id, question))
+        
+        resultats.sort(reverse=True)
+        return resultats[:k]
     
-    def rechercher_semantiquement(self, question):
-        """Recherche basée sur la sémantique, pas juste les mots"""
-        analyse = self.comprehenseur.analyser_structure_phrase(question)
-        if not analyse:
-            return None
+    def _candidats(self, connus, poids, minimum):
+        """Documents pouvant atteindre la couverture minimale.
         
-        concept_recherche = self._extraire_concept_principal(analyse)
-        if not concept_recherche:
-            return None
+        Un tel document contient tous les termes d'au moins un ensemble
+        minimal de termes de poids suffisant : les candidats sont l'union des
+        intersections de ces ensembles (opérations sur ensembles, en C). Pour
+        une longue question, les termes par IDF croissant dont le poids
+        cumulé reste sous le seuil ne suffisent pas seuls : les candidats
+        sont les documents des autres termes.
+        """
+        if len(connus) > self.TERMES_COMBINES_MAX:
+            cumul, candidats = 0.0, set()
+            for terme in connus:
+                cumul += poids[terme]
+                if cumul >= minimum:
+                    candidats.update(self._postings[terme])
+            return candidats
         
+        minimaux = []
+        for taille in range(1, len(connus) + 1):
+            for ensemble in combinations(connus, taille):
+                if sum(poids[terme] for terme in ensemble) >= minimum and not any(
+                        minimal <= set(ensemble) for minimal in minimaux):
+                    minimaux.append(set(ensemble))
+        
+        candidats = set()
+        for ensemble in minimaux:
+            listes = sorted((self._postings[terme] for terme in ensemble), key=len)
+            intersection = set(listes[0])
+            for liste in listes[1:]:
+                intersection &= liste.keys()
+            candidats |= intersection
+        return candidats
+    
+    def synchroniser(self, pool):
+        """Indexe les lignes de chatbot_memory plus récentes que le dernier id indexé"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            
-            # Recherche par concept principal
-            cursor.execute("""
-            SELECT cm.response 
-            FROM concepts_semantiques cs
-            JOIN chatbot_memory cm ON cs.concept_principal = cm.question_normalized
-            WHERE cs.concept_principal = %s 
-            OR JSON_CONTAINS(cs.synonyms, %s)
-            LIMIT 1
-            """, (concept_recherche, json.dumps(concept_recherche)))
-            
-            result = cursor.fetchone()
-            if result:
+            with pool.connexion() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""
+                SELECT id, question_normalized, response FROM chatbot_memory
+                WHERE id > %s ORDER BY id
+                """, (self.dernier_id,))
+                lignes = cursor.fetchall()
                 cursor.close()
-                return result['response']
-            
-            # Recherche par relations sémantiques
-            cursor.execute("""
-            SELECT cm.response 
-            FROM relations_semantiques rs
-            JOIN concepts_semantiques cs ON rs.concept_cible = cs.concept_principal
-            JOIN chatbot_memory cm ON cs.concept_principal = cm.question_normalized
-            WHERE rs.concept_source = %s 
-            AND rs.force_relation > 0.5
-            ORDER BY rs.force_relation DESC
-            LIMIT 1
-            """, (concept_recherche,))
-            
-            result = cursor.fetchone()
-            cursor.close()
-            
-            return result['response'] if result else None
-            
         except Error as e:
-            logger.error(f"Erreur recherche sémantique: {e}")
-            return None
-
-# ---------------------------------------------------------
-# 6. COUCHE MÉMOIRE PERSISTANTE
-# ---------------------------------------------------------
+            logger.error(f"Erreur synchronisation index plein texte: {e}")
+            return 0
+        return self.ajouter_lot(lignes)
+    
+    def statistiques(self):
+        return {
+            'documents': len(self._documents),
+            'termes': len(self._postings),
+            'longueur_moyenne': self._longueur_totale / len(self._documents) if self._documents else 0.0
+        }
 
 class CoucheMemoireMySQL:
     """Gère la mémoire persistante avec MySQL"""
     
-    def __init__(self, nlp=None):
-        self.connection = MySQLConfig.get_connection()
+    def __init__(self, nlp=None, comprehenseur=None, pool=None):
+        self.pool = pool or obtenir_stockage().get_pool()
         self.nlp = nlp
-        self.memoire_semantique = MemoireSemantique(self.connection, nlp) if nlp else None
+        self.memoire_semantique = MemoireSemantique(self.pool, nlp, comprehenseur) if nlp else None
+        if self.memoire_semantique:
+            self.memoire_semantique.sur_apprentissage = self._apres_apprentissage
+        
+        self.cache_exact = CacheMemoireExacte() if MEMOIRE_CACHE_ACTIF else None
+        if self.cache_exact is not None:
+            self.cache_exact.charger(self.pool)
+        
+        self.compteurs = TamponCompteurs(self.pool)
+        self.historique = JournalConversations(self.pool) if HISTORIQUE_ACTIF else None
+        
+        self.index_vectoriel = None
+        if INDEX_VECTORIEL_ACTIF:
+            if module_disponible("numpy"):
+                self.index_vectoriel = IndexVectoriel()
+            else:
+                logger.warning("NumPy absent : index vectoriel désactivé")
+        if self.index_vectoriel is not None:
+            self.index_vectoriel.charger(self.pool)
+            if self.index_vectoriel.synchroniser(self.pool):
+                self.index_vectoriel.sauvegarder()
+        
+        self.index_plein_texte = IndexPleinTexte() if PLEIN_TEXTE_ACTIF else None
+        if self.index_plein_texte is not None:
+            self.index_plein_texte.synchroniser(self.pool)
+            logger.info(f"Index plein texte: {len(self.index_plein_texte)} connaissances")
+        
+        self.correcteur = CorrecteurSymSpell() if CORRECTION_ACTIVE else None
+        if self.correcteur is not None:
+            self._construire_correcteur()
+    
+    def _construire_correcteur(self):
+        """Vocabulaire du correcteur : questions apprises, concepts, synonymes et corrections connues"""
+        for regle in REGLES_CORRECTIONS:
+            self.correcteur.ajouter_texte(regle.remplacement)
+        try:
+            with self.pool.connexion() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""
+                SELECT question_normalized FROM chatbot_memory
+                UNION ALL SELECT concept_principal FROM concepts_semantiques
+                UNION ALL SELECT synonyme FROM synonymes_concepts
+                """)
+                for (texte,) in cursor:
+                    self.correcteur.ajouter_texte(texte)
+                cursor.close()
+        except Error as e:
+            logger.error(f"Erreur construction du correcteur: {e}")
+        logger.info(f"Correcteur orthographique: {len(self.correcteur)} mots")
+    
+    def corriger_question(self, question):
+        """Question corrigée mot à mot d'après le vocabulaire appris"""
+        if self.correcteur is None:
+            return question
+        return self.correcteur.corriger(question)
+    
+    def _formes_question(self, question):
+        """Question normalisée, puis sa correction (fautes de frappe) si elle en diffère.
+        
+        La correction n'est calculée que si l'appelant demande la seconde forme.
+        """
+        question_normalisee = normaliser_question(question)
+        yield question_normalisee
+        if self.correcteur is not None:
+            question_corrigee = self.correcteur.corriger(question_normalisee)
+            if question_corrigee != question_normalisee:
+                yield question_corrigee
+    
+    def consulter_memoire_exacte(self, question):
+        """Correspondance exacte sur la question normalisée, sans analyse linguistique.
+        
+        En cas d'échec, la question est corrigée (fautes de frappe) puis
+        cherchée une seconde fois si la correction l'a modifiée.
+        """
+        for forme in self._formes_question(question):
+            reponse = self._consulter_cle_exacte(forme)
+            if reponse is not None:
+                return reponse
+        return None
+    
+    def _consulter_cle_exacte(self, question_normalisee):
+        """Réponse enregistrée sous cette question normalisée, ou None"""
+        try:
+            if self.cache_exact is not None and self.cache_exact.charge:
+                self.cache_exact.rafraichir_si_necessaire(self.pool)
+                result = self.cache_exact.obtenir(question_normalisee)
+                if not result:
+                    return None
+                memory_id, reponse = result
+            else:
+                # La clé de chatbot_memory d'abord, puis celle de cles_exactes
+                with self.pool.connexion() as connection:
+                    cursor = connection.cursor(dictionary=True)
+                    cursor.execute("""
+                    SELECT 0 AS priorite, id, response FROM chatbot_memory
+                    WHERE question_normalized = %s
+                    UNION ALL
+                    SELECT 1 AS priorite, cm.id, cm.response
+                    FROM cles_exactes ce JOIN chatbot_memory cm ON cm.id = ce.question_id
+                    WHERE ce.cle = %s
+                    ORDER BY priorite LIMIT 1
+                    """, (question_normalisee, question_normalisee))
+                    result = cursor.fetchone()
+                    cursor.close()
+                if not result:
+                    return None
+                memory_id, reponse = result['id'], result['response']
+            
+            self._incrementer_utilisation(memory_id)
+            return reponse
+        
+        except Error as e:
+            logger.error(f"Erreur consultation mémoire: {e}")
+            return None
     
     def consulter_memoire(self, question):
         """Consulte la mémoire pour une question"""
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connection = MySQLConfig.get_connection()
-                
-            question_normalisee = normaliser_question(question)
-            
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("SELECT id, response FROM chatbot_memory WHERE question_normalized = %s", 
-                          (question_normalisee,))
-            result = cursor.fetchone()
-            cursor.close()
-            
-            if result:
-                self._incrementer_utilisation(result['id'])
-                return result['response']
+            reponse = self.consulter_memoire_exacte(question)
+            if reponse:
+                return reponse
             
             # Recherche sémantique si disponible
             if self.memoire_semantique:
                 reponse_semantique = self.memoire_semantique.rechercher_semantiquement(question)
                 if reponse_semantique:
                     return reponse_semantique
-                    
-            return None
+            
+            # Reformulation d'une question déjà apprise, puis mots de la question
+            # présents dans une connaissance
+            return self.consulter_memoire_vectorielle(question) or self.consulter_memoire_plein_texte(question)
                 
         except Error as e:
             logger.error(f"Erreur consultation mémoire: {e}")
             return None
     
-    def _incrementer_utilisation(self, memory_id):
-        """Incrémente le compteur d'utilisation"""
+    def consulter_memoire_vectorielle(self, question):
+        """Réponse de la question apprise la plus proche (cosinus au-dessus du seuil).
+        
+        Comme pour la correspondance exacte, la question corrigée est
+        essayée si la question telle quelle n'a pas de voisine assez proche.
+        """
+        if self.index_vectoriel is None:
+            return None
+        return self._consulter_index(self.index_vectoriel, question)
+    
+    def consulter_memoire_plein_texte(self, question):
+        """Réponse de la connaissance la mieux classée par BM25 (question et réponse apprises),
+        pour la question telle quelle puis corrigée"""
+        if self.index_plein_texte is None:
+            return None
+        return self._consulter_index(self.index_plein_texte, question)
+    
+    def _consulter_index(self, index, question):
+        """Meilleur résultat de l'index pour la première forme de la question qui en a un"""
+        for forme in self._formes_question(question):
+            resultats = index.rechercher(forme, k=1)
+            if resultats:
+                _, memory_id, question_indexee = resultats[0]
+                return self._reponse_indexee(memory_id, question_indexee)
+        return None
+    
+    def _reponse_indexee(self, memory_id, question_indexee):
+        """Réponse d'une connaissance trouvée par un index (cache exact, sinon une requête par id).
+        
+        La ligne lue doit porter la question indexée : sinon l'index ne
+        correspond plus à la base, et l'id désigne une autre connaissance.
+        """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("UPDATE chatbot_memory SET use_count = use_count + 1 WHERE id = %s", 
-                          (memory_id,))
-            self.connection.commit()
-            cursor.close()
+            entree = self.cache_exact.obtenir(question_indexee) if self.cache_exact is not None else None
+            if entree and entree[0] == memory_id:
+                reponse = entree[1]
+            else:
+                with self.pool.connexion() as connection:
+                    cursor = connection.cursor()
+                    cursor.execute("SELECT response, question_normalized FROM chatbot_memory WHERE id = %s",
+                                   (memory_id,))
+                    result = cursor.fetchone()
+                    cursor.close()
+                if not result:
+                    return None
+                reponse, question_enregistree = result
+                if question_enregistree != question_indexee:
+                    logger.warning(f"Index désynchronisé: l'id {memory_id} ne porte plus « {question_indexee} »")
+                    return None
         except Error as e:
-            logger.error(f"Erreur incrémentation utilisation: {e}")
+            logger.error(f"Erreur consultation mémoire indexée: {e}")
+            return None
+        
+        self._incrementer_utilisation(memory_id)
+        return reponse
+    
+    def _incrementer_utilisation(self, memory_id):
+        """Incrémente le compteur d'utilisation (écriture différée)"""
+        self.compteurs.incrementer_utilisation(memory_id)
     
     def sauvegarder_connaissance(self, question, reponse, source="manuelle"):
         """Sauvegarde une nouvelle connaissance"""
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connection = MySQLConfig.get_connection()
-                
             # Utilisation de la mémoire sémantique si disponible
             if self.memoire_semantique:
                 return self.memoire_semantique.sauvegarder_connaissance_semantique(question, reponse)
@@ -805,17 +3323,16 @@ class CoucheMemoireMySQL:
                 # Fallback à la méthode traditionnelle
                 question_normalisee = normaliser_question(question)
                 
-                cursor = self.connection.cursor()
-                query = """
-                INSERT INTO chatbot_memory (question_normalized, response, learn_count)
-                VALUES (%s, %s, 1)
-                ON DUPLICATE KEY UPDATE 
-                    response = VALUES(response),
-                    learn_count = learn_count + 1
-                """
-                cursor.execute(query, (question_normalisee, reponse))
-                self.connection.commit()
-                cursor.close()
+                with self.pool.connexion() as connection:
+                    cursor = connection.cursor()
+                    cursor.execute(self.pool.requetes['apprendre'], (question_normalisee, reponse))
+                    # Insertion ou mise à jour : l'id est relu dans la même transaction
+                    cursor.execute("SELECT id FROM chatbot_memory WHERE question_normalized = %s",
+                                   (question_normalisee,))
+                    question_id = cursor.fetchone()[0]
+                    connection.commit()
+                    cursor.close()
+                self._apres_apprentissage(question_normalisee, question_id, reponse)
                 
                 self._incrementer_statistique('apprentissages')
                 if source != "manuelle":
@@ -826,24 +3343,109 @@ class CoucheMemoireMySQL:
             logger.error(f"Erreur sauvegarde connaissance: {e}")
             return False
     
+    def sauvegarder_connaissances_batch(self, paires, taille_lot=500, source="manuelle",
+                                        n_process=ANALYSE_PROCESSUS):
+        """Sauvegarde de nombreuses paires (question, réponse) par lots.
+        
+        Les paires peuvent venir d'un générateur : elles sont consommées lot
+        par lot. Chaque lot est écrit dans une transaction explicite (validé
+        en entier ou annulé), et les structures en mémoire (cache exact,
+        index, correcteur) ne sont mises à jour qu'après sa validation. Avec
+        la mémoire sémantique, les questions passent par un seul flux
+        nlp.pipe (analyser_lot, sur n_process processus) pour tout l'import.
+        Retourne le nombre de paires enregistrées.
+        """
+        if self.memoire_semantique:
+            return self._sauvegarder_lots_semantiques(paires, taille_lot, n_process)
+        
+        enregistrees = 0
+        for lot in par_lots(paires, taille_lot):
+            # Fallback à la méthode traditionnelle
+            lignes = [(normaliser_question(question), reponse) for question, reponse in lot if question and reponse]
+            lignes = [(question_normalisee, reponse) for question_normalisee, reponse in lignes if question_normalisee]
+            if not lignes:
+                continue
+            try:
+                with self.pool.transaction() as connection:
+                    cursor = connection.cursor()
+                    cursor.executemany(self.pool.requetes['apprendre'], lignes)
+                    # IDs des lignes insérées ou mises à jour, relus en une requête
+                    ids = MemoireSemantique._lire_ids(cursor, "chatbot_memory", "question_normalized",
+                                                      [question_normalisee for question_normalisee, _ in lignes])
+                    cursor.close()
+            except Error as e:
+                logger.error(f"Erreur sauvegarde par lot: {e}")
+                continue
+            
+            # La dernière réponse du lot l'emporte, comme pour l'upsert
+            for question_normalisee, reponse in dict(lignes).items():
+                if question_normalisee.lower() in ids:
+                    self._apres_apprentissage(question_normalisee, ids[question_normalisee.lower()], reponse)
+            self.compteurs.incrementer_statistique('apprentissages', len(lignes))
+            if source != "manuelle":
+                self.compteurs.incrementer_statistique('apprentissages_auto', len(lignes))
+            enregistrees += len(lignes)
+        
+        return enregistrees
+    
+    def _sauvegarder_lots_semantiques(self, paires, taille_lot, n_process):
+        """Analyse en flux puis écriture par lots de la mémoire sémantique"""
+        paires_analyses, paires_ecriture = tee(
+            (question, reponse) for question, reponse in paires if question and reponse)
+        analyses = self.memoire_semantique.comprehenseur.analyser_lot(
+            (question for question, _ in paires_analyses), n_process=n_process)
+        
+        enregistrees = 0
+        for lot in par_lots(zip(paires_ecriture, analyses), taille_lot):
+            enregistrees += self.memoire_semantique.sauvegarder_connaissances_lot(
+                [paire for paire, _ in lot],
+                [AnalyseQuestion(paire[0], None, analyse) if analyse else None for paire, analyse in lot])
+        return enregistrees
+    
+    def _apres_apprentissage(self, question_normalisee, question_id, reponse, cles_exactes=()):
+        """Propage une connaissance apprise aux structures en mémoire.
+        
+        La mémoire sémantique enregistre la question sous sa forme lemmatisée
+        (« qui socrate ») et sa forme sans analyse (« qui est socrate ») dans
+        la table cles_exactes : ces `cles_exactes` sont reportées dans le
+        cache comme elles le seraient en le rechargeant.
+        """
+        if self.cache_exact is not None:
+            self.cache_exact.mettre_a_jour(question_normalisee, question_id, reponse)
+            for cle in cles_exactes:
+                self.cache_exact.mettre_a_jour(cle, question_id, reponse, secondaire=True)
+        if self.index_vectoriel is not None:
+            self.index_vectoriel.ajouter(question_normalisee, question_id)
+        if self.index_plein_texte is not None:
+            self.index_plein_texte.ajouter(question_id, question_normalisee, reponse)
+        if self.correcteur is not None:
+            self.correcteur.ajouter_texte(question_normalisee)
+    
     def _incrementer_statistique(self, stat_key):
-        """Incrémente une statistique"""
-        try:
-            cursor = self.connection.cursor()
-            query = "UPDATE learning_stats SET stat_value = stat_value + 1 WHERE stat_key = %s"
-            cursor.execute(query, (stat_key,))
-            self.connection.commit()
-            cursor.close()
-        except Error as e:
-            logger.error(f"Erreur mise à jour statistique: {e}")
+        """Incrémente une statistique (écriture différée)"""
+        self.compteurs.incrementer_statistique(stat_key)
+    
+    def journaliser(self, message, reponse):
+        """Ajoute un échange à chat_history (écriture différée, jamais bloquante)"""
+        if self.historique is not None:
+            self.historique.enregistrer(message, reponse)
+    
+    def fermer(self):
+        """Écrit les compteurs et l'historique en attente et sauvegarde l'index vectoriel"""
+        self.compteurs.fermer()
+        if self.historique is not None:
+            self.historique.fermer()
+        if self.index_vectoriel is not None and self.index_vectoriel.modifie:
+            self.index_vectoriel.sauvegarder()
     
     def get_nombre_connaissances(self):
         """Retourne le nombre de connaissances en mémoire"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT COUNT(*) as count FROM chatbot_memory")
-            result = cursor.fetchone()
-            cursor.close()
+            with self.pool.connexion() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT COUNT(*) as count FROM chatbot_memory")
+                result = cursor.fetchone()
+                cursor.close()
             return result[0] if result else 0
         except Error as e:
             logger.error(f"Erreur comptage connaissances: {e}")
@@ -1090,46 +3692,381 @@ class CoucheApprentissageAutomatique:
 # 10. ORCHESTRATION LINGUISTIQUE
 # ---------------------------------------------------------
 
-class OrchestrationLinguistique:
-    """Orchestration avec vraie compréhension linguistique"""
+class Histogramme:
+    """Histogramme cumulatif à bornes fixes (format Prometheus)"""
     
-    def __init__(self, nlp):
-        self.nlp = nlp
-        self.comprehenseur = ComprehenseurLinguistique(nlp)
-        self.memoire_semantique = None
-        self.debug_mode = True
+    def __init__(self, bornes):
+        self.bornes = list(bornes)
+        self.comptes = [0] * (len(self.bornes) + 1)    # dernier seau : +Inf
+        self.somme = 0.0
+        self.nombre = 0
     
-    def connecter_memoire_semantique(self, connection):
-        """Connecte la mémoire sémantique"""
-        self.memoire_semantique = MemoireSemantique(connection, self.nlp)
+    def observer(self, valeur):
+        self.comptes[bisect.bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.nombre += 1
+    
+    def quantile(self, q):
+        """Borne supérieure du seau contenant le quantile q (estimation)"""
+        if not self.nombre:
+            return 0.0
+        cible, cumul = q * self.nombre, 0
+        for borne, compte in zip(self.bornes + [float('inf')], self.comptes):
+            cumul += compte
+            if cumul >= cible:
+                return borne
+        return float('inf')
+    
+    def exporter(self):
+        cumul, seaux = 0, {}
+        for borne, compte in zip(self.bornes + ['+Inf'], self.comptes):
+            cumul += compte
+            seaux[str(borne)] = cumul
+        return {'seaux': seaux, 'somme': self.somme, 'nombre': self.nombre}
+
+class MesureRequete:
+    """Durées par étape, source de la réponse et allers-retours base d'une requête"""
+    
+    def __init__(self):
+        self.etapes = {}
+        self.source = None
+        self._debut = time.perf_counter()
+        self._allers_retours = ALLERS_RETOURS.valeur()
+        self.duree = None
+        self.allers_retours = None
     
-    def _rechercher_wikipedia(self, question):
-        """Recherche sur Wikipedia"""
+    @contextmanager
+    def etape(self, nom):
+        debut = time.perf_counter()
         try:
-            question_propre = nettoyer_question_pour_recherche(question)
-            if not question_propre or len(question_propre) < 3:
-                return None
-            
-            url = f"https://fr.wikipedia.org/api/rest_v1/page/summary/{quote(question_propre)}"
-            response = requests.get(url, timeout=3)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'extract' in data and data['extract']:
-                    extract = data['extract'].strip()
-                    if extract and len(extract) > 30:
-                        return extract[:350] + "..." if len(extract) > 350 else extract
-            
+            yield
+        finally:
+            self.etapes[nom] = self.etapes.get(nom, 0.0) + time.perf_counter() - debut
+    
+    def terminer(self, source):
+        self.source = source
+        self.duree = time.perf_counter() - self._debut
+        self.allers_retours = ALLERS_RETOURS.valeur() - self._allers_retours
+    
+    def resume(self):
+        etapes = ' | '.join(f"{nom} {duree * 1000:.1f}ms" for nom, duree in self.etapes.items())
+        return (f"{self.source} en {self.duree * 1000:.1f}ms ({etapes}) | "
+                f"{self.allers_retours} aller(s)-retour(s) base")
+
+class Instrumentation:
+    """Agrège les mesures de traiter_question : histogrammes par étape,
+    allers-retours base par requête et compteur des sources de réponse"""
+    
+    BORNES_SECONDES = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                       0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+    BORNES_ALLERS_RETOURS = [0, 1, 2, 3, 5, 10, 20, 50]
+    
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.etapes = {}
+        self.sources = {}
+        self.allers_retours = Histogramme(self.BORNES_ALLERS_RETOURS)
+    
+    def enregistrer(self, mesure):
+        with self._verrou:
+            for nom, duree in list(mesure.etapes.items()) + [('total', mesure.duree)]:
+                if nom not in self.etapes:
+                    self.etapes[nom] = Histogramme(self.BORNES_SECONDES)
+                self.etapes[nom].observer(duree)
+            self.sources[mesure.source] = self.sources.get(mesure.source, 0) + 1
+            self.allers_retours.observer(mesure.allers_retours)
+    
+    def resume(self):
+        """Par étape : nombre, moyenne, p50 et p95 estimés (ms)"""
+        with self._verrou:
+            return {
+                nom: {
+                    'nombre': histogramme.nombre,
+                    'moyenne_ms': histogramme.somme / histogramme.nombre * 1000 if histogramme.nombre else 0.0,
+                    'p50_ms': histogramme.quantile(0.5) * 1000,
+                    'p95_ms': histogramme.quantile(0.95) * 1000,
+                }
+                for nom, histogramme in self.etapes.items()
+            }
+    
+    def exporter_json(self):
+        with self._verrou:
+            return json.dumps({
+                'etapes_secondes': {nom: histogramme.exporter() for nom, histogramme in self.etapes.items()},
+                'sources': dict(self.sources),
+                'allers_retours_base': self.allers_retours.exporter(),
+            }, indent=2, ensure_ascii=False)
+    
+    def exporter_prometheus(self):
+        lignes = []
+        
+        def histogramme_prometheus(nom, histogramme, etiquettes=''):
+            separateur = ',' if etiquettes else ''
+            for borne, cumul in histogramme.exporter()['seaux'].items():
+                lignes.append(f'{nom}_bucket{{{etiquettes}{separateur}le="{borne}"}} {cumul}')
+            suffixe = f'{{{etiquettes}}}' if etiquettes else ''
+            lignes.append(f'{nom}_sum{suffixe} {histogramme.somme}')
+            lignes.append(f'{nom}_count{suffixe} {histogramme.nombre}')
+        
+        with self._verrou:
+            lignes.append("# HELP alira_etape_duree_secondes Durée des étapes de traiter_question")
+            lignes.append("# TYPE alira_etape_duree_secondes histogram")
+            for nom, histogramme in self.etapes.items():
+                histogramme_prometheus('alira_etape_duree_secondes', histogramme, f'etape="{nom}"')
+            lignes.append("# HELP alira_reponses_total Réponses par source")
+            lignes.append("# TYPE alira_reponses_total counter")
+            for source, nombre in self.sources.items():
+                lignes.append(f'alira_reponses_total{{source="{source}"}} {nombre}')
+            lignes.append("# HELP alira_allers_retours_base Requêtes base par question")
+            lignes.append("# TYPE alira_allers_retours_base histogram")
+            histogramme_prometheus('alira_allers_retours_base', self.allers_retours)
+        return '\n'.join(lignes) + '\n'
+
+class CacheWikipedia:
+    """Cache disque (SQLite) des résumés Wikipédia, avec durée de vie.
+    
+    Les pages absentes sont aussi mémorisées (cache négatif, extrait NULL)
+    pour ne pas redemander la même page inconnue à chaque fois.
+    """
+    
+    def __init__(self, chemin=WIKIPEDIA_CACHE_FICHIER, ttl=WIKIPEDIA_CACHE_TTL,
+                 ttl_negatif=WIKIPEDIA_CACHE_TTL_NEGATIF):
+        self.ttl = ttl
+        self.ttl_negatif = ttl_negatif
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._connexion.execute("""
+        CREATE TABLE IF NOT EXISTS resumes (
+            titre TEXT PRIMARY KEY,
+            extrait TEXT,
+            expire_a REAL NOT NULL
+        )
+        """)
+        self._connexion.commit()
+    
+    def obtenir(self, titre):
+        """Retourne (trouve, extrait) ; trouve=False si absent ou expiré"""
+        with self._verrou:
+            ligne = self._connexion.execute(
+                "SELECT extrait, expire_a FROM resumes WHERE titre = ?", (titre,)).fetchone()
+        if not ligne or ligne[1] < time.time():
+            return False, None
+        return True, ligne[0]
+    
+    def enregistrer(self, titre, extrait):
+        """Mémorise un extrait (ou None pour une page absente)"""
+        ttl = self.ttl if extrait else self.ttl_negatif
+        with self._verrou:
+            self._connexion.execute(
+                "INSERT OR REPLACE INTO resumes (titre, extrait, expire_a) VALUES (?, ?, ?)",
+                (titre, extrait, time.time() + ttl))
+            self._connexion.commit()
+    
+    def purger(self):
+        """Supprime les entrées expirées"""
+        with self._verrou:
+            self._connexion.execute("DELETE FROM resumes WHERE expire_a < ?", (time.time(),))
+            self._connexion.commit()
+    
+    def fermer(self):
+        with self._verrou:
+            self._connexion.close()
+
+class IndexWikipediaLocal:
+    """Résumés Wikipédia hors ligne, construits par index_wikipedia.py depuis un dump.
+    
+    Base SQLite ouverte en lecture seule et projetée en mémoire (mmap) :
+    une ligne par titre normalisé, clé primaire d'une table WITHOUT ROWID,
+    donc une recherche est une descente de B-arbre, sans réseau. Plusieurs
+    titres sont essayés pour une question : la question nettoyée, puis son
+    sujet sans formule interrogative ni article, puis ce sujet au singulier.
+    """
+    
+    # Formule interrogative puis article en tête de question
+    MOTIF_DEBUT = re.compile(
+        r"^(?:(?:qu'est[- ]ce (?:que|qu')|c'est quoi|qui (?:est|était|sont|étaient)|que sais[- ]tu (?:sur|de|d')"
+        r"|parle[- ]moi (?:de|d'|des|du)|explique[- ]moi|dis[- ]moi|définition (?:de|d'|des|du))\s*)?"
+        r"(?:(?:le|la|les|un|une|des|du|de la)\s+|l'|d')?")
+    
+    def __init__(self, chemin=WIKIPEDIA_INDEX_FICHIER):
+        self.chemin = chemin
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(f"{Path(chemin).resolve().as_uri()}?mode=ro", uri=True,
+                                          check_same_thread=False)
+        self._connexion.execute("PRAGMA mmap_size = 268435456")
+        ligne = self._connexion.execute("SELECT valeur FROM meta WHERE cle = 'resumes'").fetchone()
+        self.titres = int(ligne[0]) if ligne else 0
+        self.recherches = 0
+        self.trouves = 0
+    
+    @classmethod
+    def ouvrir(cls, chemin=WIKIPEDIA_INDEX_FICHIER):
+        """Ouvre l'index s'il existe ; None sinon (ou s'il est illisible)"""
+        if not chemin or not os.path.exists(chemin):
             return None
-                
-        except Exception as e:
-            if self.debug_mode:
-                print(f"❓ [DEBUG] Erreur Wikipedia: {e}")
+        try:
+            index = cls(chemin)
+        except sqlite3.Error as e:
+            logger.warning(f"Index Wikipédia local illisible ({chemin}): {e}")
             return None
+        logger.info(f"Index Wikipédia local: {index.titres} résumés")
+        return index
     
-    def _rechercher_base_connaissances(self, question):
-        """Recherche dans la base de connaissances intégrée"""
-        connaissances_base = {
+    def __len__(self):
+        return self.titres
+    
+    @staticmethod
+    def normaliser_titre(titre):
+        """Clé d'un titre : minuscules, espaces au lieu de _, apostrophes droites"""
+        return ' '.join(titre.replace('_', ' ').replace('’', "'").lower().split())
+    
+    @classmethod
+    def titres_candidats(cls, question):
+        """Titres normalisés à essayer, du plus précis au plus général"""
+        complet = cls.normaliser_titre(re.sub(r'[?¿!¡.]', ' ', question))
+        sujet = cls.MOTIF_DEBUT.sub('', complet, count=1).strip()
+        candidats = [complet, sujet]
+        if len(sujet) > 3 and sujet[-1] in 'sx':
+            candidats.append(sujet[:-1])
+        return [titre for titre in dict.fromkeys(candidats) if titre]
+    
+    def rechercher(self, question):
+        """Résumé formaté (tronqué comme en ligne) du premier titre trouvé, ou None"""
+        candidats = self.titres_candidats(question)
+        marqueurs = ', '.join(['?'] * len(candidats))
+        with self._verrou:
+            self.recherches += 1
+            lignes = dict(self._connexion.execute(
+                f"SELECT titre, extrait FROM resumes WHERE titre IN ({marqueurs})", candidats).fetchall())
+        for titre in candidats:
+            extrait = RechercheWikipedia.formater_extrait(lignes.get(titre))
+            if extrait:
+                self.trouves += 1
+                return extrait
+        return None
+    
+    def statistiques(self):
+        return {'titres': self.titres, 'recherches': self.recherches, 'trouves': self.trouves}
+    
+    def fermer(self):
+        with self._verrou:
+            self._connexion.close()
+
+class RechercheWikipedia:
+    """Recherche non bloquante de résumés Wikipédia.
+    
+    L'index local (IndexWikipediaLocal), s'il existe, répond d'abord, sans
+    réseau. Sinon les requêtes partent dans un pool de threads, chacun
+    gardant une session HTTP keep-alive, et les résultats sont mémorisés
+    dans un CacheWikipedia.
+    """
+    
+    EXTRAIT_LONGUEUR_MIN = 30
+    EXTRAIT_LONGUEUR_MAX = 350
+    
+    def __init__(self, url_base=WIKIPEDIA_URL, delai=WIKIPEDIA_TIMEOUT,
+                 cache=None, workers=WIKIPEDIA_WORKERS, index_local=None, en_ligne=WIKIPEDIA_EN_LIGNE):
+        self.url_base = url_base.rstrip('/')
+        self.delai = delai
+        self.en_ligne = en_ligne
+        self.cache = cache if cache is not None else CacheWikipedia()
+        self.index_local = index_local if index_local is not None else IndexWikipediaLocal.ouvrir()
+        self._executeur = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="alira-wikipedia")
+        self._local = threading.local()
+        self._sessions = []
+    
+    @staticmethod
+    def titre_recherche(question):
+        """Titre de page à demander, ou None si la question est trop courte"""
+        question_propre = nettoyer_question_pour_recherche(question)
+        if not question_propre or len(question_propre) < 3:
+            return None
+        return question_propre
+    
+    @classmethod
+    def formater_extrait(cls, texte):
+        """Extrait affichable : None s'il est trop court, tronqué au-delà de EXTRAIT_LONGUEUR_MAX"""
+        texte = (texte or '').strip()
+        if len(texte) <= cls.EXTRAIT_LONGUEUR_MIN:
+            return None
+        if len(texte) > cls.EXTRAIT_LONGUEUR_MAX:
+            return texte[:cls.EXTRAIT_LONGUEUR_MAX] + "..."
+        return texte
+    
+    def rechercher_async(self, question):
+        """Lance la recherche et retourne un Future (déjà résolu si trouvé localement ou en cache)"""
+        titre = self.titre_recherche(question)
+        extrait = None
+        if titre:
+            if self.index_local is not None:
+                extrait = self.index_local.rechercher(titre)
+            if extrait is None:
+                trouve, extrait = self.cache.obtenir(titre)
+                if not trouve and self.en_ligne:
+                    return self._executeur.submit(self._telecharger, titre)
+        
+        futur = Future()
+        futur.set_result(extrait)
+        return futur
+    
+    def rechercher(self, question, delai=None):
+        """Recherche synchrone : attend le résultat au plus `delai` secondes"""
+        futur = self.rechercher_async(question)
+        try:
+            return futur.result(timeout=delai if delai is not None else self.delai + 1)
+        except FutureTimeoutError:
+            # La requête continue en arrière-plan et alimentera le cache
+            return None
+    
+    def _session(self):
+        """Session HTTP keep-alive propre au thread courant"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.headers['User-Agent'] = f"{PROJECT_NAME}/{VERSION}"
+            self._local.session = session
+            self._sessions.append(session)
+        return session
+    
+    def _telecharger(self, titre):
+        """Interroge l'API REST /page/summary/ et met le résultat en cache"""
+        url = f"{self.url_base}/api/rest_v1/page/summary/{quote(titre)}"
+        response = self._session().get(url, timeout=self.delai)
+        
+        if response.status_code == 404:
+            self.cache.enregistrer(titre, None)
+            return None
+        if response.status_code != 200:
+            return None
+        
+        extrait = self.formater_extrait(response.json().get('extract'))
+        self.cache.enregistrer(titre, extrait)
+        return extrait
+    
+    def fermer(self):
+        """Arrête les threads et ferme les sessions et le cache"""
+        self._executeur.shutdown(wait=False, cancel_futures=True)
+        for session in self._sessions:
+            session.close()
+        self.cache.fermer()
+        if self.index_local is not None:
+            self.index_local.fermer()
+
+class OrchestrationLinguistique:
+    """Orchestration avec vraie compréhension linguistique"""
+    
+    def __init__(self, nlp, comprehenseur=None):
+        self.nlp = nlp
+        self.comprehenseur = comprehenseur or ComprehenseurLinguistique(nlp)
+        self.memoire = None
+        self.memoire_semantique = None
+        self.wikipedia = RechercheWikipedia()
+        self.instrumentation = Instrumentation()
+        self.debug_mode = True
+        
+        # Base de connaissances intégrée, compilée une fois en automate
+        self.connaissances_base = {
             'maman': "une figure parentale féminine qui donne naissance et élève ses enfants avec amour",
             'paris': "la capitale de la France, située au nord du pays sur la Seine",
             'france': "un pays d'Europe occidentale, connu pour sa culture, son histoire et sa gastronomie",
@@ -1153,16 +4090,40 @@ class OrchestrationLinguistique:
             'tom cruise': "un acteur et producteur de cinéma américain né en 1962, connu pour ses rôles dans des films comme 'Top Gun' et 'Mission Impossible'",
             'bebe': "un jeune enfant en bas âge, généralement de la naissance à 2 ans"
         }
-        
-        question_lower = question.lower()
-        for mot, reponse in connaissances_base.items():
-            if mot in question_lower:
-                return reponse
-        
-        return None
+        self.automate_connaissances = AutomateMotsCles(self.connaissances_base)
+    
+    def connecter_memoire(self, couche_memoire):
+        """Connecte la mémoire persistante (correspondances exactes et sémantique)"""
+        self.memoire = couche_memoire
+        self.connecter_memoire_semantique(couche_memoire.pool)
+        if couche_memoire.correcteur is not None:
+            for terme in self.connaissances_base:
+                couche_memoire.correcteur.ajouter_texte(terme)
+    
+    def connecter_memoire_semantique(self, pool):
+        """Connecte la mémoire sémantique"""
+        self.memoire_semantique = MemoireSemantique(pool, self.nlp, self.comprehenseur)
+    
+    def _rechercher_wikipedia(self, question, futur=None):
+        """Recherche sur Wikipedia (avec cache disque)"""
+        try:
+            if futur is None:
+                return self.wikipedia.rechercher(question)
+            return futur.result(timeout=self.wikipedia.delai + 1)
+                
+        except FutureTimeoutError:
+            return None
+        except Exception as e:
+            if self.debug_mode:
+                print(f"❓ [DEBUG] Erreur Wikipedia: {e}")
+            return None
+    
+    def _rechercher_base_connaissances(self, question):
+        """Recherche dans la base de connaissances intégrée (terme le plus long de la question)"""
+        return self.automate_connaissances.plus_long(question)
     
     def _generer_reponse_adaptee(self, analyse):
-        """Génère une réponse adaptée à l'analyse linguistique"""
+        """Génère une réponse adaptée à l'analyse linguistique (AnalyseQuestion)"""
         intention = analyse['intention']
         concept = analyse['sujet_principal']['lemma'] if analyse['sujet_principal'] else "cela"
         
@@ -1187,50 +4148,112 @@ class OrchestrationLinguistique:
             "Je ne possède pas encore cette connaissance. Pourriez-vous me l'enseigner ?")
     
     def traiter_question(self, question):
-        """Traite la question avec compréhension linguistique"""
+        """Traite la question, mesure ses étapes et journalise l'échange dans chat_history"""
+        mesure = MesureRequete()
+        source, reponse = self._traiter_question(question, mesure)
+        mesure.terminer(source)
+        self.instrumentation.enregistrer(mesure)
+        if self.debug_mode:
+            print(f"⏱️ [DEBUG] {mesure.resume()}")
+        logger.debug(f"Requête: {mesure.resume()}")
+        
+        if self.memoire and question:
+            self.memoire.journaliser(question, reponse)
+        return reponse
+    
+    def _traiter_question(self, question, mesure):
+        """Traite la question avec compréhension linguistique ; retourne (source, réponse)"""
         if not question:
-            return "Veuillez poser une question."
+            return 'vide', "Veuillez poser une question."
+        
+        # 0. Correspondance exacte en mémoire, sans analyse linguistique
+        if self.memoire:
+            with mesure.etape('exacte'):
+                reponse_exacte = self.memoire.consulter_memoire_exacte(question)
+            if reponse_exacte:
+                if self.debug_mode:
+                    print(f"✅ [DEBUG] Trouvé en mémoire exacte")
+                return 'exacte', reponse_exacte
         
-        # Analyse linguistique complète
-        analyse = self.comprehenseur.analyser_structure_phrase(question)
+        # Requête Wikipédia lancée en parallèle des recherches locales si configuré
+        futur_wiki = self.wikipedia.rechercher_async(question) if WIKIPEDIA_ANTICIPATION else None
+        
+        # Analyse linguistique complète, partagée par toutes les étapes
+        with mesure.etape('analyse'):
+            analyse = self.comprehenseur.analyser_question(question)
         
         if not analyse:
-            return "Je n'ai pas bien compris votre question. Pouvez-vous reformuler ?"
+            return 'incomprise', "Je n'ai pas bien compris votre question. Pouvez-vous reformuler ?"
         
         if self.debug_mode:
             print(f"🔍 [DEBUG] Analyse: {analyse['intention']} - {analyse['sujet_principal']}")
         
-        # 1. Recherche sémantique avancée
         if self.memoire_semantique:
-            reponse_semantique = self.memoire_semantique.rechercher_semantiquement(question)
-            if reponse_semantique:
+            # 1. Recherche sémantique du concept de la question
+            with mesure.etape('semantique'):
+                resultats = self.memoire_semantique.rechercher_semantiquement_lot([analyse])
+            
+            # 2. En cas d'échec seulement : variations analysées en un seul lot,
+            # tous leurs concepts résolus en un seul aller-retour
+            if not resultats:
+                with mesure.etape('variations'):
+                    variations = self.comprehenseur.generer_variations_semantiques(question, analyse)
+                    variations = [variation for variation in variations if variation != question.lower()]
+                    candidats = [analyse_variation for analyse_variation in self.comprehenseur.analyser_questions(variations)
+                                 if analyse_variation.concept != analyse.concept]
+                if candidats:
+                    with mesure.etape('semantique'):
+                        resultats = self.memoire_semantique.rechercher_semantiquement_lot(candidats)
+            if resultats:
+                meilleur = resultats[0]
+                source = 'semantique' if meilleur['concept'] == analyse.concept else 'variation'
+                if self.debug_mode:
+                    if source == 'semantique':
+                        print(f"✅ [DEBUG] Trouvé par sémantique")
+                    else:
+                        print(f"✅ [DEBUG] Trouvé par variation: {meilleur['phrase']}")
+                return source, meilleur['reponse']
+        
+        # 2b. Reformulation d'une question apprise (index vectoriel)
+        if self.memoire:
+            with mesure.etape('vectorielle'):
+                reponse_vectorielle = self.memoire.consulter_memoire_vectorielle(question)
+            if reponse_vectorielle:
                 if self.debug_mode:
-                    print(f"✅ [DEBUG] Trouvé par sémantique")
-                return reponse_semantique
-        
-        # 2. Recherche par variations sémantiques
-        variations = self.comprehenseur.generer_variations_semantiques(question)
-        for variation in variations:
-            reponse_variation = self.memoire_semantique.rechercher_semantiquement(variation)
-            if reponse_variation:
+                    print(f"🧭 [DEBUG] Trouvé par similarité vectorielle")
+                return 'vectorielle', reponse_vectorielle
+            
+            # 2c. Connaissance dont la question ou la réponse contient les mots de la question (BM25)
+            with mesure.etape('plein_texte'):
+                reponse_plein_texte = self.memoire.consulter_memoire_plein_texte(question)
+            if reponse_plein_texte:
                 if self.debug_mode:
-                    print(f"✅ [DEBUG] Trouvé par variation: {variation}")
-                return reponse_variation
+                    print(f"🔎 [DEBUG] Trouvé par recherche plein texte")
+                return 'plein_texte', reponse_plein_texte
         
         # 3. Recherche Wikipedia
-        if reponse_wiki := self._rechercher_wikipedia(question):
+        with mesure.etape('wikipedia'):
+            reponse_wiki = self._rechercher_wikipedia(question, futur_wiki)
+        if reponse_wiki:
             if self.debug_mode:
                 print(f"🌐 [DEBUG] Trouvé sur Wikipedia")
-            return reponse_wiki
+            return 'wikipedia', reponse_wiki
         
         # 4. Base de connaissances interne
-        if reponse_base := self._rechercher_base_connaissances(question):
+        with mesure.etape('base_interne'):
+            reponse_base = self._rechercher_base_connaissances(question)
+        if reponse_base:
             if self.debug_mode:
                 print(f"📚 [DEBUG] Trouvé en base interne")
-            return reponse_base
+            return 'base_interne', reponse_base
         
         # 5. Réponse adaptée au type de phrase
-        return self._generer_reponse_adaptee(analyse)
+        with mesure.etape('repli'):
+            return 'repli', self._generer_reponse_adaptee(analyse)
+    
+    def fermer(self):
+        """Libère les ressources (threads et cache Wikipédia)"""
+        self.wikipedia.fermer()
     
     def toggle_debug(self):
         """Active/désactive le mode debug"""
@@ -1243,12 +4266,99 @@ class OrchestrationLinguistique:
 # 11. INITIALISATION DES COMPOSANTS
 # ---------------------------------------------------------
 
-def initialiser_spacy():
-    """Initialise spaCy"""
+# Composants exclus au chargement selon le profil. L'analyse lit lemmes,
+# catégories, dépendances, morphologie et mots vides : la NER ne sert pas.
+PROFILS_SPACY = {
+    'complet': [],
+    'standard': ['ner'],
+    'leger': None,      # pipeline vide : tokeniseur + lemmatiseur par table
+}
+
+def charger_spacy(profil=SPACY_PROFIL, nom_modele=MODELE_SPACY):
+    """Charge le pipeline spaCy du profil demandé"""
+    import spacy
+    
+    if profil not in PROFILS_SPACY:
+        raise ValueError(f"Profil spaCy inconnu: {profil} (profils: {', '.join(PROFILS_SPACY)})")
+    
+    if PROFILS_SPACY[profil] is None:
+        nlp = spacy.blank(nom_modele.split('_')[0])
+        try:
+            nlp.add_pipe('lemmatizer', config={'mode': 'lookup'})
+            nlp.initialize()
+        except Exception as e:
+            # Tables de lemmes absentes (paquet spacy-lookups-data) : tokeniseur seul
+            logger.warning(f"Lemmatiseur par table indisponible, tokeniseur seul: {e}")
+            nlp = spacy.blank(nom_modele.split('_')[0])
+        return nlp
+    
+    return spacy.load(nom_modele, exclude=PROFILS_SPACY[profil])
+
+class ModeleSpacyParesseux:
+    """Tient lieu de pipeline spaCy et ne le charge qu'au premier usage.
+    
+    Les questions résolues par correspondance exacte n'ont pas besoin
+    d'analyse : tant qu'aucune analyse n'est demandée, le modèle (et son
+    parser) n'est ni chargé en mémoire ni exécuté. Un échec de chargement
+    est retenu et n'est pas retenté : `disponible` devient faux et
+    ComprehenseurLinguistique se comporte comme sans spaCy (nlp=None).
+    """
+    
+    def __init__(self, profil=SPACY_PROFIL, nom_modele=MODELE_SPACY):
+        self.profil = profil
+        self.nom_modele = nom_modele
+        self._nlp = None
+        self._erreur = None
+        self._verrou = threading.Lock()
+    
+    @property
+    def charge(self):
+        return self._nlp is not None
+    
+    @property
+    def disponible(self):
+        """Charge le modèle si besoin ; faux si son chargement a échoué"""
+        try:
+            self.modele
+        except Exception:
+            return False
+        return True
+    
+    @property
+    def modele(self):
+        if self._nlp is None:
+            with self._verrou:
+                if self._erreur is not None:
+                    raise self._erreur
+                if self._nlp is None:
+                    debut = time.perf_counter()
+                    try:
+                        self._nlp = charger_spacy(self.profil, self.nom_modele)
+                    except Exception as e:
+                        self._erreur = e
+                        logger.error(f"Erreur chargement spaCy à la demande: {e}")
+                        raise
+                    logger.info(f"spaCy chargé à la demande (profil {self.profil}, "
+                                f"{time.perf_counter() - debut:.2f}s)")
+        return self._nlp
+    
+    def __call__(self, texte, **kwargs):
+        return self.modele(texte, **kwargs)
+    
+    def pipe(self, textes, **kwargs):
+        return self.modele.pipe(textes, **kwargs)
+    
+    def __getattr__(self, nom):
+        return getattr(self.modele, nom)
+
+def initialiser_spacy(profil=SPACY_PROFIL, paresseux=False):
+    """Initialise spaCy (ou un chargeur différé si `paresseux`)"""
+    if paresseux:
+        logger.info(f"spaCy sera chargé au premier besoin (profil {profil})")
+        return ModeleSpacyParesseux(profil)
     try:
-        import spacy
-        nlp = spacy.load("fr_core_news_sm")
-        logger.info("spaCy initialisé avec succès")
+        nlp = charger_spacy(profil)
+        logger.info(f"spaCy initialisé avec succès (profil {profil})")
         return nlp
     except Exception as e:
         logger.error(f"Erreur initialisation spaCy: {e}")
@@ -1258,17 +4368,20 @@ def initialiser_alira():
     """Initialise ALIRA avec compréhension linguistique"""
     logger.info("🏛️ Initialisation d'ALIRA avec compréhension linguistique...")
     
-    nlp = initialiser_spacy()
+    nlp = initialiser_spacy(paresseux=SPACY_PARESSEUX)
+    
+    # Un seul compréhenseur (et donc un seul cache d'analyses) partagé
+    comprehenseur = ComprehenseurLinguistique(nlp)
     
     # Initialisation des composants
-    couche_memoire = CoucheMemoireMySQL(nlp)
+    couche_memoire = CoucheMemoireMySQL(nlp, comprehenseur)
     couche_validation = CoucheValidationStricte(nlp)
     couche_modeles = CoucheTemplatesStables(nlp)
     couche_apprentissage = CoucheApprentissageAutomatique(couche_memoire)
     
     # Orchestration linguistique
-    orchestration = OrchestrationLinguistique(nlp)
-    orchestration.connecter_memoire_semantique(couche_memoire.connection)
+    orchestration = OrchestrationLinguistique(nlp, comprehenseur)
+    orchestration.connecter_memoire(couche_memoire)
     
     logger.info("✅ ALIRA initialisée avec compréhension linguistique")
     
@@ -1278,6 +4391,7 @@ def initialiser_alira():
         'validation': couche_validation,
         'modeles': couche_modeles,
         'apprentissage': couche_apprentissage,
+        'comprehenseur': comprehenseur,
         'nlp': nlp
     }
 
@@ -1296,16 +4410,17 @@ def main():
     print("🌍 Compréhension réelle des phrases")
     print("=" * 85)
     
-    if not verifier_et_installer_dependances():
+    if not verifier_et_installer_dependances() or not verifier_modele_spacy():
         print("❌ Impossible d'installer les dépendances nécessaires")
         return
     
     print("\n🔧 Configuration du sanctuaire de données...")
-    if not MySQLConfig.setup_database():
+    stockage = obtenir_stockage()
+    if not stockage.setup_database():
         print("❌ Échec de la configuration du sanctuaire")
         return
     
-    if not MySQLConfig.test_connection():
+    if not stockage.test_connection():
         print("❌ Impossible de se connecter au sanctuaire")
         return
     
@@ -1324,7 +4439,7 @@ def main():
     print("4. 📚 Base connaissances contextuelle")
     print("5. 🎯 Réponse adaptée au type de question")
     print("🔍 Debug: active/désactive avec 'debug'")
-    print("📖 Commandes: apprends que, corrige, oublie, statistiques, aide")
+    print("📖 Commandes: apprends que, corrige, oublie, statistiques, metriques, aide")
     print("=" * 85)
     print("💡 Posez vos questions naturellement :")
     print("   \"Qu'est-ce qu'un ordinateur ?\"")
@@ -1347,6 +4462,57 @@ def main():
                 nb_connaissances = alira['memoire'].get_nombre_connaissances()
                 niveau = alira['memoire'].get_niveau_autonomie()
                 print(f"🏛️ ALIRA: 📊 Connaissances: {nb_connaissances} | Niveau: {niveau}")
+                cache = alira['comprehenseur'].cache.statistiques()
+                print(f"   🧠 Cache analyses: {cache['taille']}/{cache['taille_max']} | "
+                      f"hits: {cache['hits']} | misses: {cache['misses']} | évictions: {cache['evictions']}")
+                compteurs = alira['memoire'].compteurs.statistiques()
+                print(f"   ✍️ Compteurs différés: {compteurs['en_attente']} en attente | "
+                      f"écritures: {compteurs['ecritures']} | lot moyen: {compteurs['taille_lot_moyenne']:.1f} "
+                      f"(max {compteurs['taille_lot_max']}) | perte max sur crash: {compteurs['fenetre_perte']:g}s")
+                if alira['memoire'].historique is not None:
+                    historique = alira['memoire'].historique.statistiques()
+                    print(f"   💬 Historique: {historique['ecrits']} échanges écrits | "
+                          f"{historique['en_attente']}/{historique['capacite']} en file | "
+                          f"lot moyen: {historique['taille_lot_moyenne']:.1f} | abandonnés: {historique['abandonnes']}")
+                instrumentation = alira['orchestration'].instrumentation
+                if instrumentation.sources:
+                    total = sum(instrumentation.sources.values())
+                    print("   ⏱️ Étapes (ms)      nombre   moyenne    p50≈    p95≈")
+                    for etape, mesure in instrumentation.resume().items():
+                        print(f"      {etape:<14}{mesure['nombre']:>8}{mesure['moyenne_ms']:>10.2f}"
+                              f"{mesure['p50_ms']:>8.2f}{mesure['p95_ms']:>8.2f}")
+                    print("   🎯 Sources: " + " | ".join(
+                        f"{source}: {nombre} ({nombre / total:.0%})"
+                        for source, nombre in sorted(instrumentation.sources.items(), key=lambda s: -s[1])))
+                    allers_retours = instrumentation.allers_retours
+                    print(f"   🔁 Allers-retours base par question: {allers_retours.somme / allers_retours.nombre:.1f} "
+                          f"en moyenne (p95≈ {allers_retours.quantile(0.95):g})")
+                if alira['memoire'].correcteur is not None:
+                    correcteur = alira['memoire'].correcteur.statistiques()
+                    print(f"   ✏️ Correcteur: {correcteur['mots']} mots | {correcteur['suppressions']} variantes "
+                          f"indexées | corrections: {correcteur['corrections']}")
+                if alira['memoire'].index_plein_texte is not None:
+                    plein_texte = alira['memoire'].index_plein_texte.statistiques()
+                    print(f"   🔎 Index plein texte: {plein_texte['documents']} connaissances | "
+                          f"{plein_texte['termes']} termes | {plein_texte['longueur_moyenne']:.0f} mots par document")
+                if alira['orchestration'].wikipedia.index_local is not None:
+                    wikipedia = alira['orchestration'].wikipedia.index_local.statistiques()
+                    print(f"   📖 Wikipédia hors ligne: {wikipedia['titres']} résumés | "
+                          f"{wikipedia['trouves']}/{wikipedia['recherches']} trouvés")
+                continue
+            
+            if entree.lower().split()[0] in ['metriques', 'métriques']:
+                # 'metriques' (Prometheus) ou 'metriques json', éventuellement suivi d'un fichier
+                arguments = entree.split()[1:]
+                format_json = bool(arguments) and arguments[0].lower() == 'json'
+                arguments = arguments[1:] if format_json else arguments
+                instrumentation = alira['orchestration'].instrumentation
+                texte = instrumentation.exporter_json() if format_json else instrumentation.exporter_prometheus()
+                if arguments:
+                    Path(arguments[0]).write_text(texte, encoding='utf-8')
+                    print(f"🏛️ ALIRA: 💾 Métriques écrites dans {arguments[0]}")
+                else:
+                    print(texte)
                 continue
             
             if entree.lower() in ['aide', 'help', '?']:
@@ -1355,6 +4521,7 @@ def main():
                 print("  • 'corrige [ancienne question] en [nouvelle réponse]' - Pour corriger")
                 print("  • 'oublie [question]' - Pour supprimer une connaissance")
                 print("  • 'statistiques' - Voir mon état actuel")
+                print("  • 'metriques [json] [fichier]' - Exporter les mesures (Prometheus ou JSON)")
                 print("  • 'debug' - Activer/désactiver le mode debug")
                 print("  • 'quitter' - Terminer notre conversation")
                 continue
@@ -1390,6 +4557,9 @@ def main():
             break
         except Exception as e:
             print(f"🏛️ ALIRA: ❌ Une erreur s'est produite: {e}")
+    
+    alira['orchestration'].fermer()
+    alira['memoire'].fermer()
 
 if __name__ == "__main__":
     try:
@@ -1397,7 +4567,8 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"❌ Erreur critique: {e}")
         print("💡 Essayez de réinstaller les dépendances:")
-        print("   pip install spacy mysql-connector-python python-dotenv requests torch transformers")
+        print("   pip install spacy python-dotenv requests numpy")
+        print("   pip install mysql-connector-python  # avec ALIRA_STOCKAGE=mysql")
         print("   python -m spacy download fr_core_news_sm")
     finally:
         print(f"\nMerci d'avoir utilisé {PROJECT_NAME} {VERSION} !")
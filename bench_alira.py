@@ -0,0 +1,891 @@
+#!/usr/bin/env python3
+"""
+Bancs d'essai d'ALIRA - Mesure les performances des composants
+Chaque scénario de démarrage tourne dans un interpréteur neuf (démarrage à froid)
+"""
+
+import re
+import sys
+import json
+import random
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+DOSSIER_ALIRA = Path(__file__).resolve().parent
+MODELE_SPACY = "fr_core_news_sm"
+
+# ---------------------------------------------------------
+# DÉMARRAGE À FROID
+# ---------------------------------------------------------
+
+# Démarrage d'avant : torch importé avec le module, sondage des dépendances
+# par import réel (torch et transformers compris) et modèle spaCy chargé deux
+# fois (vérification puis initialisation). Les modules absents de
+# l'environnement sont ignorés, l'ancien code les aurait installés par pip.
+IMPORT_SI_PRESENT = """
+import importlib, importlib.util
+for nom in {modules!r}:
+    if importlib.util.find_spec(nom.split(".")[0]):
+        importlib.import_module(nom)
+"""
+
+DEMARRAGE_ANCIEN = [
+    ("import Alira", IMPORT_SI_PRESENT.format(modules=("torch",)) + "import Alira"),
+    ("dépendances", IMPORT_SI_PRESENT.format(
+        modules=("spacy", "mysql.connector", "dotenv", "requests", "torch", "transformers"))),
+    ("vérification modèle", f"import spacy\nspacy.load({MODELE_SPACY!r})"),
+    ("chargement modèle", f"import spacy\nnlp = spacy.load({MODELE_SPACY!r})"),
+]
+
+# Démarrage rapide : find_spec, imports paresseux, un seul chargement du modèle
+DEMARRAGE_RAPIDE = [
+    ("import Alira", "import Alira"),
+    ("dépendances", "assert Alira.verifier_et_installer_dependances()"),
+    ("vérification modèle", f"assert Alira.verifier_modele_spacy({MODELE_SPACY!r})"),
+    ("chargement modèle", "nlp = Alira.initialiser_spacy()\nassert nlp is not None"),
+]
+
+CODE_MESURE = """
+import json, sys, time
+sys.path.insert(0, {dossier!r})
+etapes = json.loads({etapes!r})
+resultats = {{}}
+espace = {{}}
+for nom, code in etapes:
+    debut = time.perf_counter()
+    try:
+        exec(code, espace)
+    except BaseException as e:
+        resultats[nom] = {{"erreur": f"{{type(e).__name__}}: {{e}}"}}
+        break
+    resultats[nom] = {{"secondes": time.perf_counter() - debut}}
+print(json.dumps(resultats))
+"""
+
+def mesurer_demarrage(etapes):
+    """Exécute les étapes dans un nouvel interpréteur et retourne leurs durées"""
+    code = CODE_MESURE.format(dossier=str(DOSSIER_ALIRA), etapes=json.dumps(etapes))
+    resultat = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                              text=True, cwd=DOSSIER_ALIRA)
+    if resultat.returncode != 0:
+        raise RuntimeError(resultat.stderr.strip().splitlines()[-1])
+    return json.loads(resultat.stdout.strip().splitlines()[-1])
+
+def bench_demarrage(repetitions=5):
+    """Compare le démarrage à froid ancien et rapide (médiane par étape)"""
+    rapport = {}
+    for nom_scenario, etapes in (("ancien", DEMARRAGE_ANCIEN), ("rapide", DEMARRAGE_RAPIDE)):
+        durees = {nom: [] for nom, _ in etapes}
+        erreurs = {}
+        for _ in range(repetitions):
+            for nom, mesure in mesurer_demarrage(etapes).items():
+                if "erreur" in mesure:
+                    erreurs[nom] = mesure["erreur"]
+                else:
+                    durees[nom].append(mesure["secondes"])
+
+        medianes = {nom: statistics.median(valeurs) for nom, valeurs in durees.items() if valeurs}
+        rapport[nom_scenario] = {
+            "etapes": medianes,
+            "total": sum(medianes.values()),
+            "erreurs": erreurs,
+        }
+    return rapport
+
+def afficher_demarrage(rapport):
+    """Affiche le comparatif des démarrages"""
+    noms = [nom for nom, _ in DEMARRAGE_RAPIDE]
+    print(f"{'Étape':<22}{'Ancien (s)':>12}{'Rapide (s)':>12}")
+    print("-" * 46)
+    for nom in noms:
+        valeurs = []
+        for scenario in ("ancien", "rapide"):
+            duree = rapport[scenario]["etapes"].get(nom)
+            valeurs.append(f"{duree:.3f}" if duree is not None else "—")
+        print(f"{nom:<22}{valeurs[0]:>12}{valeurs[1]:>12}")
+    print("-" * 46)
+    ancien, rapide = rapport["ancien"]["total"], rapport["rapide"]["total"]
+    print(f"{'Total':<22}{ancien:>12.3f}{rapide:>12.3f}")
+    if rapide > 0 and not rapport["ancien"]["erreurs"] and not rapport["rapide"]["erreurs"]:
+        print(f"⚡ Gain : x{ancien / rapide:.1f}")
+
+    for scenario in ("ancien", "rapide"):
+        for nom, erreur in rapport[scenario]["erreurs"].items():
+            print(f"⚠️ {scenario} / {nom} interrompu : {erreur}")
+
+# ---------------------------------------------------------
+# NORMALISATION DU TEXTE
+# ---------------------------------------------------------
+
+# Implémentations d'origine (une série de re.sub par règle), gardées comme référence
+
+def ancien_corriger_fautes_typo(phrase):
+    """Correction des fautes de frappe courantes"""
+    if not phrase:
+        return phrase
+        
+    corrections = {
+        'aprend': 'apprend', 'aprens': 'apprend', 'aprends': 'apprend',
+        'souven': 'souviens', 'souvenz': 'souviens',
+        'mémori': 'mémorise', 'memorise': 'mémorise',
+        'reten': 'retiens', 'retien': 'retiens',
+        'corect': 'corrige', 'corection': 'correction',
+        'change': 'corrige', 'modifi': 'modifie',
+        'oubli': 'oublie', 'oublie': 'oublie',
+        'supri': 'supprime', 'supression': 'suppression',
+        'eface': 'efface', 'effas': 'efface',
+        'c\'ast': 'c\'est', 'c est': 'c\'est', 'cest': 'c\'est',
+        'paris': 'Paris', 'france': 'France',
+        'capital': 'capitale', 'capitale': 'capitale',
+        'ville': 'ville', 'pay': 'pays',
+        'veut': 'veux', 'discuté': 'discuter', 'voyagé': 'voyager',
+        'trouv': 'trouve', 'ce trouve': 'se trouve'
+    }
+    
+    phrase_corrigee = phrase
+    for faute, correction in corrections.items():
+        phrase_corrigee = re.sub(r'\b' + faute + r'\b', correction, phrase_corrigee, flags=re.IGNORECASE)
+    
+    return phrase_corrigee
+
+def ancien_normaliser_question(question):
+    """Normalise les questions pour meilleure reconnaissance"""
+    if not question:
+        return question
+        
+    normalisations = {
+        r'c\'est quoi\s+': 'qu\'est-ce que ',
+        r'que veut dire\s+': 'définition ',
+        r'quel est\s+': 'définition ',
+        r'quelle est\s+': 'définition ',
+        r'quels sont\s+': 'définition ',
+        r'explique\s+': 'définition ',
+        r'définis\s+': 'définition ',
+        r'dis moi\s+': 'définition ',
+        r'connais tu\s+': 'définition ',
+        r'sais tu\s+': 'définition ',
+        r'\bville de\b': '',
+        r'\ble\b': '', r'\bla\b': '', r'\bles\b': '', r'\bdes\b': '',
+        r'\bdu\b': '', r'\bde\b': '', r'\bun\b': '', r'\bune\b': ''
+    }
+    
+    question_normalisee = question.lower()
+    for pattern, remplacement in normalisations.items():
+        question_normalisee = re.sub(pattern, remplacement, question_normalisee, flags=re.IGNORECASE)
+    
+    question_normalisee = re.sub(r'\s+', ' ', question_normalisee).strip()
+    return question_normalisee
+
+def ancien_nettoyer_question_pour_recherche(question):
+    """Nettoie une question en supprimant les formules de politesse pour la recherche"""
+    if not question:
+        return question
+    
+    motifs_a_supprimer = [
+        r'^bonjour\s*,?\s*', r'^salut\s*,?\s*', r'^hello\s*,?\s*', r'^hi\s*,?\s*',
+        r'^coucou\s*,?\s*', r'^merci\s*,?\s*', r'^thank you\s*,?\s*', r'^thanks\s*,?\s*',
+        r'\s*s\'il vous plaît\s*', r'\s*please\s*', r'^dis moi\s*,?\s*', r'^tell me\s*,?\s*'
+    ]
+    
+    question_nettoyee = question
+    for motif in motifs_a_supprimer:
+        question_nettoyee = re.sub(motif, '', question_nettoyee, flags=re.IGNORECASE)
+    
+    question_nettoyee = re.sub(r'\s+', ' ', question_nettoyee).strip()
+    return question_nettoyee
+
+def ancien_preparer_question_pour_modele(question):
+    """Nettoie et formate la question pour le modèle"""
+    if not question:
+        return ""
+    
+    # Supprimer les formules de politesse
+    question = ancien_nettoyer_question_pour_recherche(question)
+    
+    # Corriger les fautes de frappe courantes
+    question = ancien_corriger_fautes_typo(question)
+    
+    # Normaliser la question
+    question = ancien_normaliser_question(question)
+    
+    return question
+
+QUESTIONS_TYPES = [
+    "Bonjour, c'est quoi la capitale de la France ?",
+    "Salut dis moi qui est Einstein",
+    "Où ce trouv Paris s'il vous plaît ?",
+    "Explique-moi l'intelligence artificielle",
+    "Qu'est-ce qu'un ordinateur ?",
+    "quel est le plus grand pays du monde",
+    "Merci, tu peux m'aprendre la photosynthèse ?",
+    "Que veut dire philosophie ?",
+]
+
+def chronometrer(fonction, textes, repetitions):
+    """Durée moyenne d'un appel en microsecondes"""
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        for texte in textes:
+            fonction(texte)
+    return (time.perf_counter() - debut) / (repetitions * len(textes)) * 1e6
+
+def bench_normalisation(repetitions=2000):
+    """Compare les fonctions d'origine au moteur de réécriture en une passe"""
+    import Alira
+    
+    paires = [
+        ("corriger_fautes_typo", ancien_corriger_fautes_typo, Alira.corriger_fautes_typo),
+        ("normaliser_question", ancien_normaliser_question, Alira.normaliser_question),
+        ("nettoyer_question_pour_recherche", ancien_nettoyer_question_pour_recherche,
+         Alira.nettoyer_question_pour_recherche),
+        ("preparer_question_pour_modele", ancien_preparer_question_pour_modele,
+         Alira.preparer_question_pour_modele),
+    ]
+    
+    rapport = {}
+    for nom, ancienne, nouvelle in paires:
+        rapport[nom] = {
+            "ancien_us": chronometrer(ancienne, QUESTIONS_TYPES, repetitions),
+            "moteur_us": chronometrer(nouvelle, QUESTIONS_TYPES, repetitions),
+            "differences": [(texte, ancienne(texte), nouvelle(texte)) for texte in QUESTIONS_TYPES
+                            if ancienne(texte) != nouvelle(texte)],
+        }
+    return rapport
+
+def afficher_normalisation(rapport):
+    """Affiche le comparatif de normalisation"""
+    print(f"{'Fonction':<34}{'Ancien (µs)':>13}{'Moteur (µs)':>13}{'Gain':>8}")
+    print("-" * 68)
+    for nom, mesure in rapport.items():
+        gain = mesure["ancien_us"] / mesure["moteur_us"]
+        print(f"{nom:<34}{mesure['ancien_us']:>13.1f}{mesure['moteur_us']:>13.1f}{'x' + format(gain, '.1f'):>8}")
+    
+    for nom, mesure in rapport.items():
+        for texte, ancien, nouveau in mesure["differences"]:
+            print(f"≠ {nom}({texte!r}) : {ancien!r} -> {nouveau!r}")
+
+# ---------------------------------------------------------
+# RECHERCHE DE MOTS-CLÉS
+# ---------------------------------------------------------
+
+def bench_mots_cles(tailles=(25, 1000, 10000, 50000), repetitions=200):
+    """Compare le parcours linéaire `mot in question` à l'automate selon la taille du dictionnaire"""
+    import random
+    import Alira
+    
+    generateur = random.Random(42)
+    lettres = "abcdefghijklmnopqrstuvwxyzéè"
+    rapport = {}
+    for taille in tailles:
+        termes = {}
+        while len(termes) < taille:
+            mot = ''.join(generateur.choice(lettres) for _ in range(generateur.randint(4, 14)))
+            termes[mot] = mot
+        
+        automate = Alira.AutomateMotsCles(termes)
+        
+        def parcours_lineaire(question):
+            question_lower = question.lower()
+            for mot, valeur in termes.items():
+                if mot in question_lower:
+                    return valeur
+            return None
+        
+        rapport[taille] = {
+            "lineaire_us": chronometrer(parcours_lineaire, QUESTIONS_TYPES, repetitions),
+            "automate_us": chronometrer(automate.plus_long, QUESTIONS_TYPES, repetitions),
+        }
+    return rapport
+
+def afficher_mots_cles(rapport):
+    """Affiche le comparatif de recherche de mots-clés"""
+    print(f"{'Termes':>8}{'Linéaire (µs)':>16}{'Automate (µs)':>16}")
+    print("-" * 40)
+    for taille, mesure in rapport.items():
+        print(f"{taille:>8}{mesure['lineaire_us']:>16.1f}{mesure['automate_us']:>16.1f}")
+
+# ---------------------------------------------------------
+# ANALYSE EN MASSE
+# ---------------------------------------------------------
+
+def phrases_synthetiques(nombre):
+    """Questions distinctes construites à partir de gabarits"""
+    gabarits = ["Qu'est-ce que {} ?", "Comment fonctionne {} ?", "Pourquoi {} est important ?",
+                "Explique-moi {}", "Où trouve-t-on {} ?", "Qui a inventé {} ?"]
+    sujets = ["le moteur", "la photosynthèse", "un ordinateur", "la démocratie", "internet",
+              "la mythologie grecque", "un volcan", "la musique", "une étoile", "le cinéma"]
+    return [gabarits[i % len(gabarits)].format(f"{sujets[(i // len(gabarits)) % len(sujets)]} {i}")
+            for i in range(nombre)]
+
+def bench_analyse(nombre=2000, processus=(1, 2, 4)):
+    """Compare l'analyse phrase par phrase à analyser_lot (nlp.pipe) selon le nombre de processus"""
+    import Alira
+    
+    nlp = Alira.initialiser_spacy()
+    if nlp is None:
+        raise RuntimeError("modèle spaCy indisponible")
+    comprehenseur = Alira.ComprehenseurLinguistique(nlp, Alira.CacheAnalysesLRU(0))
+    phrases = phrases_synthetiques(nombre)
+    
+    rapport = {}
+    debut = time.perf_counter()
+    for phrase in phrases:
+        comprehenseur.analyser_structure_phrase(phrase)
+    rapport["phrase par phrase"] = time.perf_counter() - debut
+    
+    for n_process in processus:
+        debut = time.perf_counter()
+        for _ in comprehenseur.analyser_lot(phrases, n_process=n_process):
+            pass
+        rapport[f"analyser_lot ({n_process} processus)"] = time.perf_counter() - debut
+    return rapport
+
+def afficher_analyse(rapport, nombre):
+    """Affiche le débit d'analyse"""
+    print(f"{'Méthode':<30}{'Durée (s)':>11}{'Phrases/s':>12}")
+    print("-" * 53)
+    for methode, duree in rapport.items():
+        print(f"{methode:<30}{duree:>11.2f}{nombre / duree:>12.0f}")
+
+# ---------------------------------------------------------
+# PROFILS SPACY
+# ---------------------------------------------------------
+
+CODE_PROFIL = """
+import json, resource, statistics, sys, time
+sys.path.insert(0, {dossier!r})
+import Alira
+
+def rss_mo():
+    with open('/proc/self/status') as statut:
+        for ligne in statut:
+            if ligne.startswith('VmRSS:'):
+                return int(ligne.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+rss_avant = rss_mo()
+debut = time.perf_counter()
+nlp = Alira.charger_spacy({profil!r})
+chargement = time.perf_counter() - debut
+comprehenseur = Alira.ComprehenseurLinguistique(nlp, Alira.CacheAnalysesLRU(0))
+
+questions = json.loads({questions!r})
+for question in questions:
+    comprehenseur.analyser_structure_phrase(question)
+durees = []
+for _ in range({repetitions}):
+    for question in questions:
+        debut = time.perf_counter()
+        comprehenseur.analyser_structure_phrase(question)
+        durees.append(time.perf_counter() - debut)
+durees.sort()
+print(json.dumps({{
+    "composants": nlp.pipe_names,
+    "chargement_s": chargement,
+    "rss_mo": rss_mo() - rss_avant,
+    "p50_ms": statistics.median(durees) * 1000,
+    "p95_ms": durees[int(len(durees) * 0.95) - 1] * 1000,
+}}))
+"""
+
+def bench_profils(repetitions=20):
+    """Temps de chargement, mémoire (RSS) et latence d'analyse de chaque profil spaCy"""
+    import Alira
+    
+    rapport = {}
+    for profil in Alira.PROFILS_SPACY:
+        code = CODE_PROFIL.format(dossier=str(DOSSIER_ALIRA), profil=profil,
+                                  questions=json.dumps(QUESTIONS_TYPES), repetitions=repetitions)
+        resultat = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                                  text=True, cwd=DOSSIER_ALIRA)
+        if resultat.returncode != 0:
+            rapport[profil] = {"erreur": resultat.stderr.strip().splitlines()[-1]}
+        else:
+            rapport[profil] = json.loads(resultat.stdout.strip().splitlines()[-1])
+    return rapport
+
+def afficher_profils(rapport):
+    """Affiche le comparatif des profils"""
+    print(f"{'Profil':<10}{'Chargement (s)':>16}{'RSS (Mo)':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}  Composants")
+    print("-" * 90)
+    for profil, mesure in rapport.items():
+        if "erreur" in mesure:
+            print(f"{profil:<10}  ⚠️ {mesure['erreur']}")
+            continue
+        print(f"{profil:<10}{mesure['chargement_s']:>16.2f}{mesure['rss_mo']:>10.0f}"
+              f"{mesure['p50_ms']:>10.2f}{mesure['p95_ms']:>10.2f}  {', '.join(mesure['composants']) or '(tokeniseur)'}")
+
+# ---------------------------------------------------------
+# INDEX VECTORIEL
+# ---------------------------------------------------------
+
+def bench_index_vectoriel(tailles=(1000, 10000, 50000), requetes=50):
+    """Construction, mémoire et latence top-k de l'index vectoriel, comparé à un parcours ligne à ligne"""
+    import Alira
+    
+    questions = [Alira.normaliser_question(phrase) for phrase in phrases_synthetiques(max(tailles))]
+    recherches = [Alira.normaliser_question(question) for question in QUESTIONS_TYPES]
+    rapport = {}
+    for taille in tailles:
+        index = Alira.IndexVectoriel(chemin=None)
+        debut = time.perf_counter()
+        index.ajouter_lot(enumerate(questions[:taille], 1))
+        construction = time.perf_counter() - debut
+        index.rechercher(recherches[0])
+        
+        durees = []
+        for i in range(requetes):
+            debut = time.perf_counter()
+            index.rechercher(recherches[i % len(recherches)], k=5)
+            durees.append(time.perf_counter() - debut)
+        
+        # Référence : un produit scalaire par ligne, comme une boucle Python sur la table
+        n, matrice, _, poids, normes = index._preparer()
+        requete = index.vectoriser(recherches[0]) * poids
+        debut = time.perf_counter()
+        scores = [float(matrice[i] @ (requete * poids)) / normes[i] for i in range(n)]
+        sorted(scores, reverse=True)[:5]
+        boucle = time.perf_counter() - debut
+        
+        rapport[taille] = {
+            "construction_s": construction,
+            "memoire_mo": matrice.nbytes / 1e6,
+            "p50_ms": statistics.median(durees) * 1000,
+            "boucle_ms": boucle * 1000,
+        }
+    return rapport
+
+def afficher_index_vectoriel(rapport):
+    """Affiche construction, mémoire et latences par taille d'index"""
+    print(f"{'Questions':>10}{'Construction (s)':>18}{'Matrice (Mo)':>14}{'Top-5 (ms)':>12}{'Boucle (ms)':>13}{'Gain':>8}")
+    print("-" * 75)
+    for taille, mesure in rapport.items():
+        print(f"{taille:>10}{mesure['construction_s']:>18.2f}{mesure['memoire_mo']:>14.1f}"
+              f"{mesure['p50_ms']:>12.2f}{mesure['boucle_ms']:>13.1f}{mesure['boucle_ms'] / mesure['p50_ms']:>7.0f}x")
+
+# ---------------------------------------------------------
+# CORRECTION ORTHOGRAPHIQUE
+# ---------------------------------------------------------
+
+def vocabulaire_synthetique(nombre, graine=0):
+    """Mots pseudo-aléatoires distincts de 4 à 12 lettres"""
+    generateur = random.Random(graine)
+    mots = set()
+    while len(mots) < nombre:
+        mots.add(''.join(generateur.choice("abcdefghijklmnopqrstuvwxyzéè") for _ in range(generateur.randint(4, 12))))
+    return sorted(mots)
+
+def bench_correction(tailles=(1000, 10000, 50000), requetes=500):
+    """Correction SymSpell comparée au calcul de distance sur tout le vocabulaire"""
+    import Alira
+    
+    rapport = {}
+    for taille in tailles:
+        mots = vocabulaire_synthetique(taille)
+        correcteur = Alira.CorrecteurSymSpell()
+        debut = time.perf_counter()
+        for mot in mots:
+            correcteur.ajouter_mot(mot)
+        construction = time.perf_counter() - debut
+        
+        attendus = mots[::max(1, len(mots) // requetes)][:requetes]
+        fautes = [mot[0] + mot[2] + mot[1] + mot[3:] for mot in attendus]   # transposition de deux lettres
+        debut = time.perf_counter()
+        trouves = sum(correcteur.corriger_mot(faute) == mot for faute, mot in zip(fautes, attendus))
+        symspell = (time.perf_counter() - debut) / len(fautes)
+        
+        echantillon = fautes[:20]
+        debut = time.perf_counter()
+        for faute in echantillon:
+            min(mots, key=lambda mot: Alira.distance_edition(faute, mot, 2))
+        lineaire = (time.perf_counter() - debut) / len(echantillon)
+        
+        rapport[taille] = {
+            "construction_s": construction,
+            "variantes": correcteur.statistiques()["suppressions"],
+            "symspell_us": symspell * 1e6,
+            "lineaire_us": lineaire * 1e6,
+            "corriges": trouves / len(fautes),
+        }
+    return rapport
+
+def afficher_correction(rapport):
+    """Affiche construction et latence de correction par taille de vocabulaire"""
+    print(f"{'Mots':>8}{'Construction (s)':>18}{'Variantes':>11}{'SymSpell (µs)':>15}{'Linéaire (µs)':>15}{'Gain':>8}{'Corrigés':>10}")
+    print("-" * 85)
+    for taille, mesure in rapport.items():
+        print(f"{taille:>8}{mesure['construction_s']:>18.2f}{mesure['variantes']:>11}{mesure['symspell_us']:>15.1f}"
+              f"{mesure['lineaire_us']:>15.0f}{mesure['lineaire_us'] / mesure['symspell_us']:>7.0f}x{mesure['corriges']:>10.0%}")
+
+# ---------------------------------------------------------
+# INDEX PLEIN TEXTE (BM25)
+# ---------------------------------------------------------
+
+def documents_synthetiques(nombre, graine=0):
+    """(id, question, réponse) : réponses de 30 mots tirés selon une loi de Zipf"""
+    generateur = random.Random(graine)
+    vocabulaire = vocabulaire_synthetique(20000, graine)
+    poids = [1 / rang for rang in range(1, len(vocabulaire) + 1)]
+    questions = phrases_synthetiques(nombre)
+    return [(i, question.lower(), " ".join(generateur.choices(vocabulaire, poids, k=30)))
+            for i, question in enumerate(questions, 1)]
+
+def bench_plein_texte(tailles=(1000, 10000, 50000), requetes=500):
+    """Construction et latence de l'index BM25, comparé à un parcours de toutes les connaissances"""
+    import Alira
+    
+    documents = documents_synthetiques(max(tailles))
+    generateur = random.Random(1)
+    rapport = {}
+    for taille in tailles:
+        index = Alira.IndexPleinTexte()
+        debut = time.perf_counter()
+        index.ajouter_lot(documents[:taille])
+        construction = time.perf_counter() - debut
+        
+        # Moitié de questions reprenant des mots d'une réponse, moitié sur un sujet inconnu
+        recherches = []
+        for i in range(requetes):
+            _, _, reponse = documents[generateur.randrange(taille)]
+            mots = generateur.sample(reponse.split(), 4)
+            recherches.append(" ".join(mots) if i % 2 else f"zorglub {i} {mots[0]}")
+        
+        durees, trouvees = [], 0
+        for recherche in recherches:
+            debut = time.perf_counter()
+            trouvees += bool(index.rechercher(recherche))
+            durees.append(time.perf_counter() - debut)
+        durees.sort()
+        
+        # Référence : tous les documents évalués, comme un LIKE sur la table
+        termes = set(Alira.IndexPleinTexte.termes(recherches[1]))
+        debut = time.perf_counter()
+        max((len(termes & set(Alira.IndexPleinTexte.termes(question + " " + reponse))), i)
+            for i, question, reponse in documents[:taille])
+        parcours = time.perf_counter() - debut
+        
+        rapport[taille] = {
+            "construction_s": construction,
+            "termes": index.statistiques()["termes"],
+            "p50_ms": statistics.median(durees) * 1000,
+            "p99_ms": durees[int(0.99 * (len(durees) - 1))] * 1000,
+            "trouvees": trouvees / len(recherches),
+            "parcours_ms": parcours * 1000,
+        }
+    return rapport
+
+def afficher_plein_texte(rapport):
+    """Affiche construction, latences et parcours de référence par taille d'index"""
+    print(f"{'Connaissances':>14}{'Construction (s)':>18}{'Termes':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'Trouvées':>10}{'Parcours (ms)':>15}")
+    print("-" * 86)
+    for taille, mesure in rapport.items():
+        print(f"{taille:>14}{mesure['construction_s']:>18.2f}{mesure['termes']:>9}{mesure['p50_ms']:>10.3f}"
+              f"{mesure['p99_ms']:>10.3f}{mesure['trouvees']:>10.0%}{mesure['parcours_ms']:>15.1f}")
+
+# ---------------------------------------------------------
+# PIPELINE DE QUESTIONS (BASE LOCALE ET WIKIPÉDIA SIMULÉ)
+# ---------------------------------------------------------
+
+# Concepts connus : (concept, réponse). Chaque concept est aussi une clé de
+# chatbot_memory, ce que la recherche sémantique exige.
+CONCEPTS_PIPELINE = [
+    ("ordinateur", "une machine électronique qui traite des données"),
+    ("volcan", "une montagne formée par l'accumulation de matériaux issus du magma"),
+    ("démocratie", "un régime politique où le pouvoir est exercé par le peuple"),
+    ("photosynthèse", "la synthèse de matière organique par les plantes grâce à la lumière"),
+    ("étoile", "un astre produisant de la lumière par fusion nucléaire"),
+    ("musique", "l'art de combiner les sons"),
+    ("cinéma", "l'art de réaliser des films"),
+    ("moteur", "un dispositif qui transforme une énergie en travail mécanique"),
+    ("bibliothèque", "un lieu où sont conservés des livres"),
+    ("océan", "une vaste étendue d'eau salée"),
+    ("planète", "un corps céleste en orbite autour d'une étoile"),
+    ("philosophie", "l'étude des questions fondamentales sur l'existence et la connaissance"),
+]
+
+GABARITS_EXACTS = ["Qu'est-ce qu'un sujet {} ?", "Comment fonctionne le système {} ?",
+                   "Où se trouve le lieu {} ?", "Qui a inventé la machine {} ?"]
+# Formulations dont le concept extrait est bien le sujet, sans être une clé exacte
+GABARITS_SEMANTIQUES = ["Parle-moi de la {0}, s'il te plaît", "Qu'est-ce que la {0} exactement ?"]
+
+class WikipediaSimule:
+    """Serveur HTTP local imitant /api/rest_v1/page/summary/ (404 sauf pages connues), avec latence"""
+    
+    def __init__(self, latence_ms=20, pages=None):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import unquote
+        import threading
+        
+        pages = {titre.lower(): extrait for titre, extrait in (pages or {}).items()}
+        
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(latence_ms / 1000)
+                titre = unquote(self.path.rsplit('/', 1)[-1]).lower()
+                extrait = pages.get(titre)
+                corps = json.dumps({"extract": extrait} if extrait else {"title": "Not found"}).encode()
+                self.send_response(200 if extrait else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.serveur = ThreadingHTTPServer(("127.0.0.1", 0), Gestionnaire)
+        self.url = f"http://127.0.0.1:{self.serveur.server_address[1]}"
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+    
+    def fermer(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+def peupler_base(pool, connaissances, graine):
+    """Connaissances exactes numérotées, concepts sémantiques et statistiques"""
+    import Alira
+    
+    generateur = random.Random(graine)
+    exactes = []
+    for i in range(connaissances):
+        question = generateur.choice(GABARITS_EXACTS).format(f"{generateur.choice(CONCEPTS_PIPELINE)[0]}-{i}")
+        exactes.append((question, f"Réponse numéro {i}"))
+    
+    with pool.connexion() as connection:
+        cursor = connection.cursor()
+        cursor.executemany(pool.requetes['apprendre_si_absente'],
+                           [(Alira.normaliser_question(question), reponse) for question, reponse in exactes]
+                           + [(concept, reponse) for concept, reponse in CONCEPTS_PIPELINE])
+        cursor.executemany("INSERT INTO concepts_semantiques (concept_principal, synonyms) VALUES (%s, '[]')",
+                           [(concept,) for concept, _ in CONCEPTS_PIPELINE])
+        connection.commit()
+        cursor.close()
+    return exactes
+
+def charges_pipeline(exactes, requetes, graine):
+    """Trois charges de (question, réponse attendue) : exacte, sémantique, et échec complet
+    (questions uniques, aucune réponse apprise attendue)"""
+    generateur = random.Random(graine)
+    semantiques = []
+    for _ in range(requetes):
+        concept, reponse = generateur.choice(CONCEPTS_PIPELINE)
+        semantiques.append((generateur.choice(GABARITS_SEMANTIQUES).format(concept), reponse))
+    return {
+        "exacte": [generateur.choice(exactes) for _ in range(requetes)],
+        "semantique": semantiques,
+        "echec": [(f"Qu'est-ce que le zorglub {i} du pays imaginaire ?", None) for i in range(requetes)],
+    }
+
+def percentiles(durees):
+    """p50, p95, p99 (ms) et débit (appels/s) d'une série de durées en secondes"""
+    triees = sorted(durees)
+    rang = lambda p: triees[min(len(triees) - 1, int(round(p / 100 * (len(triees) - 1))))] * 1000
+    return {
+        "appels": len(triees),
+        "p50_ms": rang(50),
+        "p95_ms": rang(95),
+        "p99_ms": rang(99),
+        "moyenne_ms": statistics.fmean(triees) * 1000,
+        "debit_par_s": len(triees) / sum(triees) if sum(triees) else 0.0,
+    }
+
+def mesurer(fonction, paires, apprises=frozenset()):
+    """Durées (s) de fonction(question) et part des résultats justes : la réponse attendue,
+    ou aucune réponse apprise quand rien n'est attendu (None si paires sans attendu)"""
+    durees, justes = [], 0
+    for question, attendue in paires:
+        debut = time.perf_counter()
+        resultat = fonction(question)
+        durees.append(time.perf_counter() - debut)
+        if apprises:
+            justes += (resultat == attendue) if attendue is not None else (resultat not in apprises)
+    return durees, justes / len(paires) if apprises else None
+
+def bench_pipeline(connaissances=2000, requetes=300, graine=42, latence_wiki=20):
+    """Latence par étape et de bout en bout sur base SQLite embarquée et Wikipédia simulé"""
+    import os
+    import tempfile
+    
+    dossier = tempfile.mkdtemp(prefix="alira_bench_")
+    wikipedia = WikipediaSimule(latence_wiki)
+    # Les fichiers de l'index vectoriel et du cache Wikipédia restent dans le dossier temporaire
+    os.environ["ALIRA_INDEX_VECTORIEL_FICHIER"] = os.path.join(dossier, "index.npz")
+    os.environ["ALIRA_WIKIPEDIA_CACHE"] = os.path.join(dossier, "wikipedia.sqlite3")
+    os.environ["ALIRA_WIKIPEDIA_URL"] = wikipedia.url
+    # Pas d'index Wikipédia hors ligne : les échecs mesurent bien l'appel réseau simulé
+    os.environ["ALIRA_WIKIPEDIA_INDEX"] = os.path.join(dossier, "absent.sqlite3")
+    # Stockage SQLite d'ALIRA (même schéma et mêmes requêtes que MySQL), dans le dossier temporaire
+    os.environ["ALIRA_STOCKAGE"] = "sqlite"
+    os.environ["ALIRA_SQLITE_FICHIER"] = os.path.join(dossier, "alira.sqlite3")
+    import Alira
+    
+    stockage = Alira.obtenir_stockage()
+    if not stockage.setup_database():
+        raise RuntimeError("base SQLite indisponible")
+    pool = stockage.get_pool()
+    exactes = peupler_base(pool, connaissances, graine)
+    charges = charges_pipeline(exactes, requetes, graine)
+    
+    nlp = Alira.initialiser_spacy()
+    if nlp is None:
+        raise RuntimeError("modèle spaCy indisponible")
+    # Analyses sans cache : chaque mesure paie l'analyse spaCy
+    comprehenseur = Alira.ComprehenseurLinguistique(nlp, Alira.CacheAnalysesLRU(0))
+    memoire = Alira.CoucheMemoireMySQL(nlp, comprehenseur, pool=pool)
+    orchestration = Alira.OrchestrationLinguistique(nlp, comprehenseur)
+    orchestration.wikipedia = Alira.RechercheWikipedia(wikipedia.url, cache=Alira.CacheWikipedia(
+        os.environ["ALIRA_WIKIPEDIA_CACHE"]))
+    orchestration.connecter_memoire(memoire)
+    orchestration.debug_mode = False
+    
+    # Échauffement (chargement paresseux, caches du système)
+    for charge in charges.values():
+        orchestration.traiter_question(charge[0][0])
+    
+    apprises = {reponse for _, reponse in exactes} | {reponse for _, reponse in CONCEPTS_PIPELINE}
+    toutes = [(question, None) for charge in charges.values() for question, _ in charge]
+    etapes = {
+        "preparer_question_pour_modele": {"toutes": mesurer(Alira.preparer_question_pour_modele, toutes)},
+        "analyser_structure_phrase": {"toutes": mesurer(comprehenseur.analyser_structure_phrase, toutes)},
+        "consulter_memoire": {nom: mesurer(memoire.consulter_memoire, charge, apprises)
+                              for nom, charge in charges.items()},
+        "traiter_question": {nom: mesurer(orchestration.traiter_question, charge, apprises)
+                             for nom, charge in charges.items()},
+    }
+    
+    rapport = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "profil_spacy": Alira.SPACY_PROFIL,
+            "connaissances": connaissances,
+            "requetes_par_charge": requetes,
+            "graine": graine,
+            "latence_wikipedia_ms": latence_wiki,
+            "stockage": Alira.STOCKAGE,
+        },
+        "etapes": {
+            etape: {nom: {**percentiles(durees), "justes": justes}
+                    for nom, (durees, justes) in mesures.items()}
+            for etape, mesures in etapes.items()
+        },
+        # Histogrammes par étape, sources et allers-retours base de traiter_question
+        "instrumentation": json.loads(orchestration.instrumentation.exporter_json()),
+    }
+    
+    memoire.fermer()
+    orchestration.fermer()
+    wikipedia.fermer()
+    pool.fermer()
+    return rapport
+
+def git_commit():
+    """Commit courant du dépôt, s'il est connu"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DOSSIER_ALIRA,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def afficher_pipeline(rapport, reference=None):
+    """Affiche les percentiles par étape et charge, avec l'écart de p50 à une exécution de référence"""
+    print(f"{'Étape':<32}{'Charge':<12}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'Débit/s':>10}{'Justes':>9}"
+          + (f"{'p50 réf.':>10}{'Écart':>8}" if reference else ""))
+    print("-" * (103 if reference else 93))
+    for etape, charges in rapport["etapes"].items():
+        for nom, mesure in charges.items():
+            ligne = (f"{etape:<32}{nom:<12}{mesure['p50_ms']:>10.3f}{mesure['p95_ms']:>10.3f}"
+                     f"{mesure['p99_ms']:>10.3f}{mesure['debit_par_s']:>10.0f}"
+                     + (f"{mesure['justes']:>9.0%}" if mesure['justes'] is not None else f"{'-':>9}"))
+            ancienne = (reference or {}).get("etapes", {}).get(etape, {}).get(nom)
+            if ancienne:
+                ligne += f"{ancienne['p50_ms']:>10.3f}{(mesure['p50_ms'] / ancienne['p50_ms'] - 1):>+8.0%}"
+            print(ligne)
+
+# ---------------------------------------------------------
+# PROGRAMME PRINCIPAL
+# ---------------------------------------------------------
+
+def main():
+    """Fonction principale des bancs d'essai"""
+    parser = argparse.ArgumentParser(description="Bancs d'essai d'ALIRA")
+    sous_commandes = parser.add_subparsers(dest="banc", required=True)
+
+    demarrage = sous_commandes.add_parser("demarrage", help="Temps de démarrage à froid")
+    demarrage.add_argument("-n", "--repetitions", type=int, default=5)
+
+    normalisation = sous_commandes.add_parser("normalisation",
+                                              help="Moteur de réécriture contre les re.sub d'origine")
+    normalisation.add_argument("-n", "--repetitions", type=int, default=2000)
+    
+    mots_cles = sous_commandes.add_parser("mots_cles", help="Automate de mots-clés contre parcours linéaire")
+    mots_cles.add_argument("-n", "--repetitions", type=int, default=200)
+    
+    analyse = sous_commandes.add_parser("analyse", help="Analyse spaCy phrase par phrase contre analyser_lot")
+    analyse.add_argument("--phrases", type=int, default=2000)
+    analyse.add_argument("--processus", type=int, nargs="+", default=[1, 2, 4])
+    
+    profils = sous_commandes.add_parser("profils", help="Chargement, RSS et latence par profil spaCy")
+    profils.add_argument("-n", "--repetitions", type=int, default=20)
+    
+    vecteurs = sous_commandes.add_parser("index_vectoriel", help="Recherche top-k de l'index vectoriel")
+    vecteurs.add_argument("--tailles", type=int, nargs="+", default=[1000, 10000, 50000])
+    vecteurs.add_argument("-n", "--requetes", type=int, default=50)
+    
+    correction = sous_commandes.add_parser("correction", help="Correcteur SymSpell comparé à un parcours linéaire")
+    correction.add_argument("--tailles", type=int, nargs="+", default=[1000, 10000, 50000])
+    correction.add_argument("-n", "--requetes", type=int, default=500)
+    
+    plein_texte = sous_commandes.add_parser("plein_texte", help="Recherche BM25 comparée à un parcours de la mémoire")
+    plein_texte.add_argument("--tailles", type=int, nargs="+", default=[1000, 10000, 50000])
+    plein_texte.add_argument("-n", "--requetes", type=int, default=500)
+    
+    pipeline = sous_commandes.add_parser("pipeline", help="Latences par étape et de bout en bout (base SQLite, Wikipédia simulé)")
+    pipeline.add_argument("--connaissances", type=int, default=2000)
+    pipeline.add_argument("-n", "--requetes", type=int, default=300, help="Questions par charge")
+    pipeline.add_argument("--graine", type=int, default=42)
+    pipeline.add_argument("--latence-wiki", type=float, default=20, help="Latence simulée de Wikipédia (ms)")
+    pipeline.add_argument("--sortie", default="bench_pipeline.json", help="Fichier JSON des résultats")
+    pipeline.add_argument("--comparer", help="Résultats JSON d'une exécution précédente")
+    
+    args = parser.parse_args()
+
+    if args.banc == "demarrage":
+        print(f"⏱️ Démarrage à froid ({args.repetitions} répétitions, médianes)")
+        afficher_demarrage(bench_demarrage(args.repetitions))
+    elif args.banc == "normalisation":
+        print(f"⏱️ Normalisation ({len(QUESTIONS_TYPES)} questions x {args.repetitions})")
+        afficher_normalisation(bench_normalisation(args.repetitions))
+    elif args.banc == "mots_cles":
+        print(f"⏱️ Recherche de mots-clés ({len(QUESTIONS_TYPES)} questions x {args.repetitions})")
+        afficher_mots_cles(bench_mots_cles(repetitions=args.repetitions))
+    elif args.banc == "analyse":
+        print(f"⏱️ Analyse en masse ({args.phrases} phrases distinctes)")
+        afficher_analyse(bench_analyse(args.phrases, args.processus), args.phrases)
+    elif args.banc == "profils":
+        print(f"⏱️ Profils spaCy ({len(QUESTIONS_TYPES)} questions x {args.repetitions})")
+        afficher_profils(bench_profils(args.repetitions))
+    elif args.banc == "index_vectoriel":
+        print(f"⏱️ Index vectoriel ({args.requetes} recherches par taille)")
+        afficher_index_vectoriel(bench_index_vectoriel(args.tailles, args.requetes))
+    elif args.banc == "correction":
+        print(f"⏱️ Correction orthographique ({args.requetes} mots fautifs par taille)")
+        afficher_correction(bench_correction(args.tailles, args.requetes))
+    elif args.banc == "plein_texte":
+        print(f"⏱️ Index plein texte ({args.requetes} recherches par taille, moitié sur un sujet inconnu)")
+        afficher_plein_texte(bench_plein_texte(args.tailles, args.requetes))
+    elif args.banc == "pipeline":
+        print(f"⏱️ Pipeline ({args.connaissances} connaissances, {args.requetes} questions par charge)")
+        rapport = bench_pipeline(args.connaissances, args.requetes, args.graine, args.latence_wiki)
+        reference = json.loads(Path(args.comparer).read_text(encoding="utf-8")) if args.comparer else None
+        afficher_pipeline(rapport, reference)
+        Path(args.sortie).write_text(json.dumps(rapport, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Résultats écrits dans {args.sortie}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Index Wikipédia hors ligne d'ALIRA - Construit l'index local des résumés
+depuis un dump frwiki (abstracts XML ou JSONL, compressé ou non)
+"""
+
+import os
+import sys
+import bz2
+import gzip
+import json
+import time
+import sqlite3
+import argparse
+import logging
+import re
+import xml.etree.ElementTree as ET
+
+from Alira import IndexWikipediaLocal, RechercheWikipedia, WIKIPEDIA_INDEX_FICHIER, par_lots
+
+# Configuration du logging (remplace celle posée à l'import d'Alira)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)],
+    force=True
+)
+logger = logging.getLogger("ALIRA_WIKIPEDIA")
+
+# Préfixe des titres du dump des résumés (« Wikipédia : Paris »)
+MOTIF_PREFIXE_TITRE = re.compile(r'^Wikip[ée]dia\s*:\s*')
+
+def ouvrir_dump(chemin):
+    """Ouvre le dump en binaire, en décompressant à la volée (.gz, .bz2)"""
+    if chemin.endswith('.gz'):
+        return gzip.open(chemin, 'rb')
+    if chemin.endswith('.bz2'):
+        return bz2.open(chemin, 'rb')
+    return open(chemin, 'rb')
+
+def format_dump(chemin):
+    """xml ou jsonl, d'après l'extension (compression ignorée)"""
+    nom = chemin.lower()
+    for extension in ('.gz', '.bz2'):
+        if nom.endswith(extension):
+            nom = nom[:-len(extension)]
+    return 'jsonl' if nom.endswith(('.jsonl', '.json', '.ndjson')) else 'xml'
+
+def lire_dump_xml(fichier):
+    """Paires (titre, résumé) du dump frwiki-latest-abstract.xml, élément par élément.
+
+    Chaque <doc> est vidé après lecture, et la racine régulièrement : la
+    mémoire reste bornée quelle que soit la taille du dump.
+    """
+    racine = None
+    for evenement, element in ET.iterparse(fichier, events=('start', 'end')):
+        if racine is None:
+            racine = element
+            continue
+        if evenement != 'end' or element.tag != 'doc':
+            continue
+        titre = element.findtext('title') or ''
+        resume = element.findtext('abstract') or ''
+        element.clear()
+        racine.clear()
+        yield MOTIF_PREFIXE_TITRE.sub('', titre), resume
+
+def lire_dump_jsonl(fichier):
+    """Paires (titre, résumé) d'un dump JSONL : clés "title" et "abstract" (ou "extract")"""
+    for numero, ligne in enumerate(fichier, 1):
+        ligne = ligne.strip()
+        if not ligne:
+            continue
+        try:
+            objet = json.loads(ligne)
+        except json.JSONDecodeError:
+            logger.warning(f"⚠️ Ligne {numero} ignorée (JSON invalide)")
+            continue
+        if not isinstance(objet, dict):
+            logger.warning(f"⚠️ Ligne {numero} ignorée (objet JSON attendu)")
+            continue
+        titre = objet.get('title')
+        resume = objet.get('abstract') or objet.get('extract')
+        # Valeurs non textuelles : paire vide, comptée parmi les rejetés
+        yield (titre if isinstance(titre, str) else '',
+               resume if isinstance(resume, str) else '')
+
+def construire_index(source, destination=WIKIPEDIA_INDEX_FICHIER, format_source=None, taille_lot=10000):
+    """Construit l'index dans un fichier temporaire puis le met en place atomiquement.
+
+    Les résumés sont écrits par lots (une transaction chacun) ; seuls ceux
+    que la recherche en ligne accepterait sont gardés. Pour deux titres de
+    même clé normalisée, le premier rencontré est conservé. Retourne les
+    compteurs de la construction.
+    """
+    format_source = format_source or format_dump(source)
+    temporaire = destination + '.tmp'
+    if os.path.exists(temporaire):
+        os.remove(temporaire)
+
+    resultat = {'lus': 0, 'indexes': 0, 'rejetes': 0, 'doublons': 0, 'lots': 0, 'secondes': 0.0}
+    debut = time.perf_counter()
+
+    connexion = sqlite3.connect(temporaire)
+    # Fichier temporaire, remplacé seulement en cas de succès : pas de journal
+    connexion.execute("PRAGMA journal_mode = OFF")
+    connexion.execute("PRAGMA synchronous = OFF")
+    connexion.execute("""
+    CREATE TABLE resumes (
+        titre TEXT PRIMARY KEY,
+        extrait TEXT NOT NULL
+    ) WITHOUT ROWID
+    """)
+    connexion.execute("CREATE TABLE meta (cle TEXT PRIMARY KEY, valeur TEXT)")
+
+    try:
+        with ouvrir_dump(source) as fichier:
+            if format_source == 'jsonl':
+                paires = lire_dump_jsonl(fichier)
+            else:
+                paires = lire_dump_xml(fichier)
+
+            for lot in par_lots(paires, taille_lot):
+                lignes = []
+                for titre, resume in lot:
+                    cle = IndexWikipediaLocal.normaliser_titre(titre)
+                    resume = ' '.join(resume.split())
+                    if not cle or not RechercheWikipedia.formater_extrait(resume):
+                        resultat['rejetes'] += 1
+                        continue
+                    lignes.append((cle, resume))
+
+                avant = connexion.total_changes
+                connexion.executemany("INSERT OR IGNORE INTO resumes (titre, extrait) VALUES (?, ?)", lignes)
+                connexion.commit()
+                ajoutes = connexion.total_changes - avant
+                resultat['indexes'] += ajoutes
+                resultat['doublons'] += len(lignes) - ajoutes
+                resultat['lus'] += len(lot)
+                resultat['lots'] += 1
+                ecoule = time.perf_counter() - debut
+                logger.info(f"📥 Lot {resultat['lots']}: {resultat['lus']} lus | "
+                            f"{resultat['indexes']} indexés | {resultat['lus'] / ecoule:,.0f} résumés/s")
+
+        connexion.executemany("INSERT INTO meta (cle, valeur) VALUES (?, ?)", [
+            ('source', os.path.basename(source)),
+            ('construit_le', time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ('resumes', str(resultat['indexes'])),
+        ])
+        connexion.commit()
+        connexion.close()
+    except BaseException:
+        # Toute erreur (y compris une interruption) : pas de fichier temporaire laissé
+        connexion.close()
+        os.remove(temporaire)
+        raise
+
+    os.replace(temporaire, destination)
+    resultat['secondes'] = time.perf_counter() - debut
+    resultat['octets'] = os.path.getsize(destination)
+    return resultat
+
+def main():
+    """Construit l'index, ou l'interroge avec --chercher"""
+    parser = argparse.ArgumentParser(description="Index Wikipédia hors ligne d'ALIRA")
+    parser.add_argument("dump", nargs="?",
+                        help="Dump des résumés : frwiki-latest-abstract.xml ou JSONL (.gz/.bz2 acceptés)")
+    parser.add_argument("--sortie", default=WIKIPEDIA_INDEX_FICHIER,
+                        help=f"Fichier de l'index (défaut : {WIKIPEDIA_INDEX_FICHIER})")
+    parser.add_argument("--format", choices=["xml", "jsonl"], help="Format du dump (défaut : d'après l'extension)")
+    parser.add_argument("--lot", type=int, default=10000, help="Résumés par transaction (défaut : 10000)")
+    parser.add_argument("--chercher", nargs="+", metavar="QUESTION", help="Interroger l'index existant")
+    args = parser.parse_args()
+
+    if args.chercher:
+        index = IndexWikipediaLocal.ouvrir(args.sortie)
+        if index is None:
+            print(f"❌ Index introuvable: {args.sortie}")
+            sys.exit(1)
+        for question in args.chercher:
+            debut = time.perf_counter()
+            extrait = index.rechercher(question)
+            duree = (time.perf_counter() - debut) * 1000
+            print(f"🔎 {question} ({duree:.3f} ms)\n   {extrait or '∅ aucun résumé'}")
+        index.fermer()
+        return
+
+    if not args.dump:
+        parser.error("dump requis (ou --chercher)")
+
+    print(f"📚 Indexation de {args.dump}...")
+    try:
+        resultat = construire_index(args.dump, args.sortie, args.format, args.lot)
+    except (OSError, ET.ParseError, sqlite3.Error) as e:
+        print(f"❌ Erreur lors de l'indexation: {e}")
+        sys.exit(1)
+
+    debit = resultat['lus'] / resultat['secondes'] if resultat['secondes'] else 0
+    print(f"✅ {resultat['indexes']} résumés indexés | {resultat['rejetes']} rejetés | "
+          f"{resultat['doublons']} titres en double | {resultat['secondes']:.1f}s ({debit:,.0f} résumés/s)")
+    print(f"💾 {args.sortie} ({resultat['octets'] / 1e6:.1f} Mo)")
+
+if __name__ == "__main__":
+    main()
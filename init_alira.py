@@ -4,90 +4,97 @@ Initialisation d'ALIRA - Charge les connaissances de base
 Version complète avec compréhension linguistique
 """
 
-import os
 import sys
-import mysql.connector
-from mysql.connector import Error
+import csv
+import time
+import argparse
+from pathlib import Path
 import logging
 from dotenv import load_dotenv
-import re
 import json
 
-# Configuration du logging
+from Alira import Error, obtenir_stockage, normaliser_question, par_lots
+
+# Configuration du logging (remplace celle posée à l'import d'Alira)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler("alira_init.log"),
         logging.StreamHandler(sys.stdout)
-    ]
+    ],
+    force=True
 )
 logger = logging.getLogger("ALIRA_INIT")
 
 # Charger les variables d'environnement
 load_dotenv()
 
-class InitialisateurALIRA:
-    """Classe pour initialiser la base de connaissances d'ALIRA"""
-    
-    def __init__(self):
-        self.connection = self._get_connection()
+# Longueur maximale d'une clé (colonne question_normalized)
+LONGUEUR_MAX_CLE = 255
+
+def lire_corpus(chemin):
+    """Lit un corpus de paires question/réponse ligne par ligne (JSONL ou CSV).
     
-    def _get_connection(self):
-        """Établit une connexion MySQL"""
-        try:
-            config = {
-                'host': os.getenv('MYSQL_HOST', 'localhost'),
-                'database': os.getenv('MYSQL_DATABASE', 'alira_db'),
-                'user': os.getenv('MYSQL_USER', 'alira_user'),
-                'password': os.getenv('MYSQL_PASSWORD', 'alira_password'),
-                'port': int(os.getenv('MYSQL_PORT', 3306)),
-                'charset': 'utf8mb4',
-                'autocommit': True
-            }
-            connection = mysql.connector.connect(**config)
-            if connection.is_connected():
-                logger.info("✅ Connexion MySQL établie")
-                return connection
+    JSONL : un objet par ligne avec les clés "question" et "reponse" (ou "response").
+    CSV : colonnes "question" et "reponse" (ou "response") si l'en-tête les nomme
+    (sans colonne de réponse nommée, la première autre colonne), sinon les deux
+    premières colonnes. Les lignes inexploitables sont ignorées avec un avertissement.
+    """
+    chemin = Path(chemin)
+    with open(chemin, encoding='utf-8', newline='') as fichier:
+        if chemin.suffix.lower() in ('.jsonl', '.ndjson', '.json'):
+            for numero, ligne in enumerate(fichier, 1):
+                if not ligne.strip():
+                    continue
+                try:
+                    paire = json.loads(ligne)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Ligne {numero} ignorée (JSON invalide)")
+                    continue
+                if not isinstance(paire, dict):
+                    logger.warning(f"⚠️ Ligne {numero} ignorée (objet JSON attendu)")
+                    continue
+                yield paire.get('question'), paire.get('reponse', paire.get('response'))
+        else:
+            lecteur = csv.reader(fichier)
+            entete = next(lecteur, None)
+            if entete is None:
+                return
+            colonnes = [colonne.strip().lower() for colonne in entete]
+            if 'question' in colonnes:
+                i_question = colonnes.index('question')
+                if 'reponse' in colonnes:
+                    i_reponse = colonnes.index('reponse')
+                elif 'response' in colonnes:
+                    i_reponse = colonnes.index('response')
+                elif len(colonnes) > 1:
+                    i_reponse = 1 if i_question == 0 else 0
+                    logger.warning(f"⚠️ Aucune colonne \"reponse\" : réponses lues dans la colonne \"{entete[i_reponse]}\"")
+                else:
+                    logger.error(f"❌ {chemin.name} : colonne \"question\" seule, aucune colonne de réponse")
+                    return
             else:
-                logger.error("❌ Connexion MySQL échouée")
-                return None
-        except Error as e:
-            logger.error(f"❌ Erreur de connexion MySQL: {e}")
-            return None
+                i_question, i_reponse = 0, 1
+                yield entete[0], entete[1] if len(entete) > 1 else None
+            for ligne in lecteur:
+                if len(ligne) > max(i_question, i_reponse):
+                    yield ligne[i_question], ligne[i_reponse]
+
+class InitialisateurALIRA:
+    """Classe pour initialiser la base de connaissances d'ALIRA"""
     
-    def normaliser_question(self, question):
-        """Normalise les questions pour la base de données"""
-        if not question:
-            return question
-            
-        normalisations = {
-            r'c\'est quoi\s+': 'qu\'est-ce que ',
-            r'que veut dire\s+': 'définition ',
-            r'quel est\s+': 'définition ',
-            r'quelle est\s+': 'définition ',
-            r'quels sont\s+': 'définition ',
-            r'explique\s+': 'définition ',
-            r'définis\s+': 'définition ',
-            r'dis moi\s+': 'définition ',
-            r'connais tu\s+': 'définition ',
-            r'sais tu\s+': 'définition ',
-            r'\bville de\b': '',
-            r'\ble\b': '', r'\bla\b': '', r'\bles\b': '', r'\bdes\b': '',
-            r'\bdu\b': '', r'\bde\b': '', r'\bun\b': '', r'\bune\b': ''
-        }
-        
-        question_normalisee = question.lower()
-        for pattern, remplacement in normalisations.items():
-            question_normalisee = re.sub(pattern, remplacement, question_normalisee, flags=re.IGNORECASE)
-        
-        question_normalisee = re.sub(r'[?¿!¡]', '', question_normalisee).strip()
-        question_normalisee = re.sub(r'\s+', ' ', question_normalisee)
-        return question_normalisee
+    def __init__(self, pool=None):
+        self.pool = pool or obtenir_stockage().get_pool()
+        self.connecte = self.pool.tester()
+        if self.connecte:
+            logger.info(f"✅ Connexion {self.pool.moteur} établie")
+        else:
+            logger.error(f"❌ Connexion {self.pool.moteur} échouée")
     
     def charger_connaissances_de_base(self):
         """Charge les connaissances de base dans la base de données"""
-        if not self.connection:
+        if not self.connecte:
             logger.error("❌ Impossible de charger les connaissances: connexion absente")
             return False
         
@@ -287,72 +294,109 @@ class InitialisateurALIRA:
             ("confiance", "La confiance est la conviction que quelqu'un ou quelque chose est fiable, bon, honnête ou efficace. Elle est fondamentale pour les relations humaines et le fonctionnement des sociétés."),
         ]
         
+        resultat = self.charger_en_masse(connaissances)
+        if resultat is None:
+            return False
+        
         try:
-            cursor = self.connection.cursor()
-            compteur = 0
-            
-            for question, reponse in connaissances:
-                question_normalisee = self.normaliser_question(question)
-                
-                # Vérifier si la connaissance existe déjà
-                cursor.execute("SELECT id FROM chatbot_memory WHERE question_normalized = %s", (question_normalisee,))
-                existe = cursor.fetchone()
-                
-                if not existe:
-                    cursor.execute("""
-                    INSERT INTO chatbot_memory (question_normalized, response, learn_count)
-                    VALUES (%s, %s, 1)
-                    """, (question_normalisee, reponse))
-                    
-                    compteur += 1
-                    logger.info(f"➕ Ajout: {question_normalisee}")
-                else:
-                    logger.info(f"⏩ Déjà existant: {question_normalisee}")
-            
-            # Mise à jour des statistiques
-            cursor.execute("""
-            INSERT INTO learning_stats (stat_key, stat_value)
-            VALUES ('connaissances_base', %s)
-            ON DUPLICATE KEY UPDATE stat_value = VALUES(stat_value)
-            """, (compteur,))
-            
-            self.connection.commit()
-            cursor.close()
-            
-            logger.info(f"✅ {compteur} connaissances de base chargées avec succès")
+            with self.pool.connexion() as connection:
+                cursor = connection.cursor()
+                # Mise à jour des statistiques
+                cursor.execute(self.pool.requetes['statistique_definir'],
+                               ('connaissances_base', resultat['ajoutees']))
+                connection.commit()
+                cursor.close()
+            
+            logger.info(f"✅ {resultat['ajoutees']} connaissances de base chargées avec succès "
+                        f"({resultat['existantes']} déjà existantes)")
             return True
             
         except Error as e:
             logger.error(f"❌ Erreur lors du chargement des connaissances: {e}")
             return False
     
+    def charger_en_masse(self, paires, taille_lot=5000):
+        """Insère des paires (question, réponse) par lots.
+        
+        Les paires sont consommées au fil de l'eau (générateur accepté),
+        normalisées lot par lot et écrites avec un INSERT ignorant les doublons,
+        une transaction par lot : les questions déjà connues sont conservées.
+        Retourne les compteurs du chargement, ou None en cas d'erreur.
+        """
+        if not self.connecte:
+            logger.error("❌ Impossible de charger les connaissances: connexion absente")
+            return None
+        
+        resultat = {'lues': 0, 'ajoutees': 0, 'existantes': 0, 'rejetees': 0, 'lots': 0, 'secondes': 0.0}
+        debut = time.perf_counter()
+        
+        try:
+            with self.pool.connexion() as connection:
+                cursor = connection.cursor()
+                
+                for lot in par_lots(paires, taille_lot):
+                    # Normalisation et dédoublonnage dans le lot (la dernière réponse l'emporte)
+                    lignes = {}
+                    for question, reponse in lot:
+                        question_normalisee = normaliser_question(question or '')
+                        reponse = (reponse or '').strip()
+                        if not question_normalisee or not reponse or len(question_normalisee) > LONGUEUR_MAX_CLE:
+                            resultat['rejetees'] += 1
+                            continue
+                        lignes[question_normalisee] = reponse
+                    
+                    if lignes:
+                        cursor.executemany(self.pool.requetes['apprendre_si_absente'], list(lignes.items()))
+                        connection.commit()
+                        ajoutees = max(cursor.rowcount, 0)
+                        resultat['ajoutees'] += ajoutees
+                        resultat['existantes'] += len(lignes) - ajoutees
+                    
+                    resultat['lues'] += len(lot)
+                    resultat['lots'] += 1
+                    ecoule = time.perf_counter() - debut
+                    logger.info(f"📥 Lot {resultat['lots']}: {resultat['lues']} lues | "
+                                f"{resultat['ajoutees']} ajoutées | {resultat['lues'] / ecoule:,.0f} lignes/s")
+                
+                cursor.close()
+        
+        except Error as e:
+            logger.error(f"❌ Erreur lors du chargement en masse (lot {resultat['lots'] + 1}): {e}")
+            return None
+        
+        resultat['secondes'] = time.perf_counter() - debut
+        return resultat
+    
     def creer_structure_semantique(self):
         """Crée la structure sémantique de base"""
-        if not self.connection:
+        if not self.connecte:
             return False
         
         try:
-            cursor = self.connection.cursor()
-            
-            # Concepts sémantiques de base
-            concepts_semantiques = [
-                ("technology", json.dumps(["informatique", "digital", "électronique", "innovation"]), json.dumps(["science", "innovation"])),
-                ("science", json.dumps(["connaissance", "recherche", "découverte", "méthode"]), json.dumps(["éducation", "savoir"])),
-                ("education", json.dumps(["apprentissage", "enseignement", "savoir", "connaissance"]), json.dumps(["développement", "culture"])),
-                ("culture", json.dumps(["art", "tradition", "société", "histoire"]), json.dumps(["éducation", "société"])),
-                ("santé", json.dumps(["bien-être", "médecine", "hygiène", "forme"]), json.dumps(["vie", "corps"])),
-                ("nature", json.dumps(["environnement", "écologie", "faune", "flore"]), json.dumps(["science", "vie"])),
-            ]
-            
-            for concept, synonyms, categories in concepts_semantiques:
-                cursor.execute("""
-                INSERT INTO concepts_semantiques (concept_principal, synonyms, categories)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE synonyms = VALUES(synonyms), categories = VALUES(categories)
-                """, (concept, synonyms, categories))
-            
-            self.connection.commit()
-            cursor.close()
+            with self.pool.connexion() as connection:
+                cursor = connection.cursor()
+                
+                # Concepts sémantiques de base
+                concepts_semantiques = [
+                    ("technology", json.dumps(["informatique", "digital", "électronique", "innovation"]), json.dumps(["science", "innovation"])),
+                    ("science", json.dumps(["connaissance", "recherche", "découverte", "méthode"]), json.dumps(["éducation", "savoir"])),
+                    ("education", json.dumps(["apprentissage", "enseignement", "savoir", "connaissance"]), json.dumps(["développement", "culture"])),
+                    ("culture", json.dumps(["art", "tradition", "société", "histoire"]), json.dumps(["éducation", "société"])),
+                    ("santé", json.dumps(["bien-être", "médecine", "hygiène", "forme"]), json.dumps(["vie", "corps"])),
+                    ("nature", json.dumps(["environnement", "écologie", "faune", "flore"]), json.dumps(["science", "vie"])),
+                ]
+                
+                for concept, synonyms, categories in concepts_semantiques:
+                    cursor.execute(self.pool.requetes['concept_definir'], (concept, synonyms, categories))
+                    cursor.execute("SELECT id FROM concepts_semantiques WHERE concept_principal = %s", (concept,))
+                    concept_id = cursor.fetchone()[0]
+                    
+                    # Synonymes indexés (table synonymes_concepts)
+                    cursor.executemany(self.pool.requetes['synonyme'],
+                                       [(synonyme, concept_id) for synonyme in json.loads(synonyms)])
+                
+                connection.commit()
+                cursor.close()
             logger.info("✅ Structure sémantique créée avec succès")
             return True
             
@@ -360,15 +404,53 @@ class InitialisateurALIRA:
             logger.error(f"❌ Erreur création structure sémantique: {e}")
             return False
 
+def charger_corpus_semantique(pool, chemin, taille_lot, n_process):
+    """Importe un corpus par la mémoire sémantique (analyse spaCy en flux, multi-processus)"""
+    from Alira import initialiser_spacy, ComprehenseurLinguistique, CoucheMemoireMySQL
+    
+    nlp = initialiser_spacy()
+    if nlp is None:
+        return None
+    
+    memoire = CoucheMemoireMySQL(nlp, ComprehenseurLinguistique(nlp), pool=pool)
+    debut = time.perf_counter()
+    lues = 0
+    
+    def paires():
+        nonlocal lues
+        for paire in lire_corpus(chemin):
+            lues += 1
+            yield paire
+    
+    ajoutees = memoire.sauvegarder_connaissances_batch(paires(), taille_lot, n_process=n_process)
+    memoire.fermer()
+    return {'lues': lues, 'ajoutees': ajoutees, 'rejetees': lues - ajoutees,
+            'secondes': time.perf_counter() - debut}
+
 def main():
     """Fonction principale d'initialisation"""
+    parser = argparse.ArgumentParser(description="Initialisation des connaissances d'ALIRA")
+    parser.add_argument("--corpus", help="Corpus JSONL ou CSV de paires question/réponse à charger en masse")
+    parser.add_argument("--lot", type=int, default=5000, help="Nombre de lignes par transaction (défaut : 5000)")
+    parser.add_argument("--semantique", action="store_true",
+                        help="Importer le corpus avec analyse spaCy (concepts, variations, relations)")
+    parser.add_argument("--processus", type=int, default=1,
+                        help="Processus d'analyse spaCy pour --semantique (-1 : un par cœur)")
+    args = parser.parse_args()
+    
     print("🔧 Initialisation des connaissances de base d'ALIRA...")
     print("=" * 60)
     
-    initialisateur = InitialisateurALIRA()
-    if not initialisateur.connection:
+    stockage = obtenir_stockage()
+    if not stockage.setup_database():
+        print("❌ Impossible de préparer la base de données")
+        print("💡 Vérifiez votre configuration (ALIRA_STOCKAGE, MySQL) dans le fichier .env")
+        return
+    
+    initialisateur = InitialisateurALIRA(stockage.get_pool())
+    if not initialisateur.connecte:
         print("❌ Impossible de se connecter à la base de données")
-        print("💡 Vérifiez votre configuration MySQL dans le fichier .env")
+        print("💡 Vérifiez votre configuration (ALIRA_STOCKAGE, MySQL) dans le fichier .env")
         return
     
     print("📦 Chargement des connaissances de base...")
@@ -383,6 +465,20 @@ def main():
     else:
         print("❌ Erreur lors du chargement des connaissances")
     
+    if args.corpus:
+        print(f"📚 Chargement du corpus {args.corpus}...")
+        if args.semantique:
+            resultat = charger_corpus_semantique(initialisateur.pool, args.corpus, args.lot, args.processus)
+        else:
+            resultat = initialisateur.charger_en_masse(lire_corpus(args.corpus), args.lot)
+        if resultat:
+            debit = resultat['lues'] / resultat['secondes'] if resultat['secondes'] else 0
+            existantes = f"{resultat['existantes']} déjà existantes | " if 'existantes' in resultat else ""
+            print(f"✅ {resultat['ajoutees']} ajoutées | {existantes}"
+                  f"{resultat['rejetees']} rejetées | {resultat['secondes']:.1f}s ({debit:,.0f} lignes/s)")
+        else:
+            print("❌ Erreur lors du chargement du corpus")
+    
     print("=" * 60)
     print("🎯 ALIRA est maintenant prêt à fonctionner !")
     print("💡 Lancez le programme principal avec: python alira_core.py")
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Serveur HTTP d'ALIRA - Une instance partagée par de nombreux utilisateurs
+
+Points d'accès (JSON) :
+    POST /ask    {"question": "..."}                 -> {"reponse": "...", "duree_ms": ...}
+    GET  /ask?question=...
+    POST /learn  {"question": "...", "reponse": "..."} -> {"enregistre": true}
+    GET  /sante                                      -> état du serveur
+    GET  /metriques[?format=json]                    -> mesures par étape (texte Prometheus ou JSON)
+
+La boucle asyncio ne fait que lire et écrire les sockets : l'analyse spaCy
+et les accès MySQL tournent dans un pool de threads borné.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+from dotenv import load_dotenv
+
+import Alira
+
+logger = logging.getLogger("ALIRA_SERVEUR")
+
+# Charger les variables d'environnement
+load_dotenv()
+
+# Adresse d'écoute, nombre de threads de traitement, requêtes acceptées en
+# attente d'un thread (au-delà : 503), taille maximale d'un corps (octets),
+# délai d'inactivité d'une connexion (s) et délai d'arrêt propre (s)
+SERVEUR_HOTE = os.getenv('ALIRA_SERVEUR_HOTE', '127.0.0.1')
+SERVEUR_PORT = int(os.getenv('ALIRA_SERVEUR_PORT', 8080))
+SERVEUR_WORKERS = int(os.getenv('ALIRA_SERVEUR_WORKERS', 4))
+SERVEUR_FILE = int(os.getenv('ALIRA_SERVEUR_FILE', 64))
+SERVEUR_CORPS_MAX = int(os.getenv('ALIRA_SERVEUR_CORPS_MAX', 64 * 1024))
+SERVEUR_DELAI_INACTIVITE = float(os.getenv('ALIRA_SERVEUR_DELAI_INACTIVITE', 15))
+SERVEUR_DELAI_ARRET = float(os.getenv('ALIRA_SERVEUR_DELAI_ARRET', 10))
+
+class ErreurHTTP(Exception):
+    """Erreur renvoyée au client avec son code HTTP"""
+
+    def __init__(self, statut, message=None):
+        super().__init__(message or statut.phrase)
+        self.statut = statut
+        self.message = message or statut.phrase
+
+class ServeurALIRA:
+    """Serveur HTTP/1.1 minimal (keep-alive, corps JSON) autour de l'orchestration"""
+
+    def __init__(self, alira, hote=SERVEUR_HOTE, port=SERVEUR_PORT,
+                 workers=SERVEUR_WORKERS, file=SERVEUR_FILE):
+        self.alira = alira
+        self.hote = hote
+        self.port = port
+        self.workers = workers
+        self.executeur = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="alira-serveur")
+        # Jetons de travail : les threads occupés plus la file d'attente autorisée
+        self._places = asyncio.Semaphore(workers + file)
+        self._serveur = None
+        self._connexions = set()
+        self._inactives = set()
+        self._en_cours = 0
+        self._arret = None
+        self.requetes = 0
+        self.refus = 0
+        self.routes = {
+            ('POST', '/ask'): self.demander,
+            ('GET', '/ask'): self.demander,
+            ('POST', '/learn'): self.apprendre,
+            ('GET', '/sante'): self.sante,
+            ('GET', '/metriques'): self.metriques,
+        }
+
+    # --- Points d'accès -------------------------------------------------
+
+    async def demander(self, requete):
+        """Répond à une question"""
+        question = str(requete.get('question') or '').strip()
+        if not question:
+            raise ErreurHTTP(HTTPStatus.BAD_REQUEST, "champ 'question' manquant")
+        debut = time.perf_counter()
+        reponse = await self._executer(self.alira['orchestration'].traiter_question, question)
+        return {'question': question, 'reponse': reponse,
+                'duree_ms': round((time.perf_counter() - debut) * 1000, 1)}
+
+    async def apprendre(self, requete):
+        """Enregistre une connaissance"""
+        question = str(requete.get('question') or '').strip()
+        reponse = str(requete.get('reponse') or requete.get('response') or '').strip()
+        if not question or not reponse:
+            raise ErreurHTTP(HTTPStatus.BAD_REQUEST, "champs 'question' et 'reponse' requis")
+        enregistre = await self._executer(self.alira['memoire'].sauvegarder_connaissance, question, reponse)
+        return {'enregistre': bool(enregistre)}
+
+    async def sante(self, requete):
+        """État du serveur"""
+        return {
+            'statut': 'arret' if self._arret and self._arret.is_set() else 'ok',
+            'version': Alira.VERSION,
+            'workers': self.workers,
+            'en_cours': self._en_cours,
+            'requetes': self.requetes,
+            'refus': self.refus,
+            'modele_charge': getattr(self.alira['nlp'], 'charge', True),
+        }
+
+    async def metriques(self, requete):
+        """Histogrammes des étapes de traiter_question (texte Prometheus par défaut)"""
+        instrumentation = self.alira['orchestration'].instrumentation
+        if requete.get('format') == 'json':
+            return json.loads(instrumentation.exporter_json())
+        return instrumentation.exporter_prometheus()
+
+    async def _executer(self, fonction, *args):
+        """Exécute un traitement bloquant dans le pool borné (503 si la file est pleine)"""
+        if self._places.locked():
+            self.refus += 1
+            raise ErreurHTTP(HTTPStatus.SERVICE_UNAVAILABLE, "serveur saturé, réessayez")
+        async with self._places:
+            self._en_cours += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.executeur, fonction, *args)
+            finally:
+                self._en_cours -= 1
+
+    # --- Protocole HTTP -------------------------------------------------
+
+    async def _lire_requete(self, reader):
+        """Lit une requête : (méthode, chemin, paramètres, corps, keep-alive), ou None en fin de connexion"""
+        try:
+            entete = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), SERVEUR_DELAI_INACTIVITE)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErreurHTTP(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+        lignes = entete.decode('latin-1').split('\r\n')
+        try:
+            methode, cible, version = lignes[0].split(' ', 2)
+        except ValueError:
+            raise ErreurHTTP(HTTPStatus.BAD_REQUEST, "ligne de requête invalide")
+        en_tetes = {}
+        for ligne in lignes[1:]:
+            if ':' in ligne:
+                nom, valeur = ligne.split(':', 1)
+                en_tetes[nom.strip().lower()] = valeur.strip()
+
+        try:
+            longueur = int(en_tetes.get('content-length', 0))
+        except ValueError:
+            raise ErreurHTTP(HTTPStatus.BAD_REQUEST, "Content-Length invalide")
+        if longueur > SERVEUR_CORPS_MAX:
+            raise ErreurHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        corps = await reader.readexactly(longueur) if longueur else b''
+
+        url = urlsplit(cible)
+        parametres = {cle: valeurs[-1] for cle, valeurs in parse_qs(url.query).items()}
+        garder = (version.upper() == 'HTTP/1.1' and en_tetes.get('connection', '').lower() != 'close')
+        return methode.upper(), url.path.rstrip('/') or '/', parametres, corps, garder
+
+    def _decoder_corps(self, corps, parametres):
+        """Paramètres de la requête : corps JSON fusionné aux paramètres d'URL"""
+        if not corps:
+            return parametres
+        try:
+            donnees = json.loads(corps.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ErreurHTTP(HTTPStatus.BAD_REQUEST, "corps JSON invalide")
+        if not isinstance(donnees, dict):
+            raise ErreurHTTP(HTTPStatus.BAD_REQUEST, "un objet JSON est attendu")
+        return {**parametres, **donnees}
+
+    @staticmethod
+    def _ecrire_reponse(writer, statut, donnees, garder):
+        """Écrit la réponse : JSON, ou texte brut si le point d'accès retourne une chaîne"""
+        if isinstance(donnees, str):
+            corps, type_contenu = donnees.encode('utf-8'), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            corps, type_contenu = json.dumps(donnees, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8"
+        en_tetes = [
+            f"HTTP/1.1 {statut.value} {statut.phrase}",
+            f"Content-Type: {type_contenu}",
+            f"Content-Length: {len(corps)}",
+            f"Connection: {'keep-alive' if garder else 'close'}",
+        ]
+        if statut == HTTPStatus.SERVICE_UNAVAILABLE:
+            en_tetes.append("Retry-After: 1")
+        writer.write(('\r\n'.join(en_tetes) + '\r\n\r\n').encode('latin-1') + corps)
+
+    async def _servir_connexion(self, reader, writer):
+        """Traite les requêtes successives d'une connexion (keep-alive)"""
+        tache = asyncio.current_task()
+        self._connexions.add(tache)
+        try:
+            garder = True
+            while garder and not self._arret.is_set():
+                try:
+                    self._inactives.add(tache)
+                    try:
+                        requete = await self._lire_requete(reader)
+                    except asyncio.CancelledError:
+                        break   # arrêt du serveur pendant l'attente d'une requête
+                    finally:
+                        self._inactives.discard(tache)
+                    if requete is None:
+                        break
+                    methode, chemin, parametres, corps, garder = requete
+                    self.requetes += 1
+
+                    route = self.routes.get((methode, chemin))
+                    if route is None:
+                        if any(chemin == chemin_route for _, chemin_route in self.routes):
+                            raise ErreurHTTP(HTTPStatus.METHOD_NOT_ALLOWED)
+                        raise ErreurHTTP(HTTPStatus.NOT_FOUND)
+                    statut, donnees = HTTPStatus.OK, await route(self._decoder_corps(corps, parametres))
+                except ErreurHTTP as e:
+                    statut, donnees = e.statut, {'erreur': e.message}
+                    garder = garder and e.statut < 500 and e.statut not in (
+                        HTTPStatus.REQUEST_ENTITY_TOO_LARGE, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    logger.exception(f"Erreur de traitement: {e}")
+                    statut, donnees, garder = HTTPStatus.INTERNAL_SERVER_ERROR, {'erreur': "erreur interne"}, False
+
+                garder = garder and not self._arret.is_set()
+                self._ecrire_reponse(writer, statut, donnees, garder)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connexions.discard(tache)
+            writer.close()
+
+    # --- Cycle de vie ---------------------------------------------------
+
+    async def servir(self):
+        """Écoute jusqu'à SIGINT/SIGTERM, puis s'arrête proprement"""
+        self._arret = asyncio.Event()
+        boucle = asyncio.get_running_loop()
+        for signal_arret in (signal.SIGINT, signal.SIGTERM):
+            try:
+                boucle.add_signal_handler(signal_arret, self._arret.set)
+            except (NotImplementedError, RuntimeError):
+                pass    # Windows : Ctrl+C lève KeyboardInterrupt
+
+        self._serveur = await asyncio.start_server(self._servir_connexion, self.hote, self.port)
+        logger.info(f"🌐 ALIRA écoute sur http://{self.hote}:{self.port} ({self.workers} workers)")
+        try:
+            await self._arret.wait()
+        finally:
+            await self.arreter()
+
+    async def arreter(self):
+        """Refuse les nouvelles connexions, laisse finir les requêtes en cours, puis libère les ressources"""
+        self._arret.set()
+        logger.info("🛑 Arrêt du serveur : fin des requêtes en cours...")
+        self._serveur.close()
+
+        # Les connexions inactives attendent une requête : elles sont fermées
+        # tout de suite ; les autres ont jusqu'au délai d'arrêt pour finir
+        for tache in list(self._inactives):
+            tache.cancel()
+        if self._connexions:
+            _, restantes = await asyncio.wait(list(self._connexions), timeout=SERVEUR_DELAI_ARRET)
+            for tache in restantes:
+                tache.cancel()
+            await asyncio.gather(*restantes, return_exceptions=True)
+        await self._serveur.wait_closed()
+
+        self.executeur.shutdown(wait=True)
+        self.alira['orchestration'].fermer()
+        self.alira['memoire'].fermer()
+        logger.info(f"✅ Serveur arrêté ({self.requetes} requêtes servies, {self.refus} refusées)")
+
+def prechauffer(alira):
+    """Charge spaCy et exécute une première analyse avant d'accepter des connexions.
+
+    Avec ALIRA_SPACY_PARESSEUX=1 (défaut), le modèle serait sinon chargé par
+    la première requête qui en a besoin : plusieurs secondes pendant
+    lesquelles un thread de traitement est occupé et la file se remplit.
+    """
+    nlp = alira['nlp']
+    if nlp is None:
+        return
+    debut = time.perf_counter()
+    try:
+        nlp("Bonjour ALIRA, comment fonctionne la mémoire ?")
+    except Exception as e:
+        # L'échec est retenu par le chargeur : les requêtes sont servies sans analyse
+        logger.error(f"❌ Préchauffage spaCy impossible, analyse linguistique désactivée: {e}")
+        return
+    logger.info(f"🔥 spaCy prêt ({time.perf_counter() - debut:.2f}s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur HTTP d'ALIRA")
+    parser.add_argument("--hote", default=SERVEUR_HOTE, help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=SERVEUR_PORT, help="Port d'écoute")
+    parser.add_argument("--workers", type=int, default=SERVEUR_WORKERS,
+                        help="Threads de traitement (spaCy et base de données)")
+    parser.add_argument("--file", type=int, default=SERVEUR_FILE,
+                        help="Requêtes en attente d'un thread avant de répondre 503")
+    args = parser.parse_args()
+
+    if not Alira.verifier_et_installer_dependances() or not Alira.verifier_modele_spacy():
+        print("❌ Impossible d'installer les dépendances nécessaires")
+        sys.exit(1)
+    stockage = Alira.obtenir_stockage()
+    if not stockage.setup_database() or not stockage.test_connection():
+        print("❌ Impossible de se connecter au sanctuaire")
+        sys.exit(1)
+
+    alira = Alira.initialiser_alira()
+    alira['orchestration'].debug_mode = False
+    prechauffer(alira)
+
+    serveur = ServeurALIRA(alira, args.hote, args.port, args.workers, args.file)
+    try:
+        asyncio.run(serveur.servir())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()